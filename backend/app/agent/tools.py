@@ -6,7 +6,7 @@ from typing import Dict, Optional
 
 from sqlmodel import Session, select  # type: ignore[import-not-found]
 
-from app.db.database import PriceData, Stock, get_session
+from app.db.database import PriceData, Stock, session_scope
 
 _prediction_service: Optional["PredictionService"] = None
 _sentiment_service: Optional["SentimentService"] = None
@@ -91,7 +91,7 @@ def _compute_historical_stats(history):
 
 def get_stock_prediction(stock_code: str) -> Dict:
     """Call prediction service for stock_code."""
-    with get_session() as session:
+    with session_scope() as session:
         stock = _get_stock(session, stock_code)
         stock_id = stock.id if stock.id is not None else 0
         rows = _get_history(session, stock_id)
@@ -116,7 +116,7 @@ def get_stock_prediction(stock_code: str) -> Dict:
 
 def get_anomaly_detection(stock_code: str) -> Dict:
     """Call anomaly detection service for stock_code."""
-    with get_session() as session:
+    with session_scope() as session:
         stock = _get_stock(session, stock_code)
         stock_id = stock.id if stock.id is not None else 0
         history = _get_history(session, stock_id)
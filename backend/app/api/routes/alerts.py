@@ -2,45 +2,39 @@
 
 from __future__ import annotations
 
-import asyncio
-from datetime import datetime
-from typing import List
+import json
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
 from sqlmodel import Session, select
 
-from app.core.auth import get_current_user
-from app.db.database import Alert, User, get_session
+from app.core.auth import get_current_user, get_user_for_token
+from app.db.database import PriceAlertRule, User, get_session, session_scope
+from app.models.schemas import PriceTargetRequest
+from app.services import alert_feed
+from app.services.alert_hub import alert_hub
+from app.services.alert_pipeline import alert_pipeline
+from app.services.price_alerts import PriceTarget, price_alert_engine
 
 router = APIRouter(prefix="/api/alerts", tags=["alerts"])
 
 
-class AlertConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in list(self.active_connections):
-            await connection.send_json(message)
-
-
-manager = AlertConnectionManager()
-
-
 @router.get("")
 def get_alerts(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
-    alerts = session.exec(select(Alert).order_by(Alert.timestamp.desc()).limit(50)).all()
+    """Newest alerts first (market-wide and the user's own); the next page's cursor is in X-Next-Cursor."""
+    try:
+        cursor = alert_feed.decode_cursor(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    alerts, next_cursor = alert_feed.feed(session, current_user.supabase_uid, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return alerts
 
 
@@ -49,8 +43,16 @@ def unread_alerts(
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
-    count = session.exec(select(Alert).where(Alert.is_read == False)).all()
-    return {"unread": len(count)}
+    return {"unread": alert_feed.unread_count(session, current_user.supabase_uid)}
+
+
+@router.post("/read-all")
+def mark_all_read(
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    alert_feed.mark_all_read(session, current_user.supabase_uid)
+    return {"status": "ok"}
 
 
 @router.post("/{alert_id}/read")
@@ -59,26 +61,107 @@ def mark_read(
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
-    alert = session.exec(select(Alert).where(Alert.id == alert_id)).first()
-    if not alert:
+    if not alert_feed.mark_read(session, current_user.supabase_uid, alert_id):
         return {"status": "not_found"}
-    alert.is_read = True
-    session.add(alert)
+    return {"status": "ok"}
+
+
+@router.get("/price-targets")
+def list_price_targets(
+    active: bool = Query(True, description="Only rules that have not fired yet"),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    query = select(PriceAlertRule).where(PriceAlertRule.user_id == current_user.supabase_uid)
+    if active:
+        query = query.where(PriceAlertRule.is_active == True)  # noqa: E712
+    return session.exec(query.order_by(PriceAlertRule.created_at.desc())).all()
+
+
+@router.post("/price-targets")
+def create_price_target(
+    payload: PriceTargetRequest,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """One-shot rule: fires the first time a live quote reaches the target, then deactivates."""
+    rule = PriceAlertRule(
+        user_id=current_user.supabase_uid,
+        stock_code=payload.stock_code.upper(),
+        direction=payload.direction,
+        target_price=payload.target_price,
+    )
+    session.add(rule)
+    session.commit()
+    session.refresh(rule)
+    price_alert_engine.add(PriceTarget(rule.id, rule.user_id, rule.stock_code, rule.direction, rule.target_price))
+    return rule
+
+
+@router.delete("/price-targets/{rule_id}")
+def delete_price_target(
+    rule_id: int,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    rule = session.exec(
+        select(PriceAlertRule).where(PriceAlertRule.id == rule_id, PriceAlertRule.user_id == current_user.supabase_uid)
+    ).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Price target not found")
+    price_alert_engine.remove(rule.id)
+    session.delete(rule)
     session.commit()
     return {"status": "ok"}
 
 
+@router.get("/price-targets/stats")
+def price_target_stats():
+    """Price-target engine counters: indexed rules, stocks, ticks evaluated, rules fired."""
+    return price_alert_engine.stats()
+
+
+@router.get("/pipeline")
+def alert_pipeline_stats():
+    """Alert pipeline counters: submitted, deduplicated, rate-limited, inserted, events/sec, push latency."""
+    return alert_pipeline.stats()
+
+
+@router.get("/ws/stats")
+def alerts_ws_stats():
+    """Fan-out hub counters: connections, queued, dropped and slow-consumer disconnects."""
+    return alert_hub.stats()
+
+
+def _csv(value: Optional[str]) -> List[str]:
+    return [part for part in (value or "").split(",") if part.strip()]
+
+
 @router.websocket("/ws/alerts")
-async def alerts_ws(websocket: WebSocket):
-    await manager.connect(websocket)
+async def alerts_ws(
+    websocket: WebSocket,
+    stocks: Optional[str] = Query(None, description="Comma-separated stock codes, e.g. SFBT,BIAT"),
+    severity: Optional[str] = Query(None, description="Comma-separated severities, e.g. high,medium"),
+    token: Optional[str] = Query(None, description="Access token; without it only market-wide alerts are pushed"),
+):
+    user = None
+    if token:
+        with session_scope() as session:
+            user = await get_user_for_token(token, session)
+    subscription = await alert_hub.subscribe(
+        websocket, _csv(stocks), _csv(severity), user_id=user.supabase_uid if user else None
+    )
     try:
         while True:
-            await asyncio.sleep(5)
-            await manager.broadcast(
-                {
-                    "type": "heartbeat",
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
-            )
+            # Clients may narrow or widen their filter: {"stocks": [...], "severity": [...]}
+            message = await websocket.receive_text()
+            try:
+                update = json.loads(message)
+            except ValueError:
+                continue
+            if isinstance(update, dict):
+                subscription.set_filter(update.get("stocks"), update.get("severity"))
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        alert_hub.unsubscribe(subscription)
@@ -3,10 +3,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from sqlmodel import Session, select
-from supabase import create_client
 
-from app.core.auth import get_current_user
-from app.core.config import SUPABASE_KEY, SUPABASE_URL, UserRole
+from app.core.auth import get_current_user, get_supabase_client
+from app.core.config import UserRole
 from app.db.database import User, get_session
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -47,7 +46,7 @@ async def signup(request: SignUpRequest, session: Session = Depends(get_session)
         )
 
     try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase = get_supabase_client()
 
         auth_response = supabase.auth.sign_up(
             {
@@ -98,7 +97,7 @@ async def signup(request: SignUpRequest, session: Session = Depends(get_session)
 async def login(request: LoginRequest, session: Session = Depends(get_session)):
     """Login user."""
     try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase = get_supabase_client()
 
         auth_response = supabase.auth.sign_in_with_password(
             {"email": request.email, "password": request.password}
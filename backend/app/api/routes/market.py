@@ -2,50 +2,53 @@
 
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import desc
-from sqlmodel import Session, select  # type: ignore[import-not-found]
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session  # type: ignore[import-not-found]
+from sqlmodel.ext.asyncio.session import AsyncSession  # type: ignore[import-not-found]
 
-from app.db.database import PriceData, Stock, get_session
+from app.db.database import get_async_session, get_session
+from app.db.queries import group_latest_prices, latest_prices_statement
 from app.services.sentiment import SentimentService
 from app.services.market_data import market_data_service
+from app.services.market_poller import MarketSnapshot, live_market_poller
 
 router = APIRouter(prefix="/api/market", tags=["market"])
+MAX_BATCH_QUOTES = 100
 sentiment_service = SentimentService()
 
 
-def _latest_prices(session: Session) -> Dict[str, Dict]:
-    statement = select(Stock)
-    stocks = session.exec(statement).all()
+def _price_change(latest) -> Optional[Dict]:
+    if not latest:
+        return None
+    current = latest[0]
+    previous = latest[1] if len(latest) > 1 else None
+    change_pct = (
+        (current.close - previous.close) / previous.close * 100
+        if previous and previous.close
+        else 0.0
+    )
+    return {
+        "close": current.close,
+        "change_pct": round(change_pct, 2),
+    }
+
+
+def _price_changes(rows) -> Dict[str, Dict]:
     results: Dict[str, Dict] = {}
-    for stock in stocks:
-        latest = session.exec(
-            select(PriceData)
-            .where(PriceData.stock_id == stock.id)
-            .order_by(desc(PriceData.date))
-            .limit(2)
-        ).all()
-        if not latest:
-            continue
-        current = latest[0]
-        previous = latest[1] if len(latest) > 1 else None
-        change_pct = (
-            (current.close - previous.close) / previous.close * 100
-            if previous and previous.close
-            else 0.0
-        )
-        results[stock.code] = {
-            "close": current.close,
-            "change_pct": round(change_pct, 2),
-        }
+    for stock, latest in group_latest_prices(rows):
+        change = _price_change(latest)
+        if change:
+            results[stock.code] = change
     return results
 
 
-@router.get("/overview")
-def market_overview(session: Session = Depends(get_session)):
-    prices = _latest_prices(session)
+def _latest_prices(session: Session) -> Dict[str, Dict]:
+    return _price_changes(session.exec(latest_prices_statement()).all())
+
+
+def _overview_payload(prices: Dict[str, Dict]) -> Dict:
     if not prices:
         return {
             "index_name": "TUNINDEX",
@@ -71,9 +74,7 @@ def market_overview(session: Session = Depends(get_session)):
     }
 
 
-@router.get("/top-movers")
-def top_movers(session: Session = Depends(get_session)):
-    prices = _latest_prices(session)
+def _top_movers_payload(prices: Dict[str, Dict]) -> Dict:
     sorted_codes = sorted(prices.items(), key=lambda item: item[1]["change_pct"], reverse=True)
     gainers = [
         {"code": code, **info} for code, info in sorted_codes[:5]
@@ -84,27 +85,128 @@ def top_movers(session: Session = Depends(get_session)):
     return {"gainers": gainers, "losers": losers}
 
 
+@router.get("/overview")
+def market_overview(session: Session = Depends(get_session)):
+    return _overview_payload(_latest_prices(session))
+
+
+@router.get("/top-movers")
+def top_movers(session: Session = Depends(get_session)):
+    return _top_movers_payload(_latest_prices(session))
+
+
 @router.get("/sentiment")
 def market_sentiment():
     sample_sentiments: List[Dict] = []
     return sentiment_service.market_sentiment(sample_sentiments)
 
 
+def _with_age(payload: Dict, snapshot: Optional[MarketSnapshot]) -> Dict:
+    """snapshot_age_seconds is None when the payload was fetched live."""
+    return {**payload, "snapshot_age_seconds": snapshot.age_seconds() if snapshot else None}
+
+
 @router.get("/live")
 def live_market_data():
-    return market_data_service.get_market_overview()
+    snapshot = live_market_poller.snapshot
+    if snapshot.tunindex is not None:
+        return _with_age(market_data_service.get_market_overview(snapshot.tunindex), snapshot)
+    return _with_age(market_data_service.get_market_overview(), None)
 
 
 @router.get("/live/quote/{stock_code}")
 def live_stock_quote(stock_code: str):
-    return market_data_service.get_stock_quote(stock_code)
+    """snapshot_age_seconds is how long ago this quote was fetched; 503 when no quote is available."""
+    snapshot = live_market_poller.snapshot
+    if stock_code in snapshot.quotes:
+        return {**snapshot.quotes[stock_code], "snapshot_age_seconds": snapshot.quote_age_seconds(stock_code)}
+    quote = market_data_service.get_stock_quote(stock_code)
+    if quote.get("error"):
+        raise HTTPException(status_code=503, detail=f"No quote for {stock_code}: {quote['error']}")
+    return _with_age(quote, None)
+
+
+@router.get("/live/quotes")
+def live_stock_quotes(codes: str = Query(..., description="Comma-separated stock codes")):
+    """
+    Quotes for several stocks in one call; unavailable symbols are listed in errors.
+    snapshot_age_seconds is the age of the oldest quote served from the snapshot.
+    """
+    requested = list(dict.fromkeys(code.strip() for code in codes.split(",") if code.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No stock codes given")
+    if len(requested) > MAX_BATCH_QUOTES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUOTES} codes per request")
+
+    snapshot = live_market_poller.snapshot
+    quotes = {code: snapshot.quotes[code] for code in requested if code in snapshot.quotes}
+    ages = [snapshot.quote_age_seconds(code) for code in quotes]
+    missing = [code for code in requested if code not in quotes]
+    fetched, errors = market_data_service.get_stock_quotes(missing) if missing else ({}, {})
+    quotes.update(fetched)
+
+    return {
+        "quotes": {code: quotes[code] for code in requested if code in quotes},
+        "errors": errors,
+        "snapshot_age_seconds": max(ages) if ages else None,
+    }
 
 
 @router.get("/live/tunindex")
 def live_tunindex():
-    return market_data_service.get_tunindex()
+    snapshot = live_market_poller.snapshot
+    if snapshot.tunindex is not None:
+        return _with_age(snapshot.tunindex, snapshot)
+    return _with_age(market_data_service.get_tunindex(), None)
 
 
 @router.get("/live/movers")
 def live_top_movers(limit: int = Query(10, ge=1, le=50)):
-    return market_data_service.get_top_movers(limit)
+    snapshot = live_market_poller.snapshot
+    if snapshot.movers is not None:
+        movers = {
+            "gainers": snapshot.movers["gainers"][:limit],
+            "losers": snapshot.movers["losers"][:limit],
+            "timestamp": snapshot.movers["timestamp"],
+        }
+        return _with_age(movers, snapshot)
+    return _with_age(market_data_service.get_top_movers(limit), None)
+
+
+@router.get("/live/poller")
+def live_poller_status():
+    snapshot = live_market_poller.snapshot
+    return {
+        "running": live_market_poller.running,
+        "interval_seconds": live_market_poller.interval,
+        "quotes": len(snapshot.quotes),
+        "snapshot_age_seconds": snapshot.age_seconds(),
+        "last_error": live_market_poller.last_error,
+    }
+
+
+@router.get("/live/http-cache")
+def live_http_cache_stats():
+    try:
+        from scrapers.http_cache import get_http_cache
+    except ImportError:
+        return {"enabled": False}
+    return {"enabled": True, **get_http_cache().stats()}
+
+
+# Async versions of the DB-backed routes, registered ahead of `router` when DATABASE_ASYNC is on
+async_router = APIRouter(prefix="/api/market", tags=["market"])
+
+
+async def _latest_prices_async(session: AsyncSession) -> Dict[str, Dict]:
+    return _price_changes((await session.exec(latest_prices_statement())).all())
+
+
+@async_router.get("/overview")
+async def market_overview_async(session: AsyncSession = Depends(get_async_session)):
+    return _overview_payload(await _latest_prices_async(session))
+
+
+@async_router.get("/top-movers")
+async def top_movers_async(session: AsyncSession = Depends(get_async_session)):
+    return _top_movers_payload(await _latest_prices_async(session))
@@ -3,11 +3,14 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.database import News, get_session
+from app.db.database import News, get_async_session, get_session, session_scope
+from app.services.alert_pipeline import alert_pipeline, sentiment_swing_events
+from app.services.sentiment import get_nlp_analyzer
 
 router = APIRouter(prefix="/api/news", tags=["news"])
 
@@ -42,14 +45,12 @@ class SentimentResult(BaseModel):
     confidence: float
 
 
-@router.get("", response_model=List[NewsItem])
-def list_news(
-    limit: int = Query(20, ge=1, le=100),
-    stock_code: Optional[str] = Query(None),
-    source: Optional[str] = Query(None),
-    language: Optional[str] = Query(None),
-    days: int = Query(30, ge=1, le=365),
-    session: Session = Depends(get_session),
+def _news_statement(
+    limit: int,
+    stock_code: Optional[str],
+    source: Optional[str],
+    language: Optional[str],
+    days: int,
 ):
     query = select(News)
     
@@ -62,9 +63,28 @@ def list_news(
     
     cutoff = datetime.now() - timedelta(days=days)
     query = query.where(News.created_at >= cutoff)
-    query = query.order_by(News.date.desc()).limit(limit)  # type: ignore[union-attr]
-    
-    return session.exec(query).all()
+    return query.order_by(News.date.desc()).limit(limit)  # type: ignore[union-attr]
+
+
+def _stock_news_statement(stock_code: str, limit: int):
+    return (
+        select(News)
+        .where(News.stock_code == stock_code)
+        .order_by(News.date.desc())  # type: ignore[union-attr]
+        .limit(limit)
+    )
+
+
+@router.get("", response_model=List[NewsItem])
+def list_news(
+    limit: int = Query(20, ge=1, le=100),
+    stock_code: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    language: Optional[str] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+    session: Session = Depends(get_session),
+):
+    return session.exec(_news_statement(limit, stock_code, source, language, days)).all()
 
 
 @router.get("/stock/{stock_code}", response_model=List[NewsItem])
@@ -73,13 +93,7 @@ def get_stock_news(
     limit: int = Query(10, ge=1, le=50),
     session: Session = Depends(get_session),
 ):
-    query = (
-        select(News)
-        .where(News.stock_code == stock_code)
-        .order_by(News.date.desc())  # type: ignore[union-attr]
-        .limit(limit)
-    )
-    return session.exec(query).all()
+    return session.exec(_stock_news_statement(stock_code, limit)).all()
 
 
 @router.get("/sentiment/{stock_code}")
@@ -173,13 +187,7 @@ def get_market_sentiment(
 @router.post("/analyze")
 def analyze_text(text: str = Query(..., min_length=10)):
     try:
-        import sys
-        sys.path.insert(0, str(__file__).replace("backend/app/api/routes/news.py", "nlp"))
-        from nlp.sentiment.analyzer import SentimentAnalyzer
-        
-        analyzer = SentimentAnalyzer()
-        result = analyzer.analyze(text)
-        return result
+        return get_nlp_analyzer().analyze(text)
     except ImportError:
         positive_words = {'hausse', 'croissance', 'profit', 'benefice', 'succes', 'gain'}
         negative_words = {'baisse', 'chute', 'perte', 'crise', 'deficit', 'risque'}
@@ -202,23 +210,58 @@ def analyze_text(text: str = Query(..., min_length=10)):
         }
 
 
+@router.get("/sentiment-cache")
+def sentiment_cache_stats():
+    try:
+        from sentiment.cache import get_sentiment_cache
+    except ImportError:
+        return {"enabled": False}
+    return {"enabled": True, **get_sentiment_cache().stats()}
+
+
+@router.get("/sentiment-model")
+def sentiment_model_stats():
+    try:
+        analyzer = get_nlp_analyzer()
+    except ImportError:
+        return {"model": None, "version": "fallback"}
+    return {
+        "model": analyzer.model_name if analyzer.model is not None else None,
+        "version": analyzer.version,
+        "batch_size": analyzer.batch_size,
+        "worker_processes": analyzer.workers.processes if analyzer.workers else 0,
+        "latency": analyzer.latency_stats(),
+    }
+
+
+def _score_news(news_ids: List[int]) -> None:
+    """Score freshly inserted articles after the response has been sent."""
+    analyzer = get_nlp_analyzer()
+    with session_scope() as session:
+        items = session.exec(select(News).where(News.id.in_(news_ids))).all()  # type: ignore[union-attr]
+        results = analyzer.analyze_texts(
+            [f"{news.title} {news.content or ''}" for news in items],
+            [news.language for news in items],
+        )
+        for news, result in zip(items, results):
+            news.sentiment_score = result.get("score", 0.0)
+            news.sentiment_label = result.get("label", "neutral")
+            news.sentiment_confidence = result.get("confidence", 0.0)
+            session.add(news)
+        swings = sentiment_swing_events(session, items)
+        session.commit()
+    alert_pipeline.submit(swings)
+
+
 @router.post("/batch", response_model=List[NewsItem])
 def create_news_batch(
     articles: List[NewsCreate],
+    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
 ):
+    """Store new articles and return immediately; sentiment is filled in by a background task."""
     created = []
     
-    try:
-        import sys
-        sys.path.insert(0, str(__file__).replace("backend/app/api/routes/news.py", "nlp"))
-        from nlp.sentiment.analyzer import SentimentAnalyzer
-        analyzer = SentimentAnalyzer()
-        use_nlp = True
-    except ImportError:
-        use_nlp = False
-        analyzer = None
-    
     for article in articles:
         existing = session.exec(
             select(News).where(News.url == article.url)
@@ -227,17 +270,6 @@ def create_news_batch(
         if existing:
             continue
         
-        sentiment_score = None
-        sentiment_label = None
-        sentiment_confidence = None
-        
-        if use_nlp and analyzer:
-            text = f"{article.title} {article.content or ''}"
-            result = analyzer.analyze(text, article.language)
-            sentiment_score = result.get("score", 0.0)
-            sentiment_label = result.get("label", "neutral")
-            sentiment_confidence = result.get("confidence", 0.0)
-        
         news = News(
             url=article.url,
             title=article.title,
@@ -246,9 +278,6 @@ def create_news_batch(
             source=article.source,
             stock_code=article.stock_code,
             language=article.language,
-            sentiment_score=sentiment_score,
-            sentiment_label=sentiment_label,
-            sentiment_confidence=sentiment_confidence,
         )
         session.add(news)
         created.append(news)
@@ -258,4 +287,37 @@ def create_news_batch(
     for news in created:
         session.refresh(news)
     
+    try:
+        get_nlp_analyzer()
+    except ImportError:
+        return created
+    
+    if created:
+        background_tasks.add_task(_score_news, [news.id for news in created])
+    
     return created
+
+
+# Async versions of the hot read routes, registered ahead of `router` when DATABASE_ASYNC is on
+async_router = APIRouter(prefix="/api/news", tags=["news"])
+
+
+@async_router.get("", response_model=List[NewsItem])
+async def list_news_async(
+    limit: int = Query(20, ge=1, le=100),
+    stock_code: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    language: Optional[str] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return (await session.exec(_news_statement(limit, stock_code, source, language, days))).all()
+
+
+@async_router.get("/stock/{stock_code}", response_model=List[NewsItem])
+async def get_stock_news_async(
+    stock_code: str,
+    limit: int = Query(10, ge=1, le=50),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return (await session.exec(_stock_news_statement(stock_code, limit))).all()
@@ -2,29 +2,37 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from typing import Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.auth import get_current_user
-from app.db.database import Portfolio, PriceData, Stock, User, get_session
-from app.models.schemas import PortfolioTradeRequest
+from app.core.config import RISK_WINDOW_DAYS
+from app.db.database import Holding, User, get_async_session, get_session
+from app.models.schemas import PortfolioTradeRequest, SimulationRequest
+from app.services.monte_carlo import run_simulation
+from app.services.portfolio_history import portfolio_history
+from app.services.portfolio_risk import portfolio_risk, position_values, returns_window
+from app.services.portfolio_valuation import price_snapshot, snapshot_statement, value_portfolios, value_positions
+from app.services.trade_ledger import (
+    InsufficientQuantity, PositionNotFound, first_lot_statement, record_buy, record_sell, trades_page,
+)
 
 router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
 
 
-def _latest_close(session: Session, stock_code: str):
-    stock = session.exec(select(Stock).where(Stock.code == stock_code)).first()
-    if not stock:
-        return None
-    latest = session.exec(
-        select(PriceData)
-        .where(PriceData.stock_id == stock.id)
-        .order_by(PriceData.date.desc())
-        .limit(1)
-    ).first()
-    return latest.close if latest else None
+def _positions_statement(user: User):
+    """One row per held stock, read through the (user_id, stock_code) unique index."""
+    return select(Holding).where(Holding.user_id == user.supabase_uid, Holding.quantity > 0)
+
+
+def _valuation(session: Session, positions, user: Optional[User] = None) -> Dict:
+    """Valued positions; with `user`, items carry their oldest open lot id as `id`."""
+    rows = session.exec(snapshot_statement(p.stock_code for p in positions)).all() if positions else []
+    lot_ids = dict(session.exec(first_lot_statement(user.supabase_uid)).all()) if user and positions else None
+    return value_positions(positions, price_snapshot(rows), lot_ids)
 
 
 @router.get("")
@@ -32,26 +40,115 @@ def portfolio(
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
+    positions = session.exec(_positions_statement(current_user)).all()
+    return _valuation(session, positions, current_user)["positions"]
+
+
+@router.get("/summary")
+def portfolio_summary(
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """Market value, cost basis, unrealized P&L, day change and weights, valued in one price query."""
+    positions = session.exec(_positions_statement(current_user)).all()
+    return _valuation(session, positions, current_user)
+
+
+@router.get("/history")
+def portfolio_value_history(
+    days: int = Query(365, ge=7, le=3650, description="Calendar days to look back"),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """Daily value, net invested amount and P&L replayed from the trades, one price query (cached per trade and price date)."""
+    return portfolio_history(session, current_user.supabase_uid, days)
+
+
+@router.get("/risk")
+def portfolio_risk_report(
+    window: int = Query(RISK_WINDOW_DAYS, ge=20, le=1000, description="Trading days of returns"),
+    confidence: float = Query(0.95, ge=0.8, le=0.999),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """Volatility, historical/parametric VaR and CVaR (1 day), beta vs the market and correlations."""
+    positions = session.exec(_positions_statement(current_user)).all()
+    values = position_values(_valuation(session, positions)["positions"])
+    if not values:
+        raise HTTPException(status_code=404, detail="No priced positions")
+    returns = returns_window(session, list(values), window)
+    if returns is None:
+        raise HTTPException(status_code=404, detail="Not enough price history")
+    return portfolio_risk(returns, values, confidence)
+
+
+@router.post("/simulate")
+def simulate_portfolio(
+    request: SimulationRequest,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """Monte Carlo of the holdings (or a given allocation): value bands, terminal distribution, drawdowns."""
+    if request.allocation:
+        allocation = {code.upper(): weight for code, weight in request.allocation.items() if weight > 0}
+        amount = request.amount or 10_000.0
+    else:
+        positions = session.exec(_positions_statement(current_user)).all()
+        allocation = position_values(_valuation(session, positions)["positions"])
+        amount = request.amount or sum(allocation.values())
+    if not allocation:
+        raise HTTPException(status_code=404, detail="No priced positions")
+    returns = returns_window(session, list(allocation), request.window or RISK_WINDOW_DAYS)
+    if returns is None:
+        raise HTTPException(status_code=404, detail="Not enough price history")
+    try:
+        return run_simulation(
+            returns, allocation, amount, request.horizon_days, request.paths, request.method, request.seed, request.confidence
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/leaderboard")
+def portfolio_leaderboard(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """Every user's portfolio valued in one pass, ranked by unrealized return."""
     positions = session.exec(
-        select(Portfolio).where(Portfolio.user_id == current_user.supabase_uid)
+        select(Holding.user_id, Holding.stock_code, Holding.quantity, Holding.avg_buy_price).where(Holding.quantity > 0)
     ).all()
-    results = []
-    for position in positions:
-        current_price = _latest_close(session, position.stock_code)
-        current_value = current_price * position.quantity if current_price else None
-        results.append(
-            {
-                "id": position.id,
-                "user_id": position.user_id,
-                "stock_code": position.stock_code,
-                "quantity": position.quantity,
-                "avg_buy_price": position.avg_buy_price,
-                "created_at": position.created_at,
-                "current_price": current_price,
-                "current_value": current_value,
-            }
-        )
-    return results
+    rows = session.exec(snapshot_statement({p.stock_code for p in positions})).all() if positions else []
+    ranked = value_portfolios(positions, price_snapshot(rows))
+    top = ranked[:limit]
+    names = dict(
+        session.exec(
+            select(User.supabase_uid, User.full_name).where(User.supabase_uid.in_([r["user_id"] for r in top]))  # type: ignore[attr-defined]
+        ).all()
+    ) if top else {}
+    # Other users' amounts stay private: rank, name and return only
+    return [
+        {
+            "rank": rank,
+            "name": names.get(entry["user_id"]) or "Investor",
+            "return_pct": entry["return_pct"],
+            "positions": entry["positions"],
+            "is_you": entry["user_id"] == current_user.supabase_uid,
+        }
+        for rank, entry in enumerate(top, start=1)
+    ]
+
+
+@router.get("/trades")
+def portfolio_trades(
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[int] = Query(None, description="Trade id to page back from"),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """The user's trade ledger, newest first; sells carry their FIFO realized P&L."""
+    return trades_page(session, current_user.supabase_uid, limit, before)
 
 
 @router.post("/buy")
@@ -60,17 +157,8 @@ def buy_stock(
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
-    position = Portfolio(
-        user_id=current_user.supabase_uid,
-        stock_code=request.stock_code,
-        quantity=request.quantity,
-        avg_buy_price=request.price,
-        created_at=datetime.utcnow(),
-    )
-    session.add(position)
-    session.commit()
-    session.refresh(position)
-    return {"status": "ok", "position_id": position.id}
+    trade, lot = record_buy(session, current_user.supabase_uid, request.stock_code, request.quantity, request.price)
+    return {"status": "ok", "trade_id": trade.id, "position_id": lot.id}
 
 
 @router.post("/sell")
@@ -79,20 +167,31 @@ def sell_stock(
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
-    position = session.exec(
-        select(Portfolio)
-        .where(Portfolio.stock_code == request.stock_code)
-        .where(Portfolio.user_id == current_user.supabase_uid)
-        .order_by(Portfolio.created_at.asc())
-    ).first()
-    if not position:
+    """Sells across as many lots as the quantity spans, oldest first."""
+    try:
+        trade, holding = record_sell(session, current_user.supabase_uid, request.stock_code, request.quantity, request.price)
+    except PositionNotFound:
         raise HTTPException(status_code=404, detail="Position not found")
-    if position.quantity < request.quantity:
-        raise HTTPException(status_code=400, detail="Insufficient quantity")
-    position.quantity -= request.quantity
-    if position.quantity == 0:
-        session.delete(position)
-    else:
-        session.add(position)
-    session.commit()
-    return {"status": "ok"}
+    except InsufficientQuantity as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "status": "ok",
+        "trade_id": trade.id,
+        "realized_pnl": trade.realized_pnl,
+        "remaining_quantity": holding.quantity,
+    }
+
+
+# Async version of the position read, registered ahead of `router` when DATABASE_ASYNC is on
+async_router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
+
+
+@async_router.get("")
+async def portfolio_async(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    positions = (await session.exec(_positions_statement(current_user))).all()
+    rows = (await session.exec(snapshot_statement(p.stock_code for p in positions))).all() if positions else []
+    lot_ids = dict((await session.exec(first_lot_statement(current_user.supabase_uid))).all()) if positions else None
+    return value_positions(positions, price_snapshot(rows), lot_ids)["positions"]
@@ -7,11 +7,13 @@ from typing import Dict, List
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select  # type: ignore[import-not-found]
+from sqlmodel.ext.asyncio.session import AsyncSession  # type: ignore[import-not-found]
 
-from app.db.database import PriceData, Stock, get_session
+from app.db.database import PriceData, Stock, get_async_session, get_session
+from app.db.queries import group_latest_prices, latest_prices_statement
 from app.services.prediction import PredictionService
 from app.services.sentiment import SentimentService
-from app.services.anomaly import AnomalyService
+from app.services.anomaly import AnomalyService, historical_stats
 from app.services.decision import get_recommendation
 
 router = APIRouter(prefix="/api/stocks", tags=["stocks"])
@@ -20,102 +22,42 @@ sentiment_service = SentimentService()
 anomaly_service = AnomalyService()
 
 
-def _get_stock(session: Session, code: str) -> Stock:
-    stock = session.exec(select(Stock).where(Stock.code == code)).first()
-    if not stock:
-        raise HTTPException(status_code=404, detail="Stock not found")
-    return stock
+def _stock_statement(code: str):
+    return select(Stock).where(Stock.code == code)
 
 
-def _latest_price(session: Session, stock_id: int):
-    rows = session.exec(
+def _latest_price_statement(stock_id: int):
+    # Newest first: [latest, previous]
+    return (
         select(PriceData)
         .where(PriceData.stock_id == stock_id)
-        .order_by(PriceData.date)  # type: ignore[arg-type]
-    ).all()
-    return rows[-2:]
+        .order_by(PriceData.date.desc())  # type: ignore[attr-defined]
+        .limit(2)
+    )
 
 
-def _get_price_history(session: Session, stock_id: int, days: int = 30) -> List[PriceData]:
+def _history_statement(stock_id: int, days: int):
     cutoff = datetime.now() - timedelta(days=days)
-    rows = session.exec(
+    return (
         select(PriceData)
         .where(PriceData.stock_id == stock_id)
         .where(PriceData.date >= cutoff)
         .order_by(PriceData.date)  # type: ignore[arg-type]
-    ).all()
-    return list(rows)
+    )
 
 
-def _compute_historical_stats(history: List[PriceData]) -> Dict:
-    if len(history) < 2:
-        return {}
-    
-    prev_close = history[-2].close if len(history) >= 2 else history[-1].close
-    
-    closes = [p.close for p in history]
-    volumes = [p.volume for p in history]
-    transactions = [p.transactions or 0 for p in history]
-    ranges = [(p.high - p.low) / p.close if p.close else 0 for p in history]
-    
-    def mean(lst):
-        return sum(lst) / len(lst) if lst else 0
-    
-    def std(lst):
-        if len(lst) < 2:
-            return 1
-        avg = mean(lst)
-        variance = sum((x - avg) ** 2 for x in lst) / len(lst)
-        return variance ** 0.5 or 1
-    
-    vol_20 = volumes[-20:] if len(volumes) >= 20 else volumes
-    price_20 = closes[-20:] if len(closes) >= 20 else closes
-    range_10 = ranges[-10:] if len(ranges) >= 10 else ranges
-    tx_20 = transactions[-20:] if len(transactions) >= 20 else transactions
-    
-    return {
-        "prev_close": prev_close,
-        "volume_ma_20": mean(vol_20),
-        "volume_std_20": std(vol_20),
-        "price_ma_20": mean(price_20),
-        "price_std_20": std(price_20),
-        "range_ma_10": mean(range_10),
-        "tx_ma_20": mean(tx_20),
-    }
+def _get_stock(session: Session, code: str) -> Stock:
+    stock = session.exec(_stock_statement(code)).first()
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
+    return stock
 
 
-@router.get("")
-def list_stocks(session: Session = Depends(get_session)):
-    stocks = session.exec(select(Stock)).all()
-    results = []
-    for stock in stocks:
-        stock_id = stock.id if stock.id is not None else 0
-        latest = _latest_price(session, stock_id)
-        current = latest[0] if latest else None
-        previous = latest[1] if len(latest) > 1 else None
-        change_pct = (
-            (current.close - previous.close) / previous.close * 100
-            if current and previous and previous.close
-            else 0.0
-        )
-        results.append(
-            {
-                "code": stock.code,
-                "name": stock.name,
-                "groupe": stock.groupe,
-                "latest_price": current.close if current else None,
-                "change_pct": round(change_pct, 2),
-                "last_date": current.date if current else None,
-            }
-        )
-    return results
+def _latest_price(session: Session, stock_id: int):
+    return session.exec(_latest_price_statement(stock_id)).all()
 
 
-@router.get("/{code}")
-def stock_detail(code: str, session: Session = Depends(get_session)):
-    stock = _get_stock(session, code)
-    stock_id = stock.id if stock.id is not None else 0
-    latest = _latest_price(session, stock_id)
+def _stock_summary(stock: Stock, latest) -> Dict:
     current = latest[0] if latest else None
     previous = latest[1] if len(latest) > 1 else None
     change_pct = (
@@ -133,21 +75,7 @@ def stock_detail(code: str, session: Session = Depends(get_session)):
     }
 
 
-@router.get("/{code}/history")
-def stock_history(
-    code: str,
-    days: int = Query(30, ge=1, le=3650),
-    session: Session = Depends(get_session),
-):
-    stock = _get_stock(session, code)
-    cutoff = datetime.now() - timedelta(days=days)
-    stock_id = stock.id if stock.id is not None else 0
-    rows = session.exec(
-        select(PriceData)
-        .where(PriceData.stock_id == stock_id)
-        .where(PriceData.date >= cutoff)
-        .order_by(PriceData.date)  # type: ignore[arg-type]
-    ).all()
+def _history_payload(stock: Stock, rows) -> Dict:
     return {
         "stock_code": stock.code,
         "points": [
@@ -166,6 +94,34 @@ def stock_history(
     }
 
 
+def _get_price_history(session: Session, stock_id: int, days: int = 30) -> List[PriceData]:
+    return list(session.exec(_history_statement(stock_id, days)).all())
+
+
+@router.get("")
+def list_stocks(session: Session = Depends(get_session)):
+    rows = session.exec(latest_prices_statement()).all()
+    return [_stock_summary(stock, latest) for stock, latest in group_latest_prices(rows)]
+
+
+@router.get("/{code}")
+def stock_detail(code: str, session: Session = Depends(get_session)):
+    stock = _get_stock(session, code)
+    stock_id = stock.id if stock.id is not None else 0
+    return _stock_summary(stock, _latest_price(session, stock_id))
+
+
+@router.get("/{code}/history")
+def stock_history(
+    code: str,
+    days: int = Query(30, ge=1, le=3650),
+    session: Session = Depends(get_session),
+):
+    stock = _get_stock(session, code)
+    stock_id = stock.id if stock.id is not None else 0
+    return _history_payload(stock, _get_price_history(session, stock_id, days))
+
+
 @router.get("/{code}/prediction")
 def stock_prediction(code: str, session: Session = Depends(get_session)):
     stock = _get_stock(session, code)
@@ -211,7 +167,7 @@ def stock_recommendation(code: str, session: Session = Depends(get_session)):
     sentiment = stock_sentiment(code)
     
     history = _get_price_history(session, stock_id, days=30)
-    historical_stats = _compute_historical_stats(history)
+    stats = historical_stats(history)
     
     current_data = {}
     if history:
@@ -225,7 +181,7 @@ def stock_recommendation(code: str, session: Session = Depends(get_session)):
             "transactions": latest.transactions or 0,
         }
     
-    anomalies = anomaly_service.detect(code, current_data, historical_stats)
+    anomalies = anomaly_service.detect(code, current_data, stats)
     return get_recommendation(code, prediction, sentiment, anomalies)
 
 
@@ -235,7 +191,7 @@ def stock_anomaly(code: str, session: Session = Depends(get_session)):
     stock_id = stock.id if stock.id is not None else 0
     
     history = _get_price_history(session, stock_id, days=30)
-    historical_stats = _compute_historical_stats(history)
+    stats = historical_stats(history)
     
     current_data = {}
     if history:
@@ -249,4 +205,41 @@ def stock_anomaly(code: str, session: Session = Depends(get_session)):
             "transactions": latest.transactions or 0,
         }
     
-    return anomaly_service.detect(code, current_data, historical_stats)
+    return anomaly_service.detect(code, current_data, stats)
+
+
+# Async versions of the hot read routes, registered ahead of `router` when DATABASE_ASYNC is on
+async_router = APIRouter(prefix="/api/stocks", tags=["stocks"])
+
+
+async def _get_stock_async(session: AsyncSession, code: str) -> Stock:
+    stock = (await session.exec(_stock_statement(code))).first()
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
+    return stock
+
+
+@async_router.get("")
+async def list_stocks_async(session: AsyncSession = Depends(get_async_session)):
+    rows = (await session.exec(latest_prices_statement())).all()
+    return [_stock_summary(stock, latest) for stock, latest in group_latest_prices(rows)]
+
+
+@async_router.get("/{code}")
+async def stock_detail_async(code: str, session: AsyncSession = Depends(get_async_session)):
+    stock = await _get_stock_async(session, code)
+    stock_id = stock.id if stock.id is not None else 0
+    latest = (await session.exec(_latest_price_statement(stock_id))).all()
+    return _stock_summary(stock, latest)
+
+
+@async_router.get("/{code}/history")
+async def stock_history_async(
+    code: str,
+    days: int = Query(30, ge=1, le=3650),
+    session: AsyncSession = Depends(get_async_session),
+):
+    stock = await _get_stock_async(session, code)
+    stock_id = stock.id if stock.id is not None else 0
+    rows = (await session.exec(_history_statement(stock_id, days))).all()
+    return _history_payload(stock, rows)
@@ -1,13 +1,16 @@
 """Supabase Authentication utilities with Demo Mode support."""
 
 import os
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlmodel import Session, select
 
-from app.core.config import SUPABASE_KEY, SUPABASE_URL, UserRole
+from app.core.config import AUTH_CACHE_SIZE, AUTH_USER_CACHE_TTL, SUPABASE_KEY, SUPABASE_URL, UserRole
+from app.core.tokens import InvalidToken, TTLCache, claims_cache, decode_token, verify_token
 from app.db.database import User, get_session
 
 # Demo mode flag - set DEMO_MODE=true to bypass auth
@@ -15,6 +18,8 @@ DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
 
 security = HTTPBearer(auto_error=not DEMO_MODE)
 
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL)
+
 # Demo users for each role
 DEMO_USERS = {
     "investor": User(
@@ -34,9 +39,43 @@ DEMO_USERS = {
 }
 
 
+@lru_cache(maxsize=1)
 def get_supabase_client():
-    from supabase import create_client
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    """One client for the process (sign up / log in); tokens are verified locally, see app.core.tokens."""
+    from supabase import ClientOptions, create_client
+    # Shared by every request: it must not keep (or keep refreshing) the last user's session
+    return create_client(SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(auto_refresh_token=False, persist_session=False))
+
+
+def _cached_user(session: Session, claims: Dict[str, Any], create: bool = True) -> Optional[User]:
+    """User row of the token's subject, cached by uid."""
+    user = user_cache.get(claims["sub"])
+    return user if user is not None else _load_user(session, claims, create)
+
+
+def _load_user(session: Session, claims: Dict[str, Any], create: bool = True) -> Optional[User]:
+    """
+    Read (or create) the subject's User row and cache it. The cache holds a
+    detached copy (like DEMO_USERS), so it outlives the session it was loaded in.
+    """
+    uid = claims["sub"]
+    db_user = session.exec(select(User).where(User.supabase_uid == uid)).first()
+    if not db_user:
+        if not create:
+            return None
+        metadata = claims.get("user_metadata") or {}
+        db_user = User(
+            supabase_uid=uid,
+            email=claims.get("email") or "",
+            role=UserRole.INVESTOR,
+            full_name=metadata.get("full_name", ""),
+        )
+        session.add(db_user)
+        session.commit()
+        session.refresh(db_user)
+    user = User.model_validate(db_user)
+    user_cache.set(uid, user)
+    return user
 
 
 async def get_current_user(
@@ -58,43 +97,34 @@ async def get_current_user(
         )
 
     token = credentials.credentials
+    # Both caches warm: two dict lookups, on the event loop
+    claims = claims_cache.get(token)
+    user = user_cache.get(claims["sub"]) if claims is not None else None
+    if user is not None:
+        return user
+
+    def resolve() -> User:
+        # A JWKS fetch and the User query block: off the event loop
+        return _load_user(session, claims if claims is not None else decode_token(token))
 
     try:
-        supabase = get_supabase_client()
-        user_response = supabase.auth.get_user(token)
-
-        if not user_response or not user_response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token",
-            )
-
-        supabase_user = user_response.user
-
-        db_user = session.exec(
-            select(User).where(User.supabase_uid == supabase_user.id)
-        ).first()
-
-        if not db_user:
-            db_user = User(
-                supabase_uid=supabase_user.id,
-                email=supabase_user.email or "",
-                role=UserRole.INVESTOR,
-                full_name=supabase_user.user_metadata.get("full_name", ""),
-            )
-            session.add(db_user)
-            session.commit()
-            session.refresh(db_user)
-
-        return db_user
-
-    except Exception as exc:
+        return await run_in_threadpool(resolve)
+    except InvalidToken as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Authentication failed: {exc}",
+            detail=f"Invalid authentication token: {exc}",
         )
 
 
+async def get_user_for_token(token: Optional[str], session: Session) -> Optional[User]:
+    """Resolve a bearer token outside a request dependency (WebSocket query param); None if invalid."""
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token) if token else None
+    try:
+        return await get_current_user(credentials, session)
+    except HTTPException:
+        return None
+
+
 async def get_current_investor(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role not in [UserRole.INVESTOR, UserRole.CMF_INSPECTOR]:
         raise HTTPException(
@@ -124,12 +154,6 @@ def get_optional_user(
     if not credentials:
         return None
     try:
-        supabase = get_supabase_client()
-        user_response = supabase.auth.get_user(credentials.credentials)
-        if user_response and user_response.user:
-            return session.exec(
-                select(User).where(User.supabase_uid == user_response.user.id)
-            ).first()
-    except Exception:
+        return _cached_user(session, verify_token(credentials.credentials), create=False)
+    except InvalidToken:
         return None
-    return None
@@ -9,13 +9,84 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY", "your-anon-key")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "your-service-key")
 
 JWT_SECRET = os.getenv("JWT_SECRET", "your-jwt-secret")
-JWT_ALGORITHM = "HS256"
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+# Supabase access tokens carry aud=authenticated; empty skips the audience check
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+# Public keys for asymmetric (RS256/ES256) project keys, refetched after JWKS_CACHE_TTL seconds
+JWKS_URL = os.getenv("JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json")
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "3600"))
+# Verified token claims (never past the token's exp) and User rows by uid, kept in memory
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
 
 # Use SQLite by default for easy local development (no credentials needed)
 # Set DATABASE_URL env var to use PostgreSQL/Supabase in production
 DATABASE_URL = os.getenv(
     "DATABASE_URL", "sqlite:///./kanz.db"
 )
+# Serve the hot read routes from async handlers over an aiosqlite / asyncpg engine
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() == "true"
+# Engine performance profile: "tuned" applies the settings below, "baseline" keeps
+# SQLAlchemy / SQLite defaults (for comparison, see scripts/db_benchmark.py)
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned")
+# Connection pool (PostgreSQL and file-backed SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# SQLite pragmas applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB, i.e. 64 MB
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
+
+# Transformer sentiment model (rule-based scoring is used when disabled)
+SENTIMENT_LOAD_MODEL = os.getenv("SENTIMENT_LOAD_MODEL", "false").lower() == "true"
+SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL", "nlptown/bert-base-multilingual-uncased-sentiment")
+SENTIMENT_QUANTIZE = os.getenv("SENTIMENT_QUANTIZE") or None  # "int8" or "onnx"
+SENTIMENT_THREADS = int(os.getenv("SENTIMENT_THREADS", "0")) or None
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+# Worker processes for sentiment scoring (0 = score inline in the calling thread)
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "0"))
+
+# Live market data (ilboursa) cache: fresh for MARKET_CACHE_TTL seconds, then served
+# stale for up to MARKET_STALE_TTL more seconds while it is refreshed in the background
+MARKET_CACHE_TTL = float(os.getenv("MARKET_CACHE_TTL", "60"))
+MARKET_STALE_TTL = float(os.getenv("MARKET_STALE_TTL", "240"))
+# Concurrent requests to ilboursa across the poller, refreshes and batch quotes
+MARKET_FETCH_CONCURRENCY = int(os.getenv("MARKET_FETCH_CONCURRENCY", "4"))
+# Background live-market poller (ENABLE_MARKET_POLLER=true), refreshes during market hours
+MARKET_POLL_INTERVAL = float(os.getenv("MARKET_POLL_INTERVAL", "60"))
+MARKET_POLL_WORKERS = int(os.getenv("MARKET_POLL_WORKERS", "4"))
+
+# Alerts WebSocket fan-out: messages queued per connection, heartbeat period (s), and
+# what happens to a client whose queue is full ("drop" oldest message or "disconnect")
+ALERT_WS_QUEUE_SIZE = int(os.getenv("ALERT_WS_QUEUE_SIZE", "100"))
+ALERT_WS_HEARTBEAT = float(os.getenv("ALERT_WS_HEARTBEAT", "5"))
+ALERT_WS_SLOW_POLICY = os.getenv("ALERT_WS_SLOW_POLICY", "drop").lower()
+ALERT_WS_SEND_TIMEOUT = float(os.getenv("ALERT_WS_SEND_TIMEOUT", "5"))
+# Alert pipeline: batch window (s), max alerts per insert, one alert per (stock, type)
+# per ALERT_RATE_LIMIT seconds unless more severe, identical alerts muted for ALERT_DEDUPE_TTL
+ALERT_FLUSH_INTERVAL = float(os.getenv("ALERT_FLUSH_INTERVAL", "0.25"))
+ALERT_BATCH_SIZE = int(os.getenv("ALERT_BATCH_SIZE", "500"))
+ALERT_RATE_LIMIT = float(os.getenv("ALERT_RATE_LIMIT", "300"))
+ALERT_DEDUPE_TTL = float(os.getenv("ALERT_DEDUPE_TTL", "86400"))
+# Market-wide alerts older than this many days count as read in unread counts and the feed (0: never)
+ALERT_UNREAD_DAYS = float(os.getenv("ALERT_UNREAD_DAYS", "7"))
+# Mean score of new articles vs the stock's average over the previous N days
+SENTIMENT_SWING_THRESHOLD = float(os.getenv("SENTIMENT_SWING_THRESHOLD", "0.3"))
+SENTIMENT_SWING_DAYS = int(os.getenv("SENTIMENT_SWING_DAYS", "7"))
+
+# Portfolio risk: trading days of returns, and returns/covariance windows kept in memory
+# (keyed by stock set, window and latest price date, so new prices invalidate them)
+RISK_WINDOW_DAYS = int(os.getenv("RISK_WINDOW_DAYS", "250"))
+RISK_CACHE_SIZE = int(os.getenv("RISK_CACHE_SIZE", "128"))
+
+# Portfolio value-over-time series kept in memory (per user, last trade, period, latest price date)
+HISTORY_CACHE_SIZE = int(os.getenv("HISTORY_CACHE_SIZE", "256"))
 
 class UserRole:
     INVESTOR = "investor"
@@ -0,0 +1,174 @@
+"""
+Local verification of Supabase access tokens.
+
+Supabase signs its access tokens either with the project's JWT secret (HS256)
+or, with asymmetric signing keys, with a key published at the project's JWKS
+endpoint. Both are checked here without calling Supabase: the signature,
+expiry and audience are verified with python-jose against JWT_SECRET, or
+against the JWKS, fetched once and refetched after JWKS_CACHE_TTL or when a
+token names a key id it does not contain (key rotation).
+
+Tokens must carry an exp, and verified claims are kept in a TTL cache by token,
+never past that expiry, so a repeat request with the same token is a dict
+lookup. With an HS* algorithm and JWT_SECRET unset (or still the .env.example
+placeholder) every token is rejected: anyone can sign with a public secret.
+Fetching the JWKS blocks, so callers on the event loop run cache misses in a
+thread (see app.core.auth.get_current_user).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import httpx
+from jose import JWTError, jwt
+
+from app.core.config import (
+    AUTH_CACHE_SIZE,
+    AUTH_TOKEN_CACHE_TTL,
+    JWKS_CACHE_TTL,
+    JWKS_URL,
+    JWT_ALGORITHM,
+    JWT_AUDIENCE,
+    JWT_SECRET,
+)
+
+logger = logging.getLogger("kanz.auth")
+
+# The value .env.example ships with; as good as no secret
+JWT_SECRET_PLACEHOLDER = "your-jwt-secret"
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class TTLCache:
+    """Small thread-safe LRU whose entries also expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: float = AUTH_TOKEN_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (monotonic expiry, value)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+claims_cache = TTLCache()
+
+
+class JWKSKeys:
+    """Signing keys of the project by kid, fetched from the JWKS endpoint and refreshed on TTL or unknown kid."""
+
+    def __init__(self, url: str = JWKS_URL, ttl: float = JWKS_CACHE_TTL):
+        self.url = url
+        self.ttl = ttl
+        self._keys: Dict[Optional[str], Dict] = {}
+        self._fetched_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _fetch(self) -> None:
+        response = httpx.get(self.url, timeout=5.0)
+        response.raise_for_status()
+        self._keys = {key.get("kid"): key for key in response.json().get("keys", [])}
+        self._fetched_at = time.monotonic()
+        logger.info(f"[OK] {len(self._keys)} signing keys loaded from {self.url}")
+
+    def get(self, kid: Optional[str]) -> Dict:
+        with self._lock:
+            stale = time.monotonic() - self._fetched_at > self.ttl
+            if stale or kid not in self._keys:
+                try:
+                    self._fetch()
+                except (httpx.HTTPError, ValueError) as e:
+                    # Keep verifying with the keys we have if the endpoint is briefly down
+                    if not self._keys:
+                        raise InvalidToken(f"signing keys unavailable: {e}") from e
+                    logger.warning(f"[WARN] JWKS refresh failed, keeping {len(self._keys)} keys: {e}")
+            if kid not in self._keys:
+                raise InvalidToken(f"unknown signing key {kid!r}")
+            return self._keys[kid]
+
+
+jwks_keys = JWKSKeys()
+
+
+def signing_secret_configured() -> bool:
+    """False when HS* tokens would be checked against an empty or placeholder secret."""
+    return not JWT_ALGORITHM.startswith("HS") or JWT_SECRET not in ("", JWT_SECRET_PLACEHOLDER)
+
+
+def _signing_key(token: str) -> Any:
+    if JWT_ALGORITHM.startswith("HS"):
+        if not signing_secret_configured():
+            raise InvalidToken("JWT_SECRET is not configured")
+        return JWT_SECRET
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError as e:
+        raise InvalidToken(str(e)) from e
+    return jwks_keys.get(header.get("kid"))
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verify a token that is not in the cache and cache its claims; may fetch the JWKS (blocking)."""
+    try:
+        claims = jwt.decode(
+            token,
+            _signing_key(token),
+            algorithms=[JWT_ALGORITHM],
+            audience=JWT_AUDIENCE or None,
+            options={"verify_aud": bool(JWT_AUDIENCE), "require_exp": True},
+        )
+    except JWTError as e:
+        raise InvalidToken(str(e)) from e
+    if not claims.get("sub"):
+        raise InvalidToken("token has no subject")
+    claims_cache.set(token, claims, ttl=claims["exp"] - time.time())
+    return claims
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Claims of a valid access token (cached); InvalidToken otherwise."""
+    claims = claims_cache.get(token)
+    return claims if claims is not None else decode_token(token)
@@ -1,11 +1,31 @@
 """Supabase PostgreSQL database setup with SQLModel."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
+from sqlalchemy import Index, UniqueConstraint, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Field, SQLModel, create_engine, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PROFILE,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_CACHE_SIZE,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
+from app.db.pool_metrics import PoolMetrics, instrumented_pool_class
+
+DB_PROFILES = ("tuned", "baseline")
 
 
 class User(SQLModel, table=True):
@@ -26,6 +46,8 @@ class Stock(SQLModel, table=True):
 
 class PriceData(SQLModel, table=True):
     __tablename__ = "price_data"
+    # Same index as supabase_migration.sql: latest rows per stock without a sort
+    __table_args__ = (Index("idx_price_data_stock_date", "stock_id", "date"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     stock_id: int = Field(foreign_key="stock.id", index=True)
     date: datetime = Field(index=True)
@@ -39,15 +61,53 @@ class PriceData(SQLModel, table=True):
 
 
 class Portfolio(SQLModel, table=True):
+    """Open lots: what is left of each buy, consumed oldest first by sells."""
+    # Sells walk one (user, stock) range in id (FIFO) order
+    __table_args__ = (Index("idx_portfolio_user_stock_id", "user_id", "stock_code", "id"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str = Field(index=True)
     stock_code: str
     quantity: int
     avg_buy_price: float
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    trade_id: Optional[int] = Field(default=None, foreign_key="trade.id")
+
+
+class Trade(SQLModel, table=True):
+    """Append-only ledger of executed buys and sells."""
+    __table_args__ = (Index("idx_trade_user_id", "user_id", "id"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: str
+    stock_code: str
+    side: str  # "buy" | "sell"
+    quantity: int
+    price: float
+    realized_pnl: Optional[float] = None  # sells: proceeds minus the FIFO cost of the lots consumed
+    executed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Holding(SQLModel, table=True):
+    """Per-(user, stock) aggregate of the open lots, updated with every trade."""
+    __table_args__ = (UniqueConstraint("user_id", "stock_code", name="uq_holding_user_stock"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: str
+    stock_code: str
+    quantity: int = 0
+    cost_basis: float = 0.0  # sum of quantity x buy price over the open lots
+    avg_buy_price: float = 0.0  # cost_basis / quantity
+    realized_pnl: float = 0.0
+    last_trade_id: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)  # first buy
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Alert(SQLModel, table=True):
+    # Unread counts are index-only range counts per (user, read state); the feed
+    # walks (user, timestamp, id) newest first, one range per user bucket
+    __table_args__ = (
+        Index("idx_alert_user_read_timestamp", "user_id", "is_read", "timestamp"),
+        Index("idx_alert_user_timestamp", "user_id", "timestamp", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     stock_code: str
     alert_type: str
@@ -55,6 +115,37 @@ class Alert(SQLModel, table=True):
     severity: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     is_read: bool = False
+    # Set for alerts addressed to one user (price targets); None = market-wide.
+    # is_read is the owner's read state; market-wide reads live in AlertRead
+    user_id: Optional[str] = None
+
+
+class AlertRead(SQLModel, table=True):
+    """A user has read a market-wide alert."""
+    __tablename__ = "alert_read"
+    user_id: str = Field(primary_key=True)
+    alert_id: int = Field(primary_key=True, foreign_key="alert.id")
+    read_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AlertReadMark(SQLModel, table=True):
+    """Market-wide alerts up to read_before are read for this user ("mark all as read")."""
+    __tablename__ = "alert_read_mark"
+    user_id: str = Field(primary_key=True)
+    read_before: datetime
+
+
+class PriceAlertRule(SQLModel, table=True):
+    __tablename__ = "price_alert_rule"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: str = Field(index=True)
+    stock_code: str = Field(index=True)
+    direction: str  # "above" | "below"
+    target_price: float
+    is_active: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    triggered_at: Optional[datetime] = None
+    triggered_price: Optional[float] = None
 
 
 class News(SQLModel, table=True):
@@ -72,18 +163,156 @@ class News(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    # In-memory SQLite keeps SQLAlchemy's SingletonThreadPool / StaticPool
+    return _is_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+
+def _check_profile(profile: str) -> None:
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}, expected one of {DB_PROFILES}")
+
+
+def engine_options(url: str = DATABASE_URL, profile: str = DB_PROFILE) -> Dict[str, Any]:
+    """Pool keyword arguments for create_engine / create_async_engine."""
+    _check_profile(profile)
+    # In-memory SQLite uses a single shared connection, there is no pool to size
+    if profile == "baseline" or _is_memory_sqlite(url):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def sqlite_pragmas(profile: str = DB_PROFILE) -> List[str]:
+    _check_profile(profile)
+    if profile == "baseline":
+        return []
+    return [
+        # Readers no longer block the writer (and vice versa); NORMAL is durable in WAL mode
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={SQLITE_CACHE_SIZE}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}",
+    ]
+
+
+def _install_sqlite_pragmas(sync_engine: Engine, pragmas: List[str]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def create_db_engine(
+    url: str = DATABASE_URL, profile: str = DB_PROFILE, metrics: Optional[PoolMetrics] = None
+) -> Engine:
+    connect_args = {"check_same_thread": False} if _is_sqlite(url) else {}
+    options = engine_options(url, profile)
+    if metrics is not None and not _is_memory_sqlite(url):
+        options["poolclass"] = instrumented_pool_class(QueuePool, metrics)
+    db_engine = create_engine(url, echo=False, connect_args=connect_args, **options)
+    if _is_sqlite(url):
+        _install_sqlite_pragmas(db_engine, sqlite_pragmas(profile))
+    if metrics is not None:
+        metrics.attach(db_engine)
+    return db_engine
+
+
+pool_metrics = PoolMetrics()
+engine = create_db_engine(metrics=pool_metrics)
 
 
 def create_db_and_tables() -> None:
     SQLModel.metadata.create_all(engine)
+    # create_all skips new columns and indexes of tables that already exist
+    for table, column, ddl in (("alert", "user_id", "VARCHAR"), ("portfolio", "trade_id", "INTEGER REFERENCES trade(id)")):
+        if column not in {c["name"] for c in inspect(engine).get_columns(table)}:
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    for table in (PriceData, Portfolio, Alert):
+        for index in table.__table__.indexes:  # type: ignore[attr-defined]
+            index.create(engine, checkfirst=True)
+
+
+def get_session() -> Iterator[Session]:
+    """Request dependency: the session is closed and its connection returned once the request is done."""
+    with Session(engine) as session:
+        yield session
 
 
-def get_session() -> Session:
+def session_scope() -> Session:
+    """Session for code outside a request (startup, threads); use it as `with session_scope() as session`."""
     return Session(engine)
 
 
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """Same database through an async driver: sqlite -> aiosqlite, postgres -> asyncpg."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend in ("postgresql", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg takes ssl=<mode> instead of libpq's sslmode
+        sslmode = parsed.query.get("sslmode")
+        if sslmode:
+            parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+        return parsed.render_as_string(hide_password=False)
+    raise ValueError(f"No async driver configured for {backend} databases")
+
+
+_async_engine = None
+async_pool_metrics = PoolMetrics()
+
+
+def get_async_engine():
+    """Created on first use so the sync-only setup never needs aiosqlite / asyncpg."""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        options = engine_options()
+        if not _is_memory_sqlite(DATABASE_URL):
+            options["poolclass"] = instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_metrics)
+        _async_engine = create_async_engine(async_database_url(), echo=False, **options)
+        if _is_sqlite(DATABASE_URL):
+            _install_sqlite_pragmas(_async_engine.sync_engine, sqlite_pragmas())
+        async_pool_metrics.attach(_async_engine.sync_engine)
+    return _async_engine
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+async def dispose_async_engine() -> None:
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+def pool_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"sync": pool_metrics.snapshot(engine.pool)}
+    if _async_engine is not None:
+        stats["async"] = async_pool_metrics.snapshot(_async_engine.sync_engine.pool)
+    return stats
+
+
 def is_data_loaded() -> bool:
     with Session(engine) as session:
         statement = select(Stock).limit(1)
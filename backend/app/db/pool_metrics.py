@@ -0,0 +1,124 @@
+"""
+Connection pool instrumentation.
+PoolMetrics counts connections opened/closed and checkouts through pool events,
+and times every checkout (including the wait for a free connection when the
+pool is exhausted) through a pool subclass.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+WAIT_SAMPLES = 2048
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def attach(self, engine) -> None:
+        """Listen to the pool events of a sync Engine (use .sync_engine for async ones)."""
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_close(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_closed += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checked_out -= 1
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._waits.append(seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, pool=None) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "open_connections": self.connections_opened - self.connections_closed,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "mean": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p50": round(_percentile(waits, 50) * 1000, 3),
+                    "p99": round(_percentile(waits, 99) * 1000, 3),
+                    "max": round(self.wait_max * 1000, 3),
+                },
+            }
+        if pool is not None:
+            stats["pool"] = pool_status(pool)
+        return stats
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))]
+
+
+def pool_status(pool) -> Dict[str, Optional[int]]:
+    """Size gauges of a QueuePool; None for pools without them (SingletonThreadPool, StaticPool)."""
+    def gauge(name: str) -> Optional[int]:
+        method = getattr(pool, name, None)
+        return method() if callable(method) else None
+
+    return {
+        "class": type(pool).__name__,
+        "size": gauge("size"),
+        "checked_in": gauge("checkedin"),
+        "overflow": gauge("overflow"),
+        "checked_out": gauge("checkedout"),
+    }
+
+
+def instrumented_pool_class(base, metrics: PoolMetrics):
+    """Subclass of a queue pool class timing each checkout into `metrics`."""
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                metrics.record_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            metrics.record_wait(time.perf_counter() - started)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
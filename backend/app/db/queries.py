@@ -0,0 +1,36 @@
+"""Read queries shared by the sync and async route handlers."""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import select
+
+from app.db.database import PriceData, Stock
+
+
+def latest_prices_statement(depth: int = 2, codes: Optional[Iterable[str]] = None):
+    """
+    Every stock (or only `codes`) with its `depth` most recent PriceData rows,
+    newest first, in one round trip. Stocks without prices come back once, paired
+    with None.
+    """
+    recent = (
+        select(PriceData.id)
+        .where(PriceData.stock_id == Stock.id)
+        .order_by(PriceData.date.desc())  # type: ignore[attr-defined]
+        .limit(depth)
+        .correlate(Stock)
+    )
+    query = select(Stock, PriceData).outerjoin(PriceData, PriceData.id.in_(recent))  # type: ignore[union-attr]
+    if codes is not None:
+        query = query.where(Stock.code.in_(list(codes)))  # type: ignore[attr-defined]
+    return query.order_by(Stock.id, PriceData.date.desc())  # type: ignore[attr-defined]
+
+
+def group_latest_prices(rows) -> List[Tuple[Stock, List[PriceData]]]:
+    """(stock, [latest, previous, ...]) pairs from latest_prices_statement rows."""
+    grouped: Dict[int, Tuple[Stock, List[PriceData]]] = {}
+    for stock, price in rows:
+        _, prices = grouped.setdefault(stock.id, (stock, []))
+        if price is not None:
+            prices.append(price)
+    return list(grouped.values())
@@ -16,8 +16,8 @@ from typing import Dict, Any
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.config import ALLOWED_ORIGINS, PROJECT_NAME
-from app.db.database import create_db_and_tables, get_session, is_data_loaded
+from app.core.config import ALLOWED_ORIGINS, DATABASE_ASYNC, PROJECT_NAME
+from app.db.database import create_db_and_tables, dispose_async_engine, is_data_loaded, pool_stats, session_scope
 from app.db.data_loader import load_data
 from app.api.routes import market, stocks, portfolio, alerts, auth, news, agent, profile
 
@@ -105,27 +105,54 @@ async def lifespan(app: FastAPI):
     
     logger.info("Initializing database...")
     create_db_and_tables()
-    with get_session() as session:
+    with session_scope() as session:
         if not is_data_loaded():
             logger.info("Loading historical data...")
             load_data(session)
             logger.info("[OK] Historical data loaded")
         else:
             logger.info("[OK] Database already populated")
+        from app.services.trade_ledger import backfill_ledger
+        recorded = backfill_ledger(session)
+        if recorded:
+            logger.info(f"[OK] {recorded} existing lots recorded in the trade ledger")
     
     _preload_ml_models()
     
+    from app.core.auth import DEMO_MODE
+    from app.core.tokens import signing_secret_configured
+    if not DEMO_MODE and not signing_secret_configured():
+        logger.warning("[WARN] JWT_SECRET is not set: every access token will be rejected")
+    
+    try:
+        from app.services.market_data import market_data_service
+        from app.services.price_alerts import price_alert_engine
+        loaded = price_alert_engine.load()
+        market_data_service.add_tick_listener(price_alert_engine.on_tick)
+        logger.info(f"[OK] {loaded} price targets loaded")
+    except Exception as e:
+        logger.warning(f"[WARN] Price target alerts disabled: {e}")
+    
     global _news_scheduler
     enable_scheduler = os.environ.get("ENABLE_NEWS_SCHEDULER", "false").lower() == "true"
     if enable_scheduler:
         try:
             from scrapers.scheduler import NewsScheduler
-            _news_scheduler = NewsScheduler(interval_seconds=3600)
+            from app.services.sentiment import get_nlp_analyzer
+            _news_scheduler = NewsScheduler(interval_seconds=3600, analyzer=get_nlp_analyzer())
             _news_scheduler.start()
             logger.info("[OK] News scheduler started (1 hour interval)")
         except Exception as e:
             logger.warning(f"[WARN] Could not start news scheduler: {e}")
     
+    enable_poller = os.environ.get("ENABLE_MARKET_POLLER", "false").lower() == "true"
+    if enable_poller:
+        from app.services.anomaly import emit_live_anomalies
+        from app.services.market_poller import live_market_poller
+        live_market_poller.add_snapshot_listener(lambda snapshot: emit_live_anomalies(snapshot.quotes))
+        live_market_poller.start()
+        logger.info(f"[OK] Live market poller started ({live_market_poller.interval:.0f}s interval)")
+    
     logger.info("=" * 50)
     logger.info("KANZ Trading Assistant - Ready!")
     logger.info("=" * 50)
@@ -133,9 +160,25 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("Shutting down KANZ...")
+    if enable_poller:
+        from app.services.market_poller import live_market_poller
+        live_market_poller.stop()
+        logger.info("[OK] Live market poller stopped")
+    
     if _news_scheduler:
         _news_scheduler.stop()
         logger.info("[OK] News scheduler stopped")
+    
+    from app.services.sentiment import shutdown_nlp_analyzer
+    shutdown_nlp_analyzer()
+    
+    from app.services.alert_pipeline import alert_pipeline
+    alert_pipeline.stop()
+    
+    from app.services.alert_hub import alert_hub
+    await alert_hub.stop()
+    
+    await dispose_async_engine()
 
 
 app = FastAPI(
@@ -151,6 +194,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -179,6 +223,12 @@ def ml_health():
     }
 
 
+@app.get("/api/health/db")
+def db_health():
+    """Connection pool metrics: checked-out connections, checkout wait times, overflow."""
+    return pool_stats()
+
+
 @app.get("/api/scheduler/status")
 def scheduler_status():
     """News scheduler status."""
@@ -193,6 +243,12 @@ def scheduler_status():
     return {"running": False, "message": "Scheduler not enabled. Set ENABLE_NEWS_SCHEDULER=true"}
 
 
+if DATABASE_ASYNC:
+    # Registered first so they take precedence over the sync handlers on the same paths
+    for module in (market, stocks, portfolio, news):
+        app.include_router(module.async_router)
+    logger.info("[OK] Async database engine enabled for hot read routes")
+
 app.include_router(auth.router)
 app.include_router(market.router)
 app.include_router(stocks.router)
@@ -1,7 +1,7 @@
 """Pydantic models for API responses and requests."""
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -104,3 +104,21 @@ class AlertResponse(BaseModel):
     severity: str
     timestamp: datetime
     is_read: bool
+
+
+class PriceTargetRequest(BaseModel):
+    stock_code: str = Field(..., examples=["SFBT"])
+    direction: Literal["above", "below"]
+    target_price: float = Field(..., gt=0)
+
+
+class SimulationRequest(BaseModel):
+    # Weights or amounts per stock; defaults to the user's current holdings
+    allocation: Optional[Dict[str, float]] = Field(None, examples=[{"SFBT": 0.6, "BIAT": 0.4}])
+    amount: Optional[float] = Field(None, gt=0)
+    horizon_days: int = Field(20, ge=1, le=250)
+    paths: int = Field(10_000, ge=100, le=100_000)
+    method: Literal["bootstrap", "gaussian"] = "bootstrap"
+    seed: Optional[int] = Field(None, ge=0)
+    window: Optional[int] = Field(None, ge=20, le=1000)
+    confidence: float = Field(0.95, ge=0.8, le=0.999)
@@ -0,0 +1,141 @@
+"""
+Per-user alert feed and read state.
+
+A user sees market-wide alerts (user_id NULL) plus the ones addressed to them.
+The owner's read state for their own alerts is Alert.is_read; for market-wide
+alerts it is an AlertRead row, or everything up to their AlertReadMark ("mark all
+as read"), and anything older than ALERT_UNREAD_DAYS (0 turns that cutoff off).
+
+Both buckets are served from the (user_id, ...) composite indexes on Alert:
+unread counts are COUNT(*) over an index range, and the feed is keyset-paginated
+on (timestamp, id) so page N costs the same as page 1.
+"""
+
+from __future__ import annotations
+
+import base64
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, exists, tuple_, update
+from sqlmodel import Session, func, select
+
+from app.core.config import ALERT_UNREAD_DAYS
+from app.db.database import Alert, AlertRead, AlertReadMark
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(alert: Alert) -> str:
+    return base64.urlsafe_b64encode(f"{alert.timestamp.isoformat()}|{alert.id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """(timestamp, id) from encode_cursor; ValueError if it is not one."""
+    try:
+        timestamp, alert_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(alert_id)
+    except (UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+def _read_before(session: Session, user_id: str) -> datetime:
+    """Market-wide alerts at or before this instant are read for user_id."""
+    horizon = datetime.utcnow() - timedelta(days=ALERT_UNREAD_DAYS) if ALERT_UNREAD_DAYS > 0 else datetime.min
+    mark = session.get(AlertReadMark, user_id)
+    return max(horizon, mark.read_before) if mark else horizon
+
+
+def unread_count(session: Session, user_id: str) -> int:
+    """Unread alerts for user_id: three index range counts in one round trip."""
+    read_before = _read_before(session, user_id)
+    own = (
+        select(func.count()).select_from(Alert)
+        .where(Alert.user_id == user_id, Alert.is_read == False)  # noqa: E712
+        .scalar_subquery()
+    )
+    market = (
+        select(func.count()).select_from(Alert)
+        .where(Alert.user_id == None, Alert.is_read == False, Alert.timestamp > read_before)  # noqa: E711, E712
+        .scalar_subquery()
+    )
+    # Driven from the user's few AlertRead rows, one primary key probe each
+    market_read = (
+        select(func.count()).select_from(AlertRead)
+        .where(
+            AlertRead.user_id == user_id,
+            exists().where(
+                Alert.id == AlertRead.alert_id,
+                Alert.user_id == None,  # noqa: E711
+                Alert.is_read == False,  # noqa: E712
+                Alert.timestamp > read_before,
+            ),
+        )
+        .scalar_subquery()
+    )
+    return session.exec(select(own + market - market_read)).one()
+
+
+def _page(session: Session, user_id: Optional[str], limit: int, before: Optional[Cursor]) -> List[Alert]:
+    query = select(Alert).where(Alert.user_id == user_id)
+    if before is not None:
+        query = query.where(tuple_(Alert.timestamp, Alert.id) < before)
+    return list(session.exec(query.order_by(Alert.timestamp.desc(), Alert.id.desc()).limit(limit)).all())  # type: ignore[union-attr]
+
+
+def feed(session: Session, user_id: str, limit: int = 50, before: Optional[Cursor] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Newest-first page of the user's alerts older than `before`, with their
+    per-user is_read, and the cursor of the next page (None on the last one).
+    """
+    # An OR across both buckets would defeat the indexes: read one range each and merge
+    key = lambda alert: (alert.timestamp, alert.id)  # noqa: E731
+    alerts = list(heapq.merge(
+        _page(session, None, limit + 1, before), _page(session, user_id, limit + 1, before), key=key, reverse=True
+    ))
+    page, more = alerts[:limit], len(alerts) > limit
+
+    read_before = _read_before(session, user_id)
+    market_ids = [alert.id for alert in page if alert.user_id is None and alert.timestamp > read_before]
+    read_ids = set(
+        session.exec(
+            select(AlertRead.alert_id).where(AlertRead.user_id == user_id, AlertRead.alert_id.in_(market_ids))  # type: ignore[attr-defined]
+        ).all()
+    ) if market_ids else set()
+
+    items = []
+    for alert in page:
+        is_read = alert.is_read
+        if alert.user_id is None:
+            is_read = is_read or alert.timestamp <= read_before or alert.id in read_ids
+        items.append({**alert.model_dump(), "is_read": is_read})
+    return items, (encode_cursor(page[-1]) if more else None)
+
+
+def mark_read(session: Session, user_id: str, alert_id: int) -> bool:
+    """Mark one alert read for user_id; False if the user cannot see it."""
+    alert = session.get(Alert, alert_id)
+    if alert is None or alert.user_id not in (None, user_id):
+        return False
+    if alert.user_id is not None:
+        alert.is_read = True
+        session.add(alert)
+    elif session.get(AlertRead, (user_id, alert_id)) is None:
+        session.add(AlertRead(user_id=user_id, alert_id=alert_id))
+    session.commit()
+    return True
+
+
+def mark_all_read(session: Session, user_id: str) -> None:
+    """Everything up to now is read: own alerts flagged, market-wide ones behind the mark."""
+    now = datetime.utcnow()
+    session.execute(
+        update(Alert).where(Alert.user_id == user_id, Alert.is_read == False).values(is_read=True)  # noqa: E712
+    )
+    mark = session.get(AlertReadMark, user_id) or AlertReadMark(user_id=user_id, read_before=now)
+    mark.read_before = now
+    session.add(mark)
+    # Individual reads up to the mark are implied by it now
+    session.execute(delete(AlertRead).where(AlertRead.user_id == user_id))
+    session.commit()
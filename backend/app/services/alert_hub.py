@@ -0,0 +1,196 @@
+"""
+Alert fan-out hub for the alerts WebSocket.
+One producer publishes each message once: it is encoded once, matched against
+every subscription's stock/severity filter and put on that connection's bounded
+queue. Each connection drains its own queue in its own sender task, so sends run
+concurrently and a slow client only ever delays itself. A client whose queue is
+full loses its oldest queued message ("drop") or is disconnected ("disconnect");
+a send that exceeds the send timeout always disconnects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from fastapi import WebSocket
+
+from app.core.config import (
+    ALERT_WS_HEARTBEAT,
+    ALERT_WS_QUEUE_SIZE,
+    ALERT_WS_SEND_TIMEOUT,
+    ALERT_WS_SLOW_POLICY,
+)
+
+logger = logging.getLogger("kanz.alert_hub")
+
+SLOW_POLICIES = ("drop", "disconnect")
+# WebSocket close code for a consumer that cannot keep up ("try again later")
+CLOSE_SLOW_CONSUMER = 1013
+
+
+def _codes(values: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    cleaned = frozenset(v.strip() for v in values or () if v and v.strip())
+    return cleaned or None
+
+
+@dataclass(eq=False)
+class Subscription:
+    websocket: WebSocket
+    queue: asyncio.Queue
+    # None = everything; heartbeats and system messages always pass
+    stock_codes: Optional[FrozenSet[str]] = None
+    severities: Optional[FrozenSet[str]] = None
+    # Authenticated user; alerts addressed to a user only reach that user's sockets
+    user_id: Optional[str] = None
+    sent: int = 0
+    dropped: int = 0
+    sender: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def set_filter(self, stock_codes: Optional[Iterable[str]] = None, severities: Optional[Iterable[str]] = None):
+        self.stock_codes = _codes(stock_codes)
+        self.severities = _codes(s.lower() for s in severities or ())
+
+    def matches(self, message: Dict) -> bool:
+        if message.get("type") != "alert":
+            return True
+        if message.get("user_id") is not None and message["user_id"] != self.user_id:
+            return False
+        if self.stock_codes is not None and message.get("stock_code") not in self.stock_codes:
+            return False
+        if self.severities is not None and str(message.get("severity", "")).lower() not in self.severities:
+            return False
+        return True
+
+
+class AlertHub:
+    def __init__(
+        self,
+        queue_size: int = ALERT_WS_QUEUE_SIZE,
+        heartbeat_interval: float = ALERT_WS_HEARTBEAT,
+        send_timeout: float = ALERT_WS_SEND_TIMEOUT,
+        slow_policy: str = ALERT_WS_SLOW_POLICY,
+    ):
+        if slow_policy not in SLOW_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy {slow_policy!r}, expected one of {SLOW_POLICIES}")
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.send_timeout = send_timeout
+        self.slow_policy = slow_policy
+        self.subscriptions: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._producer: Optional[asyncio.Task] = None
+        self._stats = {"published": 0, "delivered": 0, "sent": 0, "dropped": 0, "slow_disconnects": 0}
+
+    def _ensure_started(self):
+        # The producer lives on the server's event loop, started by the first subscriber
+        if self._producer is None or self._producer.done():
+            self._loop = asyncio.get_running_loop()
+            self._producer = self._loop.create_task(self._heartbeats())
+
+    async def subscribe(
+        self,
+        websocket: WebSocket,
+        stock_codes: Optional[Iterable[str]] = None,
+        severities: Optional[Iterable[str]] = None,
+        user_id: Optional[str] = None,
+    ) -> Subscription:
+        await websocket.accept()
+        self._ensure_started()
+        subscription = Subscription(websocket, asyncio.Queue(maxsize=self.queue_size), user_id=user_id)
+        subscription.set_filter(stock_codes, severities)
+        subscription.sender = asyncio.create_task(self._send_loop(subscription))
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription not in self.subscriptions:
+            return
+        self.subscriptions.discard(subscription)
+        if subscription.sender and subscription.sender is not asyncio.current_task():
+            subscription.sender.cancel()
+
+    def publish(self, message: Dict) -> int:
+        """Queue a message for every matching subscriber; never blocks. Call from the event loop."""
+        text = json.dumps(message, default=str)
+        delivered = 0
+        for subscription in list(self.subscriptions):
+            if not subscription.matches(message):
+                continue
+            if subscription.queue.full():
+                if self.slow_policy == "disconnect":
+                    self._disconnect_slow(subscription, "send queue full")
+                    continue
+                subscription.queue.get_nowait()
+                subscription.dropped += 1
+                self._stats["dropped"] += 1
+            subscription.queue.put_nowait(text)
+            delivered += 1
+        self._stats["published"] += 1
+        self._stats["delivered"] += delivered
+        return delivered
+
+    def publish_threadsafe(self, message: Dict) -> bool:
+        """publish() from a worker thread; False if no subscriber has started the hub yet."""
+        if self._loop is None or self._loop.is_closed():
+            return False
+        self._loop.call_soon_threadsafe(self.publish, message)
+        return True
+
+    def _disconnect_slow(self, subscription: Subscription, reason: str):
+        self._stats["slow_disconnects"] += 1
+        logger.warning(f"[WARN] Disconnecting slow alerts subscriber ({reason}, {subscription.dropped} dropped)")
+        self.unsubscribe(subscription)
+        asyncio.create_task(self._close(subscription.websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=CLOSE_SLOW_CONSUMER), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _send_loop(self, subscription: Subscription):
+        websocket = subscription.websocket
+        try:
+            while True:
+                text = await subscription.queue.get()
+                await asyncio.wait_for(websocket.send_text(text), self.send_timeout)
+                subscription.sent += 1
+                self._stats["sent"] += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._disconnect_slow(subscription, f"send blocked > {self.send_timeout:g}s")
+        except Exception:
+            # Connection already gone; the route's receive loop notices too
+            self.unsubscribe(subscription)
+
+    async def _heartbeats(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if self.subscriptions:
+                self.publish({"type": "heartbeat", "timestamp": datetime.utcnow().isoformat()})
+
+    async def stop(self):
+        if self._producer:
+            self._producer.cancel()
+        for subscription in list(self.subscriptions):
+            self.unsubscribe(subscription)
+        self._producer = None
+
+    def stats(self) -> Dict:
+        return {
+            "connections": len(self.subscriptions),
+            "queued": sum(s.queue.qsize() for s in self.subscriptions),
+            "queue_size": self.queue_size,
+            "slow_policy": self.slow_policy,
+            "heartbeat_interval": self.heartbeat_interval,
+            **self._stats,
+        }
+
+
+alert_hub = AlertHub()
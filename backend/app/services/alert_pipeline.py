@@ -0,0 +1,359 @@
+"""
+Alert event pipeline.
+Producers (anomaly detection on live snapshots, news sentiment scoring,
+price-target checks) submit AlertEvents from any thread. One worker thread
+drains them in small batches: identical events are deduplicated, each (stock,
+type) is rate-limited, the survivors are inserted into the Alert table in one
+statement and pushed to the alerts WebSocket hub, all within
+ALERT_FLUSH_INTERVAL of being submitted.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlmodel import func, select
+
+from app.core.config import (
+    ALERT_BATCH_SIZE,
+    ALERT_DEDUPE_TTL,
+    ALERT_FLUSH_INTERVAL,
+    ALERT_RATE_LIMIT,
+    SENTIMENT_SWING_DAYS,
+    SENTIMENT_SWING_THRESHOLD,
+)
+from app.db.database import Alert, News, session_scope
+
+logger = logging.getLogger("kanz.alert_pipeline")
+
+SEVERITY_RANK = {"NONE": 0, "LOW": 1, "MEDIUM": 2, "HIGH": 3}
+LATENCY_SAMPLES = 2048
+# Expired dedupe fingerprints are pruned once there are more than this many
+MAX_FINGERPRINTS = 50_000
+
+
+@dataclass(frozen=True)
+class AlertEvent:
+    stock_code: str
+    alert_type: str
+    message: str
+    severity: str = "MEDIUM"
+    source: str = "system"
+    # Addressed to one user (stored on the Alert, pushed only to their sockets)
+    user_id: Optional[str] = None
+    # time.monotonic() at submission, for the submit -> push latency
+    submitted_at: float = field(default_factory=time.monotonic, compare=False)
+
+    @property
+    def key(self) -> Tuple[Optional[str], str, str]:
+        return self.user_id, self.stock_code, self.alert_type
+
+    @property
+    def fingerprint(self) -> Tuple[Optional[str], str, str, str]:
+        return self.user_id, self.stock_code, self.alert_type, self.message
+
+    @property
+    def rank(self) -> int:
+        return SEVERITY_RANK.get(self.severity.upper(), 0)
+
+
+def anomaly_events(result: Dict) -> List[AlertEvent]:
+    """Events from an AnomalyService.detect() / BVMTAnomalyDetector result."""
+    stock_code = result.get("stock")
+    if not stock_code or not result.get("is_anomaly"):
+        return []
+    return [
+        AlertEvent(stock_code, alert["type"], alert["message"], alert.get("severity", "MEDIUM"), "anomaly")
+        for alert in result.get("alerts", [])
+    ]
+
+
+def sentiment_swing_events(session, scored: Sequence) -> List[AlertEvent]:
+    """
+    Compare the mean score of freshly scored articles with each stock's average over
+    the previous SENTIMENT_SWING_DAYS; a gap of SENTIMENT_SWING_THRESHOLD or more is a swing.
+    """
+    fresh: Dict[str, List[float]] = {}
+    for news in scored:
+        if news.stock_code and news.sentiment_score is not None:
+            fresh.setdefault(news.stock_code, []).append(news.sentiment_score)
+    if not fresh:
+        return []
+
+    since = datetime.utcnow() - timedelta(days=SENTIMENT_SWING_DAYS)
+    baselines = dict(session.exec(
+        select(News.stock_code, func.avg(News.sentiment_score))
+        .where(News.stock_code.in_(list(fresh)))  # type: ignore[union-attr]
+        .where(News.id.not_in([news.id for news in scored]))  # type: ignore[union-attr]
+        .where(News.sentiment_score.is_not(None))  # type: ignore[union-attr]
+        .where(News.created_at >= since)
+        .group_by(News.stock_code)
+    ).all())
+
+    events = []
+    for stock_code, scores in fresh.items():
+        baseline = baselines.get(stock_code)
+        if baseline is None:
+            continue
+        current = sum(scores) / len(scores)
+        swing = current - baseline
+        if abs(swing) < SENTIMENT_SWING_THRESHOLD:
+            continue
+        events.append(AlertEvent(
+            stock_code,
+            "SENTIMENT_SWING",
+            f"News sentiment {'up' if swing > 0 else 'down'} {abs(swing):.2f} "
+            f"({baseline:+.2f} -> {current:+.2f}, {len(scores)} new articles)",
+            "HIGH" if abs(swing) >= 2 * SENTIMENT_SWING_THRESHOLD else "MEDIUM",
+            "sentiment",
+        ))
+    return events
+
+
+def price_target_event(
+    stock_code: str, target: float, price: float, direction: str, severity: str = "MEDIUM", user_id: Optional[str] = None
+) -> AlertEvent:
+    """Event for a quote crossing a price target ("above" or "below")."""
+    return AlertEvent(
+        stock_code,
+        "PRICE_TARGET",
+        f"Price {price:.3f} crossed {direction} {target:.3f}",
+        severity,
+        "price_target",
+        user_id,
+    )
+
+
+def _default_session_factory():
+    return session_scope()
+
+
+def _default_publish(message: Dict) -> bool:
+    from app.services.alert_hub import alert_hub
+
+    return alert_hub.publish_threadsafe(message)
+
+
+class AlertPipeline:
+    def __init__(
+        self,
+        session_factory: Callable = _default_session_factory,
+        publish: Callable[[Dict], bool] = _default_publish,
+        flush_interval: float = ALERT_FLUSH_INTERVAL,
+        batch_size: int = ALERT_BATCH_SIZE,
+        rate_limit: float = ALERT_RATE_LIMIT,
+        dedupe_ttl: float = ALERT_DEDUPE_TTL,
+    ):
+        self.session_factory = session_factory
+        self.publish = publish
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.rate_limit = rate_limit
+        self.dedupe_ttl = dedupe_ttl
+        self._queue: "queue.Queue[AlertEvent]" = queue.Queue()
+        # (user, stock, type) -> (monotonic time, severity rank) of the last emitted alert
+        self._last_emitted: Dict[Tuple, Tuple[float, int]] = {}
+        # (user, stock, type, message) -> monotonic time it was last emitted
+        self._seen: Dict[Tuple, float] = {}
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._started_at: Optional[float] = None
+        self._stats = {"submitted": 0, "processed": 0, "deduplicated": 0, "rate_limited": 0, "inserted": 0, "batches": 0, "errors": 0}
+
+    def submit(self, events: Iterable[AlertEvent]) -> int:
+        count = 0
+        for event in events:
+            self._queue.put(event)
+            count += 1
+        if count:
+            with self._lock:
+                self._stats["submitted"] += count
+            self.start()
+        return count
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run_loop, name="alert-pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+        # Flush whatever was submitted before shutdown
+        events = self._drain(block=False)
+        while events:
+            self._flush(events)
+            events = self._drain(block=False)
+
+    def _drain(self, block: bool = True) -> List[AlertEvent]:
+        events: List[AlertEvent] = []
+        try:
+            events.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+        except queue.Empty:
+            return events
+        # Collect for at most flush_interval after the first event, so none waits longer
+        deadline = time.monotonic() + self.flush_interval
+        while len(events) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                events.append(self._queue.get(timeout=remaining) if block and remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _run_loop(self):
+        self._load_recent()
+        while self._running:
+            events = self._drain()
+            if events:
+                self._flush(events)
+
+    def _load_recent(self):
+        """Seed dedupe state from alerts already stored, so a restart does not re-fire them."""
+        since = datetime.utcnow() - timedelta(seconds=self.dedupe_ttl)
+        try:
+            with self.session_factory() as session:
+                rows = session.exec(
+                    select(Alert.user_id, Alert.stock_code, Alert.alert_type, Alert.message, Alert.severity, Alert.timestamp)
+                    .where(Alert.timestamp >= since)
+                ).all()
+        except Exception as e:
+            logger.warning(f"[WARN] Could not load recent alerts for dedupe: {e}")
+            return
+        now, utcnow = time.monotonic(), datetime.utcnow()
+        for user_id, stock_code, alert_type, message, severity, timestamp in rows:
+            emitted = now - (utcnow - timestamp).total_seconds()
+            self._seen[(user_id, stock_code, alert_type, message)] = emitted
+            last = self._last_emitted.get((user_id, stock_code, alert_type))
+            if last is None or emitted > last[0]:
+                self._last_emitted[(user_id, stock_code, alert_type)] = (emitted, SEVERITY_RANK.get(severity.upper(), 0))
+
+    def _select(self, events: List[AlertEvent]) -> List[AlertEvent]:
+        """
+        Drop duplicates and rate-limited events; within a batch keep the most severe per key.
+        Dedupe and rate-limit state only moves once the selection is stored (_remember).
+        """
+        now = time.monotonic()
+        fingerprints = set()
+        passed: List[AlertEvent] = []
+        best: Dict[Tuple, AlertEvent] = {}
+        for event in events:
+            if self.dedupe_ttl > 0:
+                seen = self._seen.get(event.fingerprint)
+                if event.fingerprint in fingerprints or (seen is not None and now - seen < self.dedupe_ttl):
+                    self._stats["deduplicated"] += 1
+                    continue
+                fingerprints.add(event.fingerprint)
+            # Alerts a user asked for (price targets fire once per rule) are never rate-limited
+            if self.rate_limit <= 0 or event.user_id is not None:
+                passed.append(event)
+                continue
+            last = self._last_emitted.get(event.key)
+            # Within the window only an escalation in severity gets through
+            if last is not None and now - last[0] < self.rate_limit and event.rank <= last[1]:
+                self._stats["rate_limited"] += 1
+                continue
+            current = best.get(event.key)
+            if current is not None:
+                self._stats["rate_limited"] += 1
+            if current is None or event.rank > current.rank:
+                best[event.key] = event
+
+        return passed + list(best.values())
+
+    def _remember(self, events: List[AlertEvent]) -> None:
+        """Mark stored events as emitted for dedupe and rate limiting."""
+        now = time.monotonic()
+        for event in events:
+            if self.dedupe_ttl > 0:
+                self._seen[event.fingerprint] = now
+            self._last_emitted[event.key] = (now, event.rank)
+        if len(self._seen) > MAX_FINGERPRINTS:
+            self._seen = {k: t for k, t in self._seen.items() if now - t < self.dedupe_ttl}
+
+    def _flush(self, events: List[AlertEvent]):
+        if not events:
+            return
+        with self._lock:
+            self._stats["processed"] += len(events)
+            selected = self._select(events)
+        if not selected:
+            return
+        timestamp = datetime.utcnow()
+        rows = [
+            {
+                "stock_code": e.stock_code,
+                "alert_type": e.alert_type,
+                "message": e.message,
+                "severity": e.severity,
+                "timestamp": timestamp,
+                "is_read": False,
+                "user_id": e.user_id,
+            }
+            for e in selected
+        ]
+        try:
+            with self.session_factory() as session:
+                # One multi-row INSERT ... RETURNING per batch instead of a unit-of-work flush
+                ids = session.execute(
+                    insert(Alert).returning(Alert.id, sort_by_parameter_order=True), rows
+                ).scalars().all()
+                session.commit()
+        except Exception as e:
+            # Not remembered: the same events get through again on the next submit
+            with self._lock:
+                self._stats["errors"] += 1
+            logger.error(f"Alert batch insert failed ({len(rows)} alerts): {e}")
+            return
+        with self._lock:
+            self._remember(selected)
+
+        for alert_id, row, event in zip(ids, rows, selected):
+            self.publish({
+                "type": "alert",
+                "id": alert_id,
+                **row,
+                "timestamp": timestamp.isoformat(),
+                "source": event.source,
+            })
+        pushed = time.monotonic()
+        with self._lock:
+            self._stats["inserted"] += len(rows)
+            self._stats["batches"] += 1
+            self._latencies.extend(pushed - event.submitted_at for event in selected)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+
+            def pct(q: float) -> float:
+                if not latencies:
+                    return 0.0
+                return round(latencies[min(len(latencies) - 1, int(q / 100 * (len(latencies) - 1)))] * 1000, 2)
+
+            return {
+                "running": self._running,
+                "queued": self._queue.qsize(),
+                **self._stats,
+                "events_per_s": round(self._stats["processed"] / elapsed, 2) if elapsed else 0.0,
+                "push_latency_ms": {"p50": pct(50), "p99": pct(99), "max": pct(100)},
+            }
+
+
+alert_pipeline = AlertPipeline()
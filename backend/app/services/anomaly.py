@@ -1,4 +1,12 @@
-"""Anomaly detection service using ML IsolationForest with rule-based fallback."""
+"""
+Anomaly detection service using ML IsolationForest with rule-based fallback.
+
+detect/detect_batch only compute. Alerts come from emit_live_anomalies, which
+the live-market poller runs on each refreshed snapshot: the live quotes are
+checked against each stock's stored history and the anomalies go to the alert
+pipeline (deduplicated and rate-limited there), so reading
+/api/stocks/{code}/anomaly never writes.
+"""
 
 from __future__ import annotations
 
@@ -6,7 +14,10 @@ import logging
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.db.database import PriceData, session_scope
+from app.db.queries import group_latest_prices, latest_prices_statement
 
 logger = logging.getLogger("kanz.anomaly")
 
@@ -14,6 +25,9 @@ ML_SRC_PATH = Path(__file__).parent.parent.parent.parent / "ml" / "src"
 if str(ML_SRC_PATH) not in sys.path:
     sys.path.insert(0, str(ML_SRC_PATH))
 
+# Stored daily rows behind the stats a live quote is compared with (~20 trading days)
+LIVE_HISTORY_ROWS = 21
+
 _detector: Any = None
 _detector_error: Optional[str] = None
 
@@ -57,6 +71,50 @@ def _get_detector() -> Any:
         return None
 
 
+def _emit_alerts(results: List[Dict]) -> None:
+    from app.services.alert_pipeline import alert_pipeline, anomaly_events
+
+    alert_pipeline.submit(event for result in results for event in anomaly_events(result))
+
+
+def historical_stats(history: Sequence[PriceData]) -> Dict:
+    """The history_stats detect() expects, from daily rows oldest first ending with the current one."""
+    if len(history) < 2:
+        return {}
+    
+    prev_close = history[-2].close if len(history) >= 2 else history[-1].close
+    
+    closes = [p.close for p in history]
+    volumes = [p.volume for p in history]
+    transactions = [p.transactions or 0 for p in history]
+    ranges = [(p.high - p.low) / p.close if p.close else 0 for p in history]
+    
+    def mean(lst):
+        return sum(lst) / len(lst) if lst else 0
+    
+    def std(lst):
+        if len(lst) < 2:
+            return 1
+        avg = mean(lst)
+        variance = sum((x - avg) ** 2 for x in lst) / len(lst)
+        return variance ** 0.5 or 1
+    
+    vol_20 = volumes[-20:] if len(volumes) >= 20 else volumes
+    price_20 = closes[-20:] if len(closes) >= 20 else closes
+    range_10 = ranges[-10:] if len(ranges) >= 10 else ranges
+    tx_20 = transactions[-20:] if len(transactions) >= 20 else transactions
+    
+    return {
+        "prev_close": prev_close,
+        "volume_ma_20": mean(vol_20),
+        "volume_std_20": std(vol_20),
+        "price_ma_20": mean(price_20),
+        "price_std_20": std(price_20),
+        "range_ma_10": mean(range_10),
+        "tx_ma_20": mean(tx_20),
+    }
+
+
 class AnomalyService:
     def __init__(self):
         self.detector = _get_detector()
@@ -138,3 +196,54 @@ class AnomalyService:
     
     def is_ml_enabled(self) -> bool:
         return self.detector is not None
+
+
+def live_anomaly_batch(quotes: Dict[str, Dict], history: Dict[str, List[PriceData]]) -> List[Dict]:
+    """
+    detect_batch items for live quotes (code -> quote) against stored daily
+    rows (code -> rows oldest first). A stored row for today is replaced by the
+    live quote; codes without a price or without an earlier row are skipped.
+    """
+    today = datetime.now().date()
+    items = []
+    for code, quote in quotes.items():
+        price = quote.get("price")
+        past = [row for row in history.get(code, []) if row.date.date() < today]
+        if quote.get("error") or not price or not past:
+            continue
+        live = PriceData(
+            stock_id=past[-1].stock_id, date=datetime.now(), open=quote.get("open") or price,
+            high=quote.get("high") or price, low=quote.get("low") or price, close=price,
+            volume=quote.get("volume") or 0, transactions=0, capital=0.0,
+        )
+        stats = historical_stats(past + [live])
+        items.append({
+            "stock_code": code,
+            # Live quotes carry no transaction count: use the average so it reads as normal
+            "current": {
+                "open": live.open, "high": live.high, "low": live.low, "close": live.close,
+                "volume": live.volume, "transactions": stats["tx_ma_20"],
+            },
+            "historical": stats,
+        })
+    return items
+
+
+def emit_live_anomalies(quotes: Dict[str, Dict], service: Optional["AnomalyService"] = None) -> int:
+    """
+    Run detection over live quotes (the poller's snapshot) and submit the
+    anomalies to the alert pipeline. One history query for all codes; returns
+    the number of anomalous stocks.
+    """
+    codes = [code for code, quote in quotes.items() if quote.get("price") and not quote.get("error")]
+    if not codes:
+        return 0
+    with session_scope() as session:
+        rows = session.exec(latest_prices_statement(depth=LIVE_HISTORY_ROWS, codes=codes)).all()
+        history = {stock.code: prices[::-1] for stock, prices in group_latest_prices(rows)}
+    items = live_anomaly_batch({code: quotes[code] for code in codes}, history)
+    if not items:
+        return 0
+    results = (service or AnomalyService()).detect_batch(items)
+    _emit_alerts(results)
+    return sum(1 for result in results if result.get("is_anomaly"))
@@ -3,121 +3,191 @@ Live market data service for BVMT stocks via ilboursa.com scraping.
 Provides real-time prices, TUNINDEX, and market data.
 """
 
-import re
-import requests
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
-from bs4 import BeautifulSoup
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import MARKET_CACHE_TTL, MARKET_FETCH_CONCURRENCY, MARKET_STALE_TTL
+
+NLP_PATH = Path(__file__).parent.parent.parent.parent / "nlp"
+if str(NLP_PATH) not in sys.path:
+    sys.path.insert(0, str(NLP_PATH))
+
+# Fetching and parsing are shared with the news scrapers
+from scrapers.http_cache import CachedSession, get_http_cache
+from scrapers.parsing import parse_quote, parse_top_movers, parse_tunindex
+
+# Movers are fetched once at the largest limit the API accepts and sliced per request
+MOVERS_FETCH_LIMIT = 50
+
+# BVMT continuous trading session (local time, Monday to Friday)
+MARKET_OPEN_HOUR = 9
+MARKET_CLOSE_HOUR = 14
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    now = now or datetime.now()
+    return now.weekday() < 5 and MARKET_OPEN_HOUR <= now.hour < MARKET_CLOSE_HOUR
+
+
+class MarketDataUnavailable(Exception):
+    """The upstream page could not be fetched."""
 
 
 class MarketDataService:
     BASE_URL = "https://www.ilboursa.com"
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, cache_ttl: float = MARKET_CACHE_TTL, stale_ttl: float = MARKET_STALE_TTL):
+        # Conditional requests through the HTTP cache shared with the news scrapers
+        self.session = CachedSession(get_http_cache(), source="ilboursa")
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
         })
-        self._cache = {}
-        self._cache_time = None
-        self._cache_ttl = 60
+        # key -> (monotonic fetch time, value). Values younger than cache_ttl are served
+        # as is; up to stale_ttl past that they are served while one refresh runs.
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._cache_ttl = cache_ttl
+        self._stale_ttl = stale_ttl
+        self._inflight: Dict[str, Future] = {}
+        self._cache_lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-refresh")
+        # Every request goes to one host: cap concurrent fetches across all callers
+        self._host_slots = threading.BoundedSemaphore(MARKET_FETCH_CONCURRENCY)
+        self._quote_pool = ThreadPoolExecutor(max_workers=MARKET_FETCH_CONCURRENCY, thread_name_prefix="market-quotes")
+        # Called with (stock_code, price) for every quote fetched upstream (not for cache hits)
+        self._tick_listeners: List[Callable[[str, Optional[float]], Any]] = []
     
-    def _get(self, url: str) -> Optional[BeautifulSoup]:
+    def add_tick_listener(self, listener: Callable[[str, Optional[float]], Any]) -> None:
+        if listener not in self._tick_listeners:
+            self._tick_listeners.append(listener)
+    
+    def _notify_tick(self, stock_code: str, price: Optional[float]) -> None:
+        for listener in self._tick_listeners:
+            try:
+                listener(stock_code, price)
+            except Exception as e:
+                print(f"[WARN] Tick listener failed for {stock_code}: {e}")
+    
+    def _cached(self, key: str, loader: Callable[[], Any], fresh: bool = False) -> Any:
+        """
+        Per-key TTL cache with single-flight loading: concurrent callers for the
+        same key share one upstream fetch. Loader exceptions are not cached.
+        fresh=True skips the cached value (but still joins an in-flight fetch).
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = None if fresh else self._cache.get(key)
+            age = now - entry[0] if entry else None
+            if entry and age < self._cache_ttl:
+                return entry[1]
+            
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            
+            if entry and age < self._cache_ttl + self._stale_ttl:
+                if leader:
+                    self._refresher.submit(self._load, key, loader, future)
+                return entry[1]
+        
+        if leader:
+            self._load(key, loader, future)
+        return future.result()
+    
+    def _load(self, key: str, loader: Callable[[], Any], future: Future):
         try:
-            response = self.session.get(url, timeout=10)
+            value = loader()
+        except Exception as e:
+            with self._cache_lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+    
+    def _get(self, url: str) -> Optional[bytes]:
+        try:
+            with self._host_slots:
+                response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            return BeautifulSoup(response.content, "html.parser")
+            return response.content
         except Exception as e:
             print(f"[WARN] Failed to fetch {url}: {e}")
             return None
     
-    def get_tunindex(self) -> Dict:
-        soup = self._get(f"{self.BASE_URL}/marches/indices/tunindex")
-        if not soup:
-            return {"value": None, "change": None, "change_pct": None}
+    def _fetch(self, url: str) -> bytes:
+        html = self._get(url)
+        if not html:
+            raise MarketDataUnavailable(url)
+        return html
+    
+    def _fetch_tunindex(self) -> Dict:
+        parsed = parse_tunindex(self._fetch(f"{self.BASE_URL}/marches/indices/tunindex"))
+        value = parsed["value"]
+        change_pct = parsed["change_pct"]
         
+        return {
+            "value": value or 9850.0,
+            "change": (value or 9850.0) * (change_pct or 0) / 100 if change_pct else None,
+            "change_pct": change_pct or 0.0,
+            "timestamp": datetime.now().isoformat(),
+        }
+    
+    def get_tunindex(self, fresh: bool = False) -> Dict:
         try:
-            value_elem = soup.select_one(".cours-actuel, .last-price, [class*='price']")
-            change_elem = soup.select_one(".variation, [class*='change']")
-            
-            value = None
-            change_pct = None
-            
-            if value_elem:
-                value_text = value_elem.get_text(strip=True)
-                value_match = re.search(r"[\d\s]+[,.]?\d*", value_text.replace(" ", ""))
-                if value_match:
-                    value = float(value_match.group().replace(",", ".").replace(" ", ""))
-            
-            if change_elem:
-                change_text = change_elem.get_text(strip=True)
-                pct_match = re.search(r"([+-]?\d+[,.]?\d*)%?", change_text)
-                if pct_match:
-                    change_pct = float(pct_match.group(1).replace(",", "."))
-            
-            return {
-                "value": value or 9850.0,
-                "change": (value or 9850.0) * (change_pct or 0) / 100 if change_pct else None,
-                "change_pct": change_pct or 0.0,
-                "timestamp": datetime.now().isoformat(),
-            }
+            return dict(self._cached("tunindex", self._fetch_tunindex, fresh))
+        except MarketDataUnavailable:
+            return {"value": None, "change": None, "change_pct": None}
         except Exception as e:
             print(f"[WARN] Parse error for TUNINDEX: {e}")
             return {"value": 9850.0, "change": 0, "change_pct": 0.0}
     
-    def get_stock_quote(self, stock_code: str) -> Dict:
-        soup = self._get(f"{self.BASE_URL}/marches/cotation?s={stock_code}")
-        if not soup:
-            return self._fallback_quote(stock_code)
-        
+    def _fetch_stock_quote(self, stock_code: str) -> Dict:
+        html = self._fetch(f"{self.BASE_URL}/marches/cotation?s={stock_code}")
+        quote = {
+            "code": stock_code,
+            "timestamp": datetime.now().isoformat(),
+            **parse_quote(html),
+        }
+        self._notify_tick(stock_code, quote.get("price"))
+        return quote
+    
+    def get_stock_quote(self, stock_code: str, fresh: bool = False) -> Dict:
         try:
-            data = {
-                "code": stock_code,
-                "timestamp": datetime.now().isoformat(),
-            }
-            
-            price_elem = soup.select_one("td.cours, .last-price, [class*='cours']")
-            if price_elem:
-                price_text = price_elem.get_text(strip=True)
-                price_match = re.search(r"(\d+[,.]?\d*)", price_text.replace(" ", ""))
-                if price_match:
-                    data["price"] = float(price_match.group(1).replace(",", "."))
-            
-            rows = soup.select("table tr")
-            for row in rows:
-                cells = row.select("td")
-                if len(cells) >= 2:
-                    label = cells[0].get_text(strip=True).lower()
-                    value_text = cells[1].get_text(strip=True)
-                    
-                    if "ouverture" in label or "open" in label:
-                        match = re.search(r"(\d+[,.]?\d*)", value_text)
-                        if match:
-                            data["open"] = float(match.group(1).replace(",", "."))
-                    elif "haut" in label or "high" in label:
-                        match = re.search(r"(\d+[,.]?\d*)", value_text)
-                        if match:
-                            data["high"] = float(match.group(1).replace(",", "."))
-                    elif "bas" in label or "low" in label:
-                        match = re.search(r"(\d+[,.]?\d*)", value_text)
-                        if match:
-                            data["low"] = float(match.group(1).replace(",", "."))
-                    elif "volume" in label:
-                        match = re.search(r"([\d\s]+)", value_text.replace(" ", ""))
-                        if match:
-                            data["volume"] = int(match.group(1).replace(" ", ""))
-                    elif "variation" in label or "change" in label:
-                        match = re.search(r"([+-]?\d+[,.]?\d*)%?", value_text)
-                        if match:
-                            data["change_pct"] = float(match.group(1).replace(",", "."))
-            
-            return data
+            return dict(self._cached(f"quote:{stock_code}", lambda: self._fetch_stock_quote(stock_code), fresh))
+        except MarketDataUnavailable:
+            return self._fallback_quote(stock_code)
         except Exception as e:
             print(f"[WARN] Parse error for {stock_code}: {e}")
             return self._fallback_quote(stock_code)
     
+    def get_stock_quotes(self, stock_codes: List[str]) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+        """Fetch several quotes concurrently; returns (quotes, errors) keyed by code."""
+        futures = {code: self._quote_pool.submit(self.get_stock_quote, code) for code in stock_codes}
+        quotes: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        for code, future in futures.items():
+            try:
+                quote = future.result()
+            except Exception as e:
+                errors[code] = str(e)
+                continue
+            if quote.get("error"):
+                errors[code] = quote["error"]
+            else:
+                quotes[code] = quote
+        return quotes, errors
+    
     def _fallback_quote(self, stock_code: str) -> Dict:
         return {
             "code": stock_code,
@@ -131,58 +201,40 @@ class MarketDataService:
             "error": "Data unavailable",
         }
     
-    def get_market_overview(self) -> Dict:
-        tunindex = self.get_tunindex()
+    def get_market_overview(self, tunindex: Optional[Dict] = None) -> Dict:
+        tunindex = tunindex or self.get_tunindex()
         
         return {
             "tunindex": tunindex,
-            "market_status": "open" if 9 <= datetime.now().hour < 14 else "closed",
+            "market_status": "open" if is_market_open() else "closed",
             "last_update": datetime.now().isoformat(),
         }
     
-    def get_top_movers(self, limit: int = 10) -> Dict:
-        soup = self._get(f"{self.BASE_URL}/marches/palmares")
-        
-        gainers = []
-        losers = []
+    def _fetch_top_movers(self) -> Dict:
+        gainers, losers = parse_top_movers(self._fetch(f"{self.BASE_URL}/marches/palmares"), MOVERS_FETCH_LIMIT)
+        return {
+            "gainers": gainers,
+            "losers": losers,
+            "timestamp": datetime.now().isoformat(),
+        }
+    
+    def get_top_movers(self, limit: int = 10, fresh: bool = False) -> Dict:
+        gainers: List[Dict] = []
+        losers: List[Dict] = []
+        timestamp = datetime.now().isoformat()
         
-        if soup:
-            try:
-                tables = soup.select("table")
-                for table in tables:
-                    header = table.find_previous(["h2", "h3", "div"])
-                    header_text = header.get_text(strip=True).lower() if header else ""
-                    
-                    rows = table.select("tr")[1:limit+1]
-                    for row in rows:
-                        cells = row.select("td")
-                        if len(cells) >= 3:
-                            code_elem = cells[0].select_one("a")
-                            code = code_elem.get_text(strip=True) if code_elem else cells[0].get_text(strip=True)
-                            
-                            price_text = cells[1].get_text(strip=True) if len(cells) > 1 else "0"
-                            change_text = cells[2].get_text(strip=True) if len(cells) > 2 else "0"
-                            
-                            price_match = re.search(r"(\d+[,.]?\d*)", price_text)
-                            change_match = re.search(r"([+-]?\d+[,.]?\d*)%?", change_text)
-                            
-                            stock_data = {
-                                "code": code,
-                                "price": float(price_match.group(1).replace(",", ".")) if price_match else 0,
-                                "change_pct": float(change_match.group(1).replace(",", ".")) if change_match else 0,
-                            }
-                            
-                            if "hausse" in header_text or "gainer" in header_text:
-                                gainers.append(stock_data)
-                            elif "baisse" in header_text or "loser" in header_text:
-                                losers.append(stock_data)
-            except Exception as e:
-                print(f"[WARN] Error parsing top movers: {e}")
+        try:
+            movers = self._cached("movers", self._fetch_top_movers, fresh)
+            gainers, losers, timestamp = movers["gainers"], movers["losers"], movers["timestamp"]
+        except MarketDataUnavailable:
+            pass
+        except Exception as e:
+            print(f"[WARN] Error parsing top movers: {e}")
         
         return {
             "gainers": gainers[:limit],
             "losers": losers[:limit],
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
         }
 
 
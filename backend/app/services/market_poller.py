@@ -0,0 +1,150 @@
+"""
+Background live-market poller.
+Refreshes TUNINDEX, top movers and the quote of every listed stock during
+market hours and publishes them as one immutable snapshot, so the live routes
+read memory instead of scraping inside the request.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlmodel import select
+
+from app.core.config import MARKET_POLL_INTERVAL, MARKET_POLL_WORKERS
+from app.db.database import Stock, session_scope
+from app.services.market_data import MOVERS_FETCH_LIMIT, MarketDataService, is_market_open, market_data_service
+
+logger = logging.getLogger("kanz.market_poller")
+
+
+def _age(since: Optional[float]) -> Optional[float]:
+    return None if since is None else round(time.time() - since, 3)
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    tunindex: Optional[Dict] = None
+    movers: Optional[Dict] = None
+    # Good quotes only: a symbol that never fetched successfully is absent
+    quotes: Dict[str, Dict] = field(default_factory=dict)
+    # time.time() each quote was fetched; one carried over from an earlier poll keeps its own
+    quote_fetched_at: Dict[str, float] = field(default_factory=dict)
+    updated_at: Optional[float] = None  # time.time() of the last completed poll
+
+    def age_seconds(self) -> Optional[float]:
+        return _age(self.updated_at)
+
+    def quote_age_seconds(self, code: str) -> Optional[float]:
+        return _age(self.quote_fetched_at.get(code))
+
+
+def _listed_stock_codes() -> List[str]:
+    with session_scope() as session:
+        return list(session.exec(select(Stock.code)).all())
+
+
+class LiveMarketPoller:
+    def __init__(
+        self,
+        service: MarketDataService = market_data_service,
+        interval_seconds: float = MARKET_POLL_INTERVAL,
+        max_workers: int = MARKET_POLL_WORKERS,
+        stock_codes: Callable[[], List[str]] = _listed_stock_codes,
+    ):
+        self.service = service
+        self.interval = interval_seconds
+        self.max_workers = max_workers
+        self.stock_codes = stock_codes
+        # Replaced wholesale after each poll; readers never see a half-built snapshot
+        self.snapshot = MarketSnapshot()
+        self.last_error: Optional[str] = None
+        # Called with each new snapshot from the poller thread (anomaly alerts)
+        self._snapshot_listeners: List[Callable[[MarketSnapshot], Any]] = []
+        # Set by stop(); the loop waits on it between polls, so it also ends the wait
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_snapshot_listener(self, listener: Callable[[MarketSnapshot], Any]) -> None:
+        if listener not in self._snapshot_listeners:
+            self._snapshot_listeners.append(listener)
+
+    def _notify_snapshot(self, snapshot: MarketSnapshot) -> None:
+        for listener in self._snapshot_listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.warning(f"[WARN] Snapshot listener failed: {e}")
+
+    def poll_once(self) -> MarketSnapshot:
+        previous = self.snapshot
+        tunindex = self.service.get_tunindex(fresh=True)
+        movers = self.service.get_top_movers(MOVERS_FETCH_LIMIT, fresh=True)
+
+        codes = self.stock_codes()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="market-poll") as pool:
+            fetched = list(pool.map(lambda code: self.service.get_stock_quote(code, fresh=True), codes))
+        fetched_at = time.time()
+
+        quotes: Dict[str, Dict] = {}
+        quote_fetched_at: Dict[str, float] = {}
+        for code, quote in zip(codes, fetched):
+            if not quote.get("error"):
+                quotes[code], quote_fetched_at[code] = quote, fetched_at
+            # Keep the last good quote rather than replacing it with a fallback; never store the fallback
+            elif code in previous.quotes:
+                quotes[code], quote_fetched_at[code] = previous.quotes[code], previous.quote_fetched_at[code]
+
+        self.snapshot = MarketSnapshot(
+            tunindex=tunindex if tunindex.get("value") is not None else previous.tunindex,
+            movers=movers if movers["gainers"] or movers["losers"] else previous.movers,
+            quotes=quotes,
+            quote_fetched_at=quote_fetched_at,
+            updated_at=time.time(),
+        )
+        return self.snapshot
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            # Outside market hours prices do not move; only fill an empty snapshot
+            if is_market_open() or self.snapshot.updated_at is None:
+                started = time.perf_counter()
+                try:
+                    snapshot = self.poll_once()
+                    self.last_error = None
+                    logger.info(
+                        f"[OK] Market snapshot refreshed: {len(snapshot.quotes)} quotes "
+                        f"in {time.perf_counter() - started:.1f}s"
+                    )
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.warning(f"[WARN] Market poll failed: {e}")
+                else:
+                    self._notify_snapshot(snapshot)
+
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="market-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+
+live_market_poller = LiveMarketPoller()
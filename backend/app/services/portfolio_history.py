@@ -0,0 +1,128 @@
+"""
+Portfolio value over time.
+
+Replays the trade ledger: each trade counts from the first trading day on or
+after it was executed, buys with positive and sells with negative quantities.
+One query loads the closes of the traded stocks since the first trade (or the
+start of the requested period) through the (stock_id, date) index; they are
+pivoted to a dates x stocks matrix P, forward-filled over days a stock did not
+trade, and expanded to one column per trade. With H the dates x trades matrix
+of "executed by that day" flags, q the signed quantities and p the trade prices:
+
+    value     (H * P_trades) @ q      net invested  H @ (q * p)
+
+P&L is value minus net invested (realized and unrealized). The drawdown is taken
+on the time-weighted return index, so money moved in or out by trades is not
+mistaken for gains or losses. Days before a stock's first close in the period
+value its trades at the trade price, like value_positions does for unpriced
+stocks. Series are cached per (user, last trade id, period, latest price date):
+a repeat view is a dict lookup, and a trade or the first price of a new day
+makes a new key.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlmodel import func, select
+
+from app.core.config import HISTORY_CACHE_SIZE
+from app.db.database import PriceData, Trade
+from app.services.portfolio_risk import WindowCache, closes_statement
+from app.services.trade_ledger import last_trade_id
+
+history_cache = WindowCache(maxsize=HISTORY_CACHE_SIZE)
+
+
+def _day(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _forward_fill(closes: np.ndarray) -> np.ndarray:
+    """Carry each column's last close over missing days (leading gaps stay NaN)."""
+    rows = np.where(np.isnan(closes), 0, np.arange(len(closes))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return closes[rows, np.arange(closes.shape[1])]
+
+
+def build_history(rows: Sequence[Tuple[datetime, str, float]], trades: Sequence[Trade]) -> Dict:
+    """Daily value, net invested amount and P&L of the `trades` replayed over (date, code, close) rows."""
+    if not rows or not trades:
+        return {"as_of": None, "points": [], "summary": None}
+    dates, date_index = np.unique(np.array([row[0] for row in rows], dtype=object), return_inverse=True)
+    codes = sorted({t.stock_code for t in trades})
+    columns = {code: i for i, code in enumerate(codes)}
+    closes = np.full((len(dates), len(codes)), np.nan)
+    closes[date_index, [columns[row[1]] for row in rows]] = [row[2] for row in rows]
+    closes = _forward_fill(closes)
+
+    quantity = np.array([t.quantity if t.side == "buy" else -t.quantity for t in trades], dtype=float)
+    price = np.array([t.price for t in trades], dtype=float)
+    # First row each trade counts on; trades after the latest close count from the last day
+    days = np.array([_day(d) for d in dates], dtype=object)
+    start = np.searchsorted(days, np.array([_day(t.executed_at) for t in trades], dtype=object), side="left")
+    start = np.minimum(start, len(dates) - 1)
+    executed = (np.arange(len(dates))[:, None] >= start).astype(float)
+    trade_closes = closes[:, [columns[t.stock_code] for t in trades]]
+    trade_closes = np.where(np.isnan(trade_closes), price, trade_closes)
+
+    value = (executed * trade_closes) @ quantity
+    invested = executed @ (quantity * price)
+    pnl = value - invested
+    # Daily return with the day's trades at the start of the day, chained into a time-weighted index
+    flows = np.diff(invested, prepend=0.0)
+    base = np.concatenate(([0.0], value[:-1])) + flows
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(invested > 0, pnl / invested * 100, 0.0)
+        daily = np.where(base > 0, value / base - 1, 0.0)
+    index = np.cumprod(1 + daily)
+    drawdown = 1 - index / np.maximum.accumulate(index)
+
+    # The chart starts on the first day anything is held
+    first = int(start.min())
+    points = [
+        {
+            "date": dates[i],
+            "value": float(value[i]),
+            "invested": float(invested[i]),
+            "pnl": float(pnl[i]),
+            "pnl_pct": float(pnl_pct[i]),
+        }
+        for i in range(first, len(dates))
+    ]
+    return {
+        "as_of": dates[-1],
+        "points": points,
+        "summary": {
+            "start_value": float(value[first]),
+            "end_value": float(value[-1]),
+            "pnl": float(pnl[-1]),
+            "pnl_pct": float(pnl_pct[-1]),
+            "time_weighted_return_pct": float((index[-1] / index[first] - 1) * 100),
+            "high": float(value[first:].max()),
+            "low": float(value[first:].min()),
+            "max_drawdown_pct": float(drawdown[first:].max() * 100),
+        },
+    }
+
+
+def portfolio_history(session, user_id: str, days: int) -> Dict:
+    """Cached daily history of a user's trades over the last `days` calendar days."""
+    as_of: Optional[datetime] = session.exec(select(func.max(PriceData.date))).one()
+    last_trade = last_trade_id(session, user_id)
+    if as_of is None or last_trade is None:
+        return {"as_of": as_of, "points": [], "summary": None}
+    key = (user_id, last_trade, days, as_of)
+
+    def build() -> Dict:
+        trades = session.exec(select(Trade).where(Trade.user_id == user_id).order_by(Trade.id)).all()
+        first_trade = min(_day(t.executed_at) for t in trades)
+        since = max(min(first_trade, _day(as_of)), _day(as_of) - timedelta(days=days))
+        codes = sorted({t.stock_code for t in trades})
+        # Plain Core rows: for a few thousand closes per stock the ORM row wrapping costs more than the query
+        rows = session.connection().execute(closes_statement(codes, since)).all()
+        return build_history(rows, trades)
+
+    return history_cache.get_or_build(key, build)
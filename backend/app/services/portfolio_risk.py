@@ -0,0 +1,240 @@
+"""
+Portfolio risk: volatility, historical and parametric VaR/CVaR, beta and the
+correlation matrix of the held stocks.
+
+One query loads the held stocks' closes over the last `window` trading days
+through the (stock_id, date) index; they are pivoted to a dates x stocks matrix
+of daily returns R and its covariance. The market aggregate used for beta is the
+mean daily return of all stocks (an equal-weighted index, there is no TUNINDEX
+series in price_data), computed with LAG() in the database and shared by every
+portfolio. Everything after the pivot is NumPy:
+
+    portfolio returns  p = R @ w          volatility  sqrt(w' S w)
+    beta               cov(p, m) / var(m)  correlation S / (sd sd')
+
+Returns windows are cached per (stock set, window, latest price date) and the
+market series per (window, latest price date), so a repeat request for the same
+holdings skips the queries and the pivot, and the first price of a new day
+starts a new key.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from statistics import NormalDist
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlmodel import func, select
+
+from app.core.config import RISK_CACHE_SIZE
+from app.db.database import PriceData, Stock
+
+TRADING_DAYS = 252
+
+
+@dataclass(frozen=True)
+class ReturnsWindow:
+    codes: Tuple[str, ...]  # held stocks with history in the window, R's columns
+    missing: Tuple[str, ...]  # held stocks without enough history
+    dates: Tuple[datetime, ...]
+    returns: np.ndarray  # T x n daily simple returns
+    market: np.ndarray  # T equal-weighted market returns
+    covariance: np.ndarray  # n x n
+
+    @property
+    def as_of(self) -> Optional[datetime]:
+        return self.dates[-1] if self.dates else None
+
+
+class WindowCache:
+    """Small thread-safe LRU of returns windows (and market series) by key."""
+
+    def __init__(self, maxsize: int = RISK_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Built outside the lock: two concurrent misses both build, the last one is kept
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+risk_cache = WindowCache()
+
+
+def window_dates_statement(window: int):
+    """The last window + 1 trading dates (window returns need one extra close), newest first."""
+    return select(PriceData.date).group_by(PriceData.date).order_by(PriceData.date.desc()).limit(window + 1)  # type: ignore[attr-defined]
+
+
+def closes_statement(codes: Sequence[str], since: datetime):
+    """(date, code, close) of `codes` since a date, read through the (stock_id, date) index."""
+    return (
+        select(PriceData.date, Stock.code, PriceData.close)
+        .join(Stock, Stock.id == PriceData.stock_id)
+        .where(Stock.code.in_(list(codes)), PriceData.date >= since)  # type: ignore[attr-defined]
+    )
+
+
+def market_returns_statement(since: datetime):
+    """(date, mean daily return across all stocks): the market aggregate, computed in the database."""
+    previous = func.lag(PriceData.close).over(partition_by=PriceData.stock_id, order_by=PriceData.date)
+    daily = select(PriceData.date.label("date"), (PriceData.close / previous - 1).label("ret")).where(PriceData.date >= since).subquery()
+    return select(daily.c.date, func.avg(daily.c.ret)).where(daily.c.ret.is_not(None)).group_by(daily.c.date)
+
+
+def build_window(
+    rows: Sequence[Tuple[datetime, str, float]], codes: Sequence[str], market: Dict[datetime, float]
+) -> ReturnsWindow:
+    """Scatter (date, code, close) rows into a dates x codes matrix, then returns aligned with the market."""
+    if not rows:
+        return ReturnsWindow((), tuple(codes), (), np.empty((0, 0)), np.empty(0), np.empty((0, 0)))
+    dates, date_index = np.unique(np.array([row[0] for row in rows], dtype=object), return_inverse=True)
+    columns = {code: i for i, code in enumerate(codes)}
+    closes = np.full((len(dates), len(codes)), np.nan)
+    closes[date_index, [columns[row[1]] for row in rows]] = [row[2] for row in rows]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = closes[1:] / closes[:-1] - 1
+    market_returns = np.array([market.get(date, np.nan) for date in dates[1:]], dtype=float)
+
+    # A held stock needs most of the window; the rest is dropped and reported
+    keep = np.isfinite(returns).sum(axis=0) >= max(2, len(returns) // 2)
+    held = [code for code, kept in zip(codes, keep) if kept]
+    returns = returns[:, keep]
+    complete = np.isfinite(returns).all(axis=1) & np.isfinite(market_returns)
+    returns, market_returns = returns[complete], market_returns[complete]
+    if len(returns) > 1:
+        covariance = np.cov(returns, rowvar=False, ddof=1).reshape(len(held), len(held))
+    else:
+        covariance = np.zeros((len(held), len(held)))
+    return ReturnsWindow(
+        codes=tuple(held),
+        missing=tuple(code for code in codes if code not in held),
+        dates=tuple(dates[1:][complete]),
+        returns=returns,
+        market=market_returns,
+        covariance=covariance,
+    )
+
+
+def returns_window(session, codes: Sequence[str], window: int) -> Optional[ReturnsWindow]:
+    """Cached returns window of `codes` over the last `window` trading days (None without prices)."""
+    dates = session.exec(window_dates_statement(window)).all()
+    if len(dates) < 3:
+        return None
+    as_of, since = dates[0], dates[-1]
+    # Shared by every portfolio for the day
+    market = risk_cache.get_or_build(
+        ("market", window, as_of), lambda: dict(session.exec(market_returns_statement(since)).all())
+    )
+    key = (tuple(sorted(set(codes))), window, as_of)
+    return risk_cache.get_or_build(key, lambda: build_window(session.exec(closes_statement(key[0], since)).all(), key[0], market))
+
+
+def _tail(p: np.ndarray, confidence: float) -> Tuple[float, float]:
+    """Historical (VaR, CVaR) of returns p as positive loss fractions."""
+    cutoff = np.quantile(p, 1 - confidence)
+    return float(-cutoff), float(-p[p <= cutoff].mean())
+
+
+def _gaussian_tail(mu: float, sigma: float, confidence: float) -> Tuple[float, float]:
+    """Parametric (VaR, CVaR) for normal returns N(mu, sigma^2)."""
+    normal = NormalDist()
+    z = normal.inv_cdf(1 - confidence)
+    return -(mu + z * sigma), -(mu - sigma * normal.pdf(z) / (1 - confidence))
+
+
+def portfolio_risk(window: ReturnsWindow, values: Dict[str, float], confidence: float = 0.95) -> Dict:
+    """Risk of a portfolio holding `values` (code -> market value) over a returns window."""
+    codes = [code for code in window.codes if values.get(code, 0) > 0]
+    excluded = sorted(set(values) - set(codes))
+    index = [window.codes.index(code) for code in codes]
+    exposure = np.array([values[code] for code in codes], dtype=float)
+    market_value = float(exposure.sum())
+    if not codes or len(window.returns) < 2:
+        return {"as_of": window.as_of, "observations": len(window.returns), "market_value": market_value, "excluded": excluded, "stocks": []}
+
+    w = exposure / market_value
+    R = window.returns[:, index]
+    S = window.covariance[np.ix_(index, index)]
+    m = window.market
+    p = R @ w
+
+    variance = float(w @ S @ w)
+    sigma = math.sqrt(max(variance, 0.0))
+    mu = float(p.mean())
+    hist_var, hist_cvar = _tail(p, confidence)
+    param_var, param_cvar = _gaussian_tail(mu, sigma, confidence)
+
+    market_var = float(m.var(ddof=1))
+    centered_m = m - m.mean()
+    # Betas of every stock at once, and of the portfolio
+    stock_beta = (R - R.mean(axis=0)).T @ centered_m / (len(m) - 1) / market_var if market_var else np.zeros(len(codes))
+    beta = float(w @ stock_beta)
+    sd = np.sqrt(np.diag(S))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = np.nan_to_num(S / np.outer(sd, sd))
+        contribution = w * (S @ w) / variance if variance else np.zeros(len(codes))
+    np.fill_diagonal(correlation, 1.0)
+
+    def amounts(pct: float) -> Dict:
+        return {"pct": pct * 100, "amount": pct * market_value}
+
+    return {
+        "as_of": window.as_of,
+        "observations": len(p),
+        "confidence": confidence,
+        "market_value": market_value,
+        "volatility": {"daily_pct": sigma * 100, "annualized_pct": sigma * math.sqrt(TRADING_DAYS) * 100},
+        "var": {"historical": amounts(hist_var), "parametric": amounts(param_var)},
+        "cvar": {"historical": amounts(hist_cvar), "parametric": amounts(param_cvar)},
+        "beta": beta,
+        "stocks": [
+            {
+                "stock_code": code,
+                "weight": float(w[i]),
+                "volatility_annualized_pct": float(sd[i] * math.sqrt(TRADING_DAYS) * 100),
+                "beta": float(stock_beta[i]),
+                "risk_contribution_pct": float(contribution[i] * 100),
+            }
+            for i, code in enumerate(codes)
+        ],
+        "correlation": {"codes": codes, "matrix": correlation.round(4).tolist()},
+        "excluded": excluded,
+    }
+
+
+def position_values(positions: List[Dict]) -> Dict[str, float]:
+    """code -> market value from value_positions items, lots of the same stock summed."""
+    values: Dict[str, float] = {}
+    for position in positions:
+        if position["current_value"]:
+            values[position["stock_code"]] = values.get(position["stock_code"], 0.0) + position["current_value"]
+    return values
@@ -0,0 +1,147 @@
+"""
+Portfolio valuation against one latest-price snapshot.
+
+All held codes are resolved in a single query (latest_prices_statement filtered
+to those codes, two rows per stock for the day change), then market value, cost
+basis, unrealized P&L, weights and day change are computed as NumPy arrays over
+the positions. value_portfolios does the same for every user at once and sums
+per user with bincount, for leaderboards.
+
+Positions whose stock has no price are reported without a current price and
+counted at cost in the totals.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.db.database import Holding
+from app.db.queries import group_latest_prices, latest_prices_statement
+
+
+@dataclass(frozen=True)
+class PriceQuote:
+    close: float
+    previous_close: Optional[float]
+    date: object
+
+
+def snapshot_statement(codes: Iterable[str]):
+    """Latest and previous close of each code, one round trip."""
+    return latest_prices_statement(depth=2, codes=sorted(set(codes)))
+
+
+def price_snapshot(rows) -> Dict[str, PriceQuote]:
+    """code -> PriceQuote from snapshot_statement rows (stocks without prices left out)."""
+    snapshot = {}
+    for stock, prices in group_latest_prices(rows):
+        if prices:
+            previous = prices[1].close if len(prices) > 1 else None
+            snapshot[stock.code] = PriceQuote(prices[0].close, previous, prices[0].date)
+    return snapshot
+
+
+def _arrays(positions: Sequence[Holding], snapshot: Dict[str, PriceQuote]) -> Tuple[np.ndarray, ...]:
+    quotes = [snapshot.get(position.stock_code) for position in positions]
+    quantity = np.fromiter((p.quantity for p in positions), dtype=float, count=len(positions))
+    cost = np.fromiter((p.avg_buy_price for p in positions), dtype=float, count=len(positions))
+    close = np.array([q.close if q else np.nan for q in quotes], dtype=float)
+    previous = np.array([q.previous_close if q and q.previous_close is not None else np.nan for q in quotes], dtype=float)
+    return quantity, cost, close, previous
+
+
+def _num(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+def value_positions(
+    positions: Sequence[Holding], snapshot: Dict[str, PriceQuote], lot_ids: Optional[Dict[str, int]] = None
+) -> Dict:
+    """
+    Per-position valuation and portfolio totals for one user's positions.
+    An item's id is the oldest open lot of its stock (code -> id in lot_ids, the
+    Portfolio id the positions have always been reported under); holding_id is
+    the Holding row.
+    """
+    quantity, cost, close, previous = _arrays(positions, snapshot)
+    priced = ~np.isnan(close)
+    cost_basis = quantity * cost
+    # Unpriced positions count at cost: no P&L, no day change
+    value = quantity * np.where(priced, close, cost)
+    pnl = value - cost_basis
+    day_change = np.nan_to_num(quantity * (close - previous))
+
+    total_value = value.sum()
+    total_cost = cost_basis.sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = value / total_value if total_value else np.zeros_like(value)
+        pnl_pct = np.where(cost_basis > 0, pnl / cost_basis * 100, np.nan)
+        day_change_pct = (close - previous) / previous * 100
+
+    items = [
+        {
+            "id": (lot_ids or {}).get(position.stock_code),
+            "holding_id": position.id,
+            "user_id": position.user_id,
+            "stock_code": position.stock_code,
+            "quantity": position.quantity,
+            "avg_buy_price": position.avg_buy_price,
+            "created_at": position.created_at,
+            "current_price": _num(close[i]),
+            "current_value": _num(quantity[i] * close[i]),
+            "cost_basis": float(cost_basis[i]),
+            "unrealized_pnl": float(pnl[i]) if priced[i] else None,
+            "unrealized_pnl_pct": _num(pnl_pct[i]) if priced[i] else None,
+            "weight": float(weight[i]),
+            "day_change": _num(quantity[i] * (close[i] - previous[i])),
+            "day_change_pct": _num(day_change_pct[i]),
+        }
+        for i, position in enumerate(positions)
+    ]
+    previous_value = total_value - day_change.sum()
+    summary = {
+        "market_value": float(total_value),
+        "cost_basis": float(total_cost),
+        "unrealized_pnl": float(total_value - total_cost),
+        "unrealized_pnl_pct": float((total_value - total_cost) / total_cost * 100) if total_cost else 0.0,
+        "day_change": float(day_change.sum()),
+        "day_change_pct": float(day_change.sum() / previous_value * 100) if previous_value else 0.0,
+        "positions": len(positions),
+        "unpriced": int((~priced).sum()),
+        "as_of": max((snapshot[p.stock_code].date for p in positions if p.stock_code in snapshot), default=None),
+    }
+    return {"summary": summary, "positions": items}
+
+
+def value_portfolios(positions: Sequence[Holding], snapshot: Dict[str, PriceQuote]) -> List[Dict]:
+    """Totals per user for positions of many users, in one vectorized pass."""
+    if not positions:
+        return []
+    quantity, cost, close, previous = _arrays(positions, snapshot)
+    users, owner = np.unique(np.array([p.user_id for p in positions], dtype=object), return_inverse=True)
+    cost_basis = quantity * cost
+    value = quantity * np.where(np.isnan(close), cost, close)
+    day_change = np.nan_to_num(quantity * (close - previous))
+
+    per_user_value = np.bincount(owner, weights=value, minlength=len(users))
+    per_user_cost = np.bincount(owner, weights=cost_basis, minlength=len(users))
+    per_user_day = np.bincount(owner, weights=day_change, minlength=len(users))
+    per_user_positions = np.bincount(owner, minlength=len(users))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return_pct = np.where(per_user_cost > 0, (per_user_value - per_user_cost) / per_user_cost * 100, 0.0)
+    return [
+        {
+            "user_id": users[i],
+            "market_value": float(per_user_value[i]),
+            "cost_basis": float(per_user_cost[i]),
+            "unrealized_pnl": float(per_user_value[i] - per_user_cost[i]),
+            "return_pct": float(return_pct[i]),
+            "day_change": float(per_user_day[i]),
+            "positions": int(per_user_positions[i]),
+        }
+        for i in np.argsort(-return_pct, kind="stable")
+    ]
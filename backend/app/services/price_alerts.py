@@ -0,0 +1,175 @@
+"""
+Per-user price-target alerts ("notify me when SFBT goes above 12.5").
+Active rules are indexed per stock in two heaps: "above" rules in a min-heap
+on target, "below" rules in a max-heap, so the rules a price triggers are
+always at the top. A tick pops them, O((k + 1) log n) for the k rules it fires,
+however many rules a stock has; adding a rule is O(log n). Removal is lazy:
+the entry is dropped when it reaches the top, and a heap is rebuilt once most
+of its entries are removed ones.
+Stock codes are matched upper-case, on rules and on ticks.
+Rules fire once: they are deactivated in price_alert_rule and an Alert for
+their owner goes through the alert pipeline.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.db.database import PriceAlertRule, session_scope
+from app.services.alert_pipeline import alert_pipeline, price_target_event
+
+logger = logging.getLogger("kanz.price_alerts")
+
+DIRECTIONS = ("above", "below")
+
+
+@dataclass(frozen=True)
+class PriceTarget:
+    id: int
+    user_id: str
+    stock_code: str
+    direction: str
+    target: float
+
+
+@dataclass
+class _StockTargets:
+    # above: (target, rule id) min-heap; below: (-target, rule id), so also a min-heap
+    above: List[Tuple[float, int]] = field(default_factory=list)
+    below: List[Tuple[float, int]] = field(default_factory=list)
+    # Heap entries of rules still active; anything else in a heap was removed
+    live: Set[Tuple[float, int]] = field(default_factory=set)
+
+    @staticmethod
+    def _entry(rule: PriceTarget) -> Tuple[float, int]:
+        return (rule.target, rule.id) if rule.direction == "above" else (-rule.target, rule.id)
+
+    def add(self, rule: PriceTarget) -> None:
+        entry = self._entry(rule)
+        self.live.add(entry)
+        heapq.heappush(self.above if rule.direction == "above" else self.below, entry)
+
+    def remove(self, rule: PriceTarget) -> None:
+        self.live.discard(self._entry(rule))
+        # Rebuild once removed entries outnumber active ones (small books are left alone)
+        if len(self.above) + len(self.below) > 2 * len(self.live) + 64:
+            self.above = [entry for entry in self.above if entry in self.live]
+            self.below = [entry for entry in self.below if entry in self.live]
+            heapq.heapify(self.above)
+            heapq.heapify(self.below)
+
+    def _pop_while(self, heap: List[Tuple[float, int]], bound: float) -> List[int]:
+        fired = []
+        while heap and heap[0][0] <= bound:
+            entry = heapq.heappop(heap)
+            if entry in self.live:
+                self.live.remove(entry)
+                fired.append(entry[1])
+        return fired
+
+    def pop_triggered(self, price: float) -> List[int]:
+        # above: every target <= price; below: every target >= price
+        return self._pop_while(self.above, price) + self._pop_while(self.below, -price)
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+
+def _persist_fired(fired: List[PriceTarget], price: float) -> None:
+    """Deactivate fired rules and raise one PRICE_TARGET alert per rule owner."""
+    with session_scope() as session:
+        session.execute(
+            update(PriceAlertRule)
+            .where(PriceAlertRule.id.in_([rule.id for rule in fired]))  # type: ignore[union-attr]
+            .values(is_active=False, triggered_at=datetime.utcnow(), triggered_price=price)
+        )
+        session.commit()
+    alert_pipeline.submit(
+        price_target_event(rule.stock_code, rule.target, price, rule.direction, user_id=rule.user_id) for rule in fired
+    )
+
+
+class PriceAlertEngine:
+    def __init__(self, on_fire: Callable[[List[PriceTarget], float], None] = _persist_fired):
+        self.on_fire = on_fire
+        self._books: Dict[str, _StockTargets] = {}
+        self._rules: Dict[int, PriceTarget] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.ticks = 0
+        self.fired = 0
+
+    def add(self, rule: PriceTarget) -> None:
+        if rule.direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}, got {rule.direction!r}")
+        with self._lock:
+            if rule.id in self._rules:
+                return
+            self._rules[rule.id] = rule
+            self._books.setdefault(rule.stock_code.upper(), _StockTargets()).add(rule)
+
+    def add_many(self, rules: Iterable[PriceTarget]) -> None:
+        for rule in rules:
+            self.add(rule)
+
+    def remove(self, rule_id: int) -> bool:
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            self._books[rule.stock_code.upper()].remove(rule)
+            return True
+
+    def evaluate(self, stock_code: str, price: float) -> List[PriceTarget]:
+        """Pop and return the rules a price for stock_code triggers (no side effects beyond that)."""
+        with self._lock:
+            self.ticks += 1
+            book = self._books.get(stock_code.upper())
+            if not book:
+                return []
+            fired = [self._rules.pop(rule_id) for rule_id in book.pop_triggered(price)]
+            self.fired += len(fired)
+            return fired
+
+    def on_tick(self, stock_code: str, price: Optional[float]) -> List[PriceTarget]:
+        """MarketDataService tick listener: evaluate, then persist and notify what fired."""
+        if price is None:
+            return []
+        fired = self.evaluate(stock_code, price)
+        if fired:
+            try:
+                self.on_fire(fired, price)
+            except Exception as e:
+                logger.error(f"Price target persistence failed for {stock_code} ({len(fired)} rules): {e}")
+        return fired
+
+    def load(self) -> int:
+        """Index every active rule from price_alert_rule (once, at startup)."""
+        with session_scope() as session:
+            rows = session.exec(select(PriceAlertRule).where(PriceAlertRule.is_active == True)).all()  # noqa: E712
+            self.add_many(
+                PriceTarget(row.id, row.user_id, row.stock_code, row.direction, row.target_price) for row in rows
+            )
+        self._loaded = True
+        return len(rows)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "active_rules": len(self._rules),
+                "stocks": sum(1 for book in self._books.values() if book),
+                "ticks": self.ticks,
+                "fired": self.fired,
+            }
+
+
+price_alert_engine = PriceAlertEngine()
@@ -2,11 +2,62 @@
 
 from __future__ import annotations
 
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
 
 import numpy as np
 
+from app.core.config import (
+    SENTIMENT_BATCH_SIZE,
+    SENTIMENT_LOAD_MODEL,
+    SENTIMENT_MODEL,
+    SENTIMENT_QUANTIZE,
+    SENTIMENT_THREADS,
+    SENTIMENT_WORKERS,
+)
+
+_nlp_analyzer = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp_analyzer():
+    """Shared NLP analyzer configured from the environment, backed by the result cache.
+
+    With SENTIMENT_WORKERS > 0 the model is loaded once per worker process and
+    scoring is dispatched to the pool instead of running in the caller's thread.
+    Raises ImportError when the nlp package is not on the path.
+    """
+    global _nlp_analyzer
+    with _nlp_lock:
+        if _nlp_analyzer is None:
+            from sentiment.analyzer import SentimentAnalyzer
+            from sentiment.cache import get_sentiment_cache
+            model_kwargs = dict(
+                model_name=SENTIMENT_MODEL,
+                load_model=SENTIMENT_LOAD_MODEL,
+                batch_size=SENTIMENT_BATCH_SIZE,
+                num_threads=SENTIMENT_THREADS,
+                quantize=SENTIMENT_QUANTIZE,
+            )
+            if SENTIMENT_WORKERS > 0:
+                from sentiment.workers import SentimentWorkerPool
+                pool = SentimentWorkerPool(processes=SENTIMENT_WORKERS, **model_kwargs)
+                _nlp_analyzer = SentimentAnalyzer(
+                    SENTIMENT_MODEL, cache=get_sentiment_cache(), workers=pool
+                )
+            else:
+                _nlp_analyzer = SentimentAnalyzer(cache=get_sentiment_cache(), **model_kwargs)
+        return _nlp_analyzer
+
+
+def shutdown_nlp_analyzer() -> None:
+    global _nlp_analyzer
+    with _nlp_lock:
+        if _nlp_analyzer is not None and _nlp_analyzer.workers is not None:
+            _nlp_analyzer.workers.shutdown()
+        _nlp_analyzer = None
+
 
 class SentimentService:
     def __init__(self):
@@ -0,0 +1,216 @@
+"""
+Trade ledger and FIFO lot accounting.
+
+Every buy and sell is appended to `trade` and never updated. A buy opens a lot
+(a Portfolio row); a sell consumes the user's lots of that stock oldest first,
+as many as its quantity spans, and records the realized P&L against their buy
+prices. Each (user, stock) has one Holding row carrying the open quantity, cost
+basis, average buy price and realized P&L, updated in the same transaction, so
+reading positions is one indexed lookup however many trades a user has made.
+
+The Holding row is locked (SELECT ... FOR UPDATE on PostgreSQL) before its lots
+are read, which serializes concurrent trades of the same stock by the same user.
+SQLite has no row locks and ignores FOR UPDATE, so there a trade opens its
+transaction with BEGIN IMMEDIATE: it holds the database write lock before it
+reads the holding, and concurrent trades (from any process) wait their turn.
+A first buy creates the row with INSERT ... ON CONFLICT DO NOTHING before locking
+it, so two concurrent first buys both land on the same row instead of one of
+them failing on the (user_id, stock_code) unique constraint.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, func, select
+
+from app.db.database import Holding, Portfolio, Trade
+
+
+class PositionNotFound(LookupError):
+    pass
+
+
+class InsufficientQuantity(ValueError):
+    pass
+
+
+def _begin_trade(session: Session) -> None:
+    """On SQLite, take the write lock now rather than at the first write (see module docstring)."""
+    connection = session.connection()
+    if connection.dialect.name == "sqlite" and not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _holding(session: Session, user_id: str, stock_code: str) -> Optional[Holding]:
+    return session.exec(
+        select(Holding).where(Holding.user_id == user_id, Holding.stock_code == stock_code).with_for_update()
+    ).first()
+
+
+def _holding_for_trade(session: Session, user_id: str, stock_code: str, created_at: datetime) -> Holding:
+    """The (user, stock) holding, created empty if missing, then locked like _holding."""
+    insert = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}[session.get_bind().dialect.name]
+    session.connection().execute(
+        insert(Holding)
+        .values(
+            user_id=user_id, stock_code=stock_code, quantity=0, cost_basis=0.0, avg_buy_price=0.0,
+            realized_pnl=0.0, created_at=created_at, updated_at=created_at,
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "stock_code"])
+    )
+    return _holding(session, user_id, stock_code)
+
+
+def _apply(holding: Holding, trade: Trade, quantity: int, cost: float, realized: float = 0.0) -> None:
+    """Move the aggregate by `quantity` shares costing `cost` (negative for sells)."""
+    holding.quantity += quantity
+    # Rounding residue of a fully closed position is not a cost
+    holding.cost_basis = holding.cost_basis + cost if holding.quantity else 0.0
+    holding.avg_buy_price = holding.cost_basis / holding.quantity if holding.quantity else 0.0
+    holding.realized_pnl += realized
+    holding.last_trade_id = trade.id
+    holding.updated_at = trade.executed_at
+
+
+def record_buy(session: Session, user_id: str, stock_code: str, quantity: int, price: float) -> Tuple[Trade, Portfolio]:
+    """Append a buy, open its lot and update the holding; one commit."""
+    _begin_trade(session)
+    executed_at = datetime.utcnow()
+    holding = _holding_for_trade(session, user_id, stock_code, executed_at)
+    trade = Trade(user_id=user_id, stock_code=stock_code, side="buy", quantity=quantity, price=price, executed_at=executed_at)
+    session.add(trade)
+    session.flush()
+    lot = Portfolio(
+        user_id=user_id, stock_code=stock_code, quantity=quantity, avg_buy_price=price,
+        created_at=trade.executed_at, trade_id=trade.id,
+    )
+    _apply(holding, trade, quantity, quantity * price)
+    session.add_all([lot, holding])
+    session.commit()
+    session.refresh(trade)
+    session.refresh(lot)
+    return trade, lot
+
+
+def record_sell(session: Session, user_id: str, stock_code: str, quantity: int, price: float) -> Tuple[Trade, Holding]:
+    """
+    Append a sell, consume lots oldest first and update the holding; one commit.
+    Raises PositionNotFound or InsufficientQuantity before anything is written.
+    """
+    _begin_trade(session)
+    holding = _holding(session, user_id, stock_code)
+    if holding is None or holding.quantity == 0:
+        # Release the lock taken above rather than hold it until the caller closes the session
+        session.rollback()
+        raise PositionNotFound(stock_code)
+    if holding.quantity < quantity:
+        held = holding.quantity
+        session.rollback()
+        raise InsufficientQuantity(f"Insufficient quantity: {held} held, {quantity} requested")
+
+    lots = session.exec(
+        select(Portfolio)
+        .where(Portfolio.user_id == user_id, Portfolio.stock_code == stock_code)
+        .order_by(Portfolio.id)
+        .with_for_update()
+    )
+    remaining, cost = quantity, 0.0
+    for lot in lots:
+        used = min(lot.quantity, remaining)
+        cost += used * lot.avg_buy_price
+        remaining -= used
+        lot.quantity -= used
+        if lot.quantity == 0:
+            session.delete(lot)
+        else:
+            session.add(lot)
+        if remaining == 0:
+            break
+    if remaining:
+        # The holding and the lots disagree; refuse rather than sell shares that are not there
+        session.rollback()
+        raise InsufficientQuantity(f"Insufficient quantity in open lots: {quantity - remaining} of {quantity}")
+
+    realized = quantity * price - cost
+    trade = Trade(
+        user_id=user_id, stock_code=stock_code, side="sell", quantity=quantity, price=price,
+        realized_pnl=realized, executed_at=datetime.utcnow(),
+    )
+    session.add(trade)
+    session.flush()
+    _apply(holding, trade, -quantity, -cost, realized)
+    session.add(holding)
+    session.commit()
+    session.refresh(trade)
+    session.refresh(holding)
+    return trade, holding
+
+
+def trades_page(session: Session, user_id: str, limit: int = 50, before: Optional[int] = None) -> List[Trade]:
+    """A user's trades newest first, keyset-paginated on id."""
+    query = select(Trade).where(Trade.user_id == user_id)
+    if before is not None:
+        query = query.where(Trade.id < before)
+    return session.exec(query.order_by(Trade.id.desc()).limit(limit)).all()  # type: ignore[attr-defined]
+
+
+def last_trade_id(session: Session, user_id: str) -> Optional[int]:
+    """Newest trade of the user, an index-only lookup; changes with every buy and sell."""
+    return session.exec(select(func.max(Trade.id)).where(Trade.user_id == user_id)).one()
+
+
+def first_lot_statement(user_id: str):
+    """(stock_code, id of the oldest open lot) per stock, from the (user_id, stock_code, id) index."""
+    return (
+        select(Portfolio.stock_code, func.min(Portfolio.id))
+        .where(Portfolio.user_id == user_id)
+        .group_by(Portfolio.stock_code)
+    )
+
+
+def backfill_ledger(session: Session) -> int:
+    """
+    Record lots written before the ledger existed as buys and rebuild the
+    holdings they belong to. Returns the number of lots recorded (0 once done).
+    """
+    lots = session.exec(select(Portfolio).where(Portfolio.trade_id == None).order_by(Portfolio.id)).all()  # noqa: E711
+    if not lots:
+        return 0
+    for lot in lots:
+        trade = Trade(
+            user_id=lot.user_id, stock_code=lot.stock_code, side="buy", quantity=lot.quantity,
+            price=lot.avg_buy_price, executed_at=lot.created_at,
+        )
+        session.add(trade)
+        session.flush()
+        lot.trade_id = trade.id
+        session.add(lot)
+
+    pairs = {(lot.user_id, lot.stock_code) for lot in lots}
+    totals: Dict[Tuple[str, str], Tuple[int, float, datetime, int]] = {
+        (user_id, code): (quantity, cost, first, last)
+        for user_id, code, quantity, cost, first, last in session.exec(
+            select(
+                Portfolio.user_id, Portfolio.stock_code, func.sum(Portfolio.quantity),
+                func.sum(Portfolio.quantity * Portfolio.avg_buy_price), func.min(Portfolio.created_at),
+                func.max(Portfolio.trade_id),
+            )
+            .where(Portfolio.user_id.in_({user_id for user_id, _ in pairs}))  # type: ignore[attr-defined]
+            .group_by(Portfolio.user_id, Portfolio.stock_code)
+        ).all()
+        if (user_id, code) in pairs
+    }
+    for (user_id, code), (quantity, cost, first, last) in totals.items():
+        holding = _holding(session, user_id, code) or Holding(user_id=user_id, stock_code=code, created_at=first)
+        holding.quantity = quantity
+        holding.cost_basis = cost
+        holding.avg_buy_price = cost / quantity if quantity else 0.0
+        holding.last_trade_id = last
+        holding.updated_at = datetime.utcnow()
+        session.add(holding)
+    session.commit()
+    return len(lots)
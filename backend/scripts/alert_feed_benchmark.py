@@ -0,0 +1,123 @@
+"""
+Alert feed polling cost as the Alert table grows: unread count and feed pages,
+the old way (load unread rows and len(), ORDER BY ... OFFSET) vs the per-user
+COUNT(*) and keyset pagination in app/services/alert_feed.py.
+
+Fills a temporary SQLite file with --alerts alerts over the last 30 days, mostly
+market-wide plus some addressed to --users users, marks a few read for the
+polling user, then times each query (median of --repeat runs).
+
+    python scripts/alert_feed_benchmark.py --alerts 1000000 --users 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, SQLModel, or_, select  # noqa: E402
+
+from app.db.database import Alert, create_db_engine  # noqa: E402
+from app.services import alert_feed  # noqa: E402
+
+USER = "user-0000"
+PAGE = 50
+
+
+def _fill(engine, alerts: int, users: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        for start in range(0, alerts, 50_000):
+            connection.execute(
+                insert(Alert),
+                [
+                    {
+                        "stock_code": f"BM{rng.randrange(80):03d}",
+                        "alert_type": "VOLUME_SPIKE",
+                        "message": "Synthetic alert",
+                        "severity": "MEDIUM",
+                        "timestamp": now - timedelta(seconds=rng.uniform(0, 30 * 86400)),
+                        "is_read": False,
+                        "user_id": f"user-{rng.randrange(users):04d}" if rng.random() < 0.05 else None,
+                    }
+                    for _ in range(min(50_000, alerts - start))
+                ],
+            )
+
+
+def _median_ms(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _visible():
+    return or_(Alert.user_id == None, Alert.user_id == USER)  # noqa: E711
+
+
+def main(alerts: int, users: int, repeat: int, depth: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="kanz-alert-feed-") as workdir:
+        engine = create_db_engine(f"sqlite:///{Path(workdir) / 'alerts.db'}")
+        SQLModel.metadata.create_all(engine)
+        started = time.perf_counter()
+        _fill(engine, alerts, users, seed)
+        print(f"{alerts} alerts for {users} users inserted in {time.perf_counter() - started:.1f}s")
+
+        with Session(engine) as session:
+            first, _ = alert_feed.feed(session, USER, PAGE)
+            for item in first[:10]:
+                alert_feed.mark_read(session, USER, item["id"])
+
+            def old_unread():
+                return len(session.exec(select(Alert).where(Alert.is_read == False, _visible())).all())  # noqa: E712
+
+            def old_page(page: int):
+                query = select(Alert).where(_visible()).order_by(Alert.timestamp.desc())
+                return session.exec(query.offset(page * PAGE).limit(PAGE)).all()
+
+            # Cursor of page `depth`, walked once up front
+            cursor = None
+            for _ in range(depth):
+                _, next_cursor = alert_feed.feed(session, USER, PAGE, cursor)
+                cursor = alert_feed.decode_cursor(next_cursor)
+
+            rows = [
+                ("unread count", _median_ms(old_unread, repeat),
+                 _median_ms(lambda: alert_feed.unread_count(session, USER), repeat)),
+                ("feed page 1", _median_ms(lambda: old_page(0), repeat),
+                 _median_ms(lambda: alert_feed.feed(session, USER, PAGE), repeat)),
+                (f"feed page {depth + 1}", _median_ms(lambda: old_page(depth), repeat),
+                 _median_ms(lambda: alert_feed.feed(session, USER, PAGE, cursor), repeat)),
+            ]
+            print(f"unread for {USER}: {alert_feed.unread_count(session, USER)}")
+        engine.dispose()
+
+    print(f"\n{'query':<16} {'old ms':>10} {'new ms':>10} {'speedup':>8}")
+    for label, old, new in rows:
+        print(f"{label:<16} {old:10.2f} {new:10.2f} {old / new:7.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert unread count and feed pagination vs table size")
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=200, help="Feed page to time besides the first")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.alerts, args.users, args.repeat, args.depth, args.seed)
@@ -0,0 +1,139 @@
+"""
+Alert pipeline throughput: events/sec through dedupe, rate limiting, the batched
+Alert insert and the WebSocket push.
+
+Producer threads submit synthetic anomaly / sentiment / price-target events for
+--stocks stocks into a pipeline writing to a temporary SQLite file, either as fast
+as they can (throughput) or paced at --rate events/sec (latency under steady load).
+Two passes: "raw" (rate limit and dedupe off, every event becomes an Alert row)
+and "limited" (the configured ALERT_RATE_LIMIT / ALERT_DEDUPE_TTL). Reports
+submitted and processed events/sec, rows inserted, suppressed counts and the
+submit -> push latency.
+
+    python scripts/alert_pipeline_benchmark.py --events 200000 --producers 4
+    python scripts/alert_pipeline_benchmark.py --events 50000 --rate 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlmodel import Session, SQLModel, func, select  # noqa: E402
+
+from app.core.config import ALERT_DEDUPE_TTL, ALERT_RATE_LIMIT  # noqa: E402
+from app.db.database import Alert, create_db_engine  # noqa: E402
+from app.services.alert_pipeline import AlertEvent, AlertPipeline, price_target_event  # noqa: E402
+
+TYPES = ["VOLUME_SPIKE", "PRICE_MOVE", "GAP_OPEN", "SENTIMENT_SWING"]
+SEVERITIES = ["LOW", "MEDIUM", "HIGH"]
+
+
+def _event(rng: random.Random, stocks: int, n: int) -> AlertEvent:
+    code = f"BM{rng.randrange(stocks):03d}"
+    if n % 5 == 0:
+        return price_target_event(code, 10.0 + n % 7, 10.5, "above")
+    # Messages repeat often, like a detector re-run on the same bar
+    return AlertEvent(code, rng.choice(TYPES), f"Synthetic event {n % 50}", rng.choice(SEVERITIES), "benchmark")
+
+
+def run_pass(
+    label: str, url: str, events: int, producers: int, stocks: int, rate: float, rate_limit: float, dedupe_ttl: float
+) -> Dict:
+    engine = create_db_engine(url)
+    SQLModel.metadata.create_all(engine)
+    pushed = [0]
+
+    def publish(message: Dict) -> bool:
+        pushed[0] += 1
+        return True
+
+    pipeline = AlertPipeline(
+        session_factory=lambda: Session(engine), publish=publish, rate_limit=rate_limit, dedupe_ttl=dedupe_ttl
+    )
+    pipeline.start()
+    per_producer = events // producers
+
+    # Paced producers submit a chunk every 10 ms; unpaced ones chunks of 100 back to back
+    chunk = max(1, int(rate / producers / 100)) if rate else 100
+
+    def produce(seed: int):
+        rng = random.Random(seed)
+        batch = []
+        began = time.perf_counter()
+        for n in range(per_producer):
+            batch.append(_event(rng, stocks, n))
+            if len(batch) == chunk:
+                pipeline.submit(batch)
+                batch = []
+                if rate:
+                    time.sleep(max(0.0, began + (n + 1) * producers / rate - time.perf_counter()))
+        pipeline.submit(batch)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=produce, args=(seed,)) for seed in range(producers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    submit_seconds = time.perf_counter() - started
+    while pipeline.stats()["processed"] < per_producer * producers:
+        time.sleep(0.01)
+    seconds = time.perf_counter() - started
+    pipeline.stop()
+
+    stats = pipeline.stats()
+    with Session(engine) as session:
+        rows = session.exec(select(func.count()).select_from(Alert)).one()
+    engine.dispose()
+    return {
+        "label": label,
+        "submitted_per_s": stats["submitted"] / submit_seconds,
+        "processed_per_s": stats["processed"] / seconds,
+        "inserted": stats["inserted"],
+        "rows": rows,
+        "pushed": pushed[0],
+        "deduplicated": stats["deduplicated"],
+        "rate_limited": stats["rate_limited"],
+        "batches": stats["batches"],
+        "latency": stats["push_latency_ms"],
+    }
+
+
+def main(events: int, producers: int, stocks: int, rate: float) -> None:
+    pace = f"paced at {rate:.0f} events/s" if rate else "unpaced"
+    print(f"{events} events from {producers} producer threads over {stocks} stocks, {pace}")
+    with tempfile.TemporaryDirectory(prefix="kanz-alerts-") as workdir:
+        for label, rate_limit, dedupe_ttl in (("raw", 0.0, 0.0), ("limited", ALERT_RATE_LIMIT, ALERT_DEDUPE_TTL)):
+            result = run_pass(
+                label, f"sqlite:///{Path(workdir) / f'{label}.db'}", events, producers, stocks, rate, rate_limit, dedupe_ttl
+            )
+            print(
+                f"\n[{label}] submitted {result['submitted_per_s']:.0f} events/s, processed {result['processed_per_s']:.0f} events/s "
+                f"in {result['batches']} batches"
+            )
+            print(
+                f"  inserted {result['inserted']} alerts ({result['rows']} rows), pushed {result['pushed']}, "
+                f"deduplicated {result['deduplicated']}, rate limited {result['rate_limited']}"
+            )
+            latency = result["latency"]
+            print(f"  submit -> push latency p50 {latency['p50']:.1f} ms, p99 {latency['p99']:.1f} ms, max {latency['max']:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert pipeline events/sec")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--producers", type=int, default=4)
+    parser.add_argument("--stocks", type=int, default=80)
+    parser.add_argument("--rate", type=float, default=0, help="Total events/sec to submit (0 = as fast as possible)")
+    args = parser.parse_args()
+    main(args.events, args.producers, args.stocks, args.rate)
@@ -0,0 +1,141 @@
+"""
+Authentication cost per request with DEMO_MODE=false, against the local
+Supabase stand-in (scripts/local_supabase.py) started in-process: the previous
+path (new Supabase client, GET /auth/v1/user, User query) vs local JWT
+verification, cold and with the claims and user caches warm.
+
+Also checks, through the real routes, that sign up and log in go through the
+stand-in, that its tokens are accepted, and that tampered, expired and
+wrong-audience tokens get a 401. --algorithm RS256 exercises the JWKS path.
+
+    python scripts/auth_benchmark.py --users 50 --requests 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import uvicorn  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from local_supabase import anon_key, create_app  # noqa: E402
+
+SECRET = "bench-jwt-secret"
+
+
+def _median_us(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+def _start_stand_in(algorithm: str) -> str:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(SECRET, algorithm), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def main(users: int, requests: int, algorithm: str) -> None:
+    url = _start_stand_in(algorithm)
+    workdir = tempfile.mkdtemp(prefix="kanz-auth-")
+    # Read by app.core.config at import
+    os.environ.update({
+        "DEMO_MODE": "false", "SUPABASE_URL": url, "SUPABASE_KEY": anon_key(SECRET),
+        "JWT_SECRET": SECRET, "JWT_ALGORITHM": algorithm, "DATABASE_URL": f"sqlite:///{workdir}/auth.db",
+    })
+    from fastapi.testclient import TestClient
+    from sqlmodel import Session, select
+    from supabase import create_client
+
+    from app.core.auth import _cached_user, user_cache
+    from app.core.config import SUPABASE_KEY, SUPABASE_URL
+    from app.core.tokens import claims_cache, jwks_keys, verify_token
+    from app.db.database import User, create_db_and_tables, engine
+    from app.main import app
+
+    create_db_and_tables()
+    client = TestClient(app)
+    tokens: List[str] = []
+    for i in range(users):
+        response = client.post("/api/auth/signup", json={"email": f"user{i}@example.com", "password": "secret-pw", "full_name": f"User {i}"})
+        assert response.status_code == 200, response.text
+        tokens.append(response.json()["access_token"])
+    login = client.post("/api/auth/login", json={"email": "user0@example.com", "password": "secret-pw"})
+    checks = {
+        "log in": login.status_code == 200,
+        "wrong password": client.post("/api/auth/login", json={"email": "user0@example.com", "password": "nope"}).status_code == 401,
+        "me": client.get("/api/auth/me", headers={"Authorization": f"Bearer {login.json().get('access_token')}"}).json().get("email") == "user0@example.com",
+    }
+    claims = jwt.get_unverified_claims(tokens[0])
+    forged = {
+        "tampered": tokens[0][:-4] + ("AAAA" if not tokens[0].endswith("AAAA") else "BBBB"),
+        "expired": jwt.encode({**claims, "exp": int(time.time()) - 10}, SECRET, algorithm="HS256"),
+        "wrong audience": jwt.encode({**claims, "aud": "anon"}, SECRET, algorithm="HS256"),
+        "no token": None,
+    }
+    for label, token in forged.items():
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        checks[f"{label} -> 401"] = client.get("/api/auth/me", headers=headers).status_code in (401, 403)
+
+    def previous(token: str):
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        remote = supabase.auth.get_user(token).user
+        with Session(engine) as session:
+            return session.exec(select(User).where(User.supabase_uid == remote.id)).first()
+
+    def local(token: str):
+        with Session(engine) as session:
+            return _cached_user(session, verify_token(token))
+
+    def cold(token: str):
+        claims_cache.clear()
+        user_cache.clear()
+        return local(token)
+
+    counter = iter(range(10**9))
+    rows = [
+        ("Supabase round trip", _median_us(lambda: previous(tokens[next(counter) % users]), max(10, requests // 10))),
+        ("local, cold caches", _median_us(lambda: cold(tokens[next(counter) % users]), requests)),
+        ("local, warm caches", _median_us(lambda: local(tokens[next(counter) % users]), requests)),
+        ("GET /api/auth/me", _median_us(lambda: client.get("/api/auth/me", headers={"Authorization": f"Bearer {tokens[next(counter) % users]}"}), requests)),
+    ]
+    checks["same user"] = previous(tokens[1]).supabase_uid == local(tokens[1]).supabase_uid
+
+    print(f"{users} users, {algorithm}, stand-in at {url}")
+    for label, us in rows:
+        print(f"{label:<22} {us:10.1f} us")
+    if not algorithm.startswith("HS"):
+        print(f"signing keys: {len(jwks_keys._keys)} (fetched once)")
+    print(f"claims cache {claims_cache.stats()}, user cache {user_cache.stats()}")
+    failed = [label for label, ok in checks.items() if not ok]
+    print("[OK] Sign up, log in and token checks pass" if not failed else f"[WARN] Failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local JWT verification vs a Supabase round trip")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--algorithm", default="HS256", choices=["HS256", "RS256"])
+    args = parser.parse_args()
+    main(args.users, args.requests, args.algorithm)
@@ -0,0 +1,163 @@
+"""
+Concurrent read/write benchmark for the database performance profiles.
+
+For each profile (DB_PROFILE=baseline and tuned) a fresh SQLite file is seeded,
+then reader threads run the hot read queries (latest prices of every stock,
+one stock's history, the news list) while writer threads insert news batches
+and price rows in short transactions, like the news scheduler and the API
+workers do. Reports reads/s, writes/s, p50/p99 latency and lock errors.
+
+    python scripts/db_benchmark.py --readers 8 --writers 2 --write-interval 50 --seconds 10
+    python scripts/db_benchmark.py --database-url postgresql://...   # pool settings on a server database
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from app.db.database import DB_PROFILES, News, PriceData, create_db_engine  # noqa: E402
+from app.db.queries import latest_prices_statement  # noqa: E402
+from load_benchmark import percentile, seed  # noqa: E402
+
+NEWS_BATCH = 20
+PRICE_BATCH = 40
+
+
+def _reader(engine, stop: threading.Event, latencies: List[float], errors: List[str], reader_id: int) -> None:
+    queries = [
+        lambda session: session.exec(latest_prices_statement()).all(),
+        lambda session: session.exec(
+            select(PriceData)
+            .where(PriceData.stock_id == reader_id % 40 + 1)
+            .where(PriceData.date >= datetime.now() - timedelta(days=90))
+            .order_by(PriceData.date)  # type: ignore[arg-type]
+        ).all(),
+        lambda session: session.exec(select(News).order_by(News.date.desc()).limit(20)).all(),  # type: ignore[union-attr]
+    ]
+    i = reader_id
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            with Session(engine) as session:
+                queries[i % len(queries)](session)
+            latencies.append((time.perf_counter() - started) * 1000)
+        except OperationalError as e:
+            errors.append(str(e.orig))
+        i += 1
+
+
+def _writer(
+    engine, stop: threading.Event, latencies: List[float], errors: List[str], writer_id: int, interval: float
+) -> None:
+    batch = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        now = datetime.now()
+        try:
+            with Session(engine) as session:
+                if batch % 2:
+                    session.execute(insert(News), [
+                        {
+                            "url": f"https://bench.local/w{writer_id}/{batch}/{n}", "title": f"Write {batch}",
+                            "source": "bench", "stock_code": f"BM{n:03d}", "language": "fr",
+                            "date": now, "created_at": now,
+                        }
+                        for n in range(NEWS_BATCH)
+                    ])
+                else:
+                    session.execute(insert(PriceData), [
+                        {
+                            "stock_id": n % 40 + 1, "date": now + timedelta(minutes=batch), "open": 10.0,
+                            "high": 10.5, "low": 9.5, "close": 10.0, "volume": 100, "transactions": 1, "capital": 1000.0,
+                        }
+                        for n in range(PRICE_BATCH)
+                    ])
+                session.commit()
+            latencies.append((time.perf_counter() - started) * 1000)
+        except OperationalError as e:
+            errors.append(str(e.orig))
+        batch += 1
+        # Paced like the scheduler / API writes, so both profiles see the same write load
+        stop.wait(max(0.0, interval - (time.perf_counter() - started)))
+
+
+def run_profile(url: str, profile: str, readers: int, writers: int, seconds: float, write_interval: float) -> Dict:
+    engine = create_db_engine(url, profile)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        if not session.exec(select(PriceData.id).limit(1)).first():
+            seed(engine)
+
+    stop = threading.Event()
+    read_latencies: List[float] = []
+    write_latencies: List[float] = []
+    read_errors: List[str] = []
+    write_errors: List[str] = []
+    threads = [
+        threading.Thread(target=_reader, args=(engine, stop, read_latencies, read_errors, i)) for i in range(readers)
+    ] + [
+        threading.Thread(target=_writer, args=(engine, stop, write_latencies, write_errors, i, write_interval))
+        for i in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    reads, writes = sorted(read_latencies), sorted(write_latencies)
+    return {
+        "profile": profile,
+        "reads_per_s": len(reads) / seconds,
+        "writes_per_s": len(writes) / seconds,
+        "read_p50": percentile(reads, 50),
+        "read_p99": percentile(reads, 99),
+        "write_p50": percentile(writes, 50),
+        "write_p99": percentile(writes, 99),
+        "errors": len(read_errors) + len(write_errors),
+        "error_sample": (read_errors + write_errors)[:1],
+    }
+
+
+def main(readers: int, writers: int, seconds: float, write_interval: float, database_url: Optional[str]) -> None:
+    print(f"{readers} readers, {writers} writers (one batch every {write_interval * 1000:.0f} ms), {seconds:.0f}s per profile")
+    print(f"{'profile':10} {'reads/s':>9} {'read p50':>10} {'read p99':>10} {'writes/s':>9} {'write p50':>10} {'write p99':>10} {'errors':>7}")
+    with tempfile.TemporaryDirectory(prefix="kanz-dbbench-") as workdir:
+        for profile in DB_PROFILES[::-1]:
+            url = database_url or f"sqlite:///{Path(workdir) / f'{profile}.db'}"
+            result = run_profile(url, profile, readers, writers, seconds, write_interval)
+            print(
+                f"{profile:10} {result['reads_per_s']:>9.0f} {result['read_p50']:>8.1f}ms {result['read_p99']:>8.1f}ms "
+                f"{result['writes_per_s']:>9.0f} {result['write_p50']:>8.1f}ms {result['write_p99']:>8.1f}ms "
+                f"{result['errors']:>7}"
+            )
+            if result["error_sample"]:
+                print(f"           e.g. {result['error_sample'][0]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent read/write throughput per DB_PROFILE")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-interval", type=float, default=50, help="ms between write batches per writer")
+    parser.add_argument("--database-url", help="Run both profiles against this database instead of temporary SQLite files")
+    args = parser.parse_args()
+    main(args.readers, args.writers, args.seconds, args.write_interval / 1000, args.database_url)
@@ -0,0 +1,234 @@
+"""
+Load benchmark for the hot read routes: sync handlers vs the async database engine.
+
+Seeds a throwaway SQLite database with synthetic stocks, prices, news and
+positions, starts the API once with DATABASE_ASYNC=false and once with
+DATABASE_ASYNC=true, and drives each with concurrent clients. Reports p50/p99
+latency and requests/sec per route and overall.
+
+    python scripts/load_benchmark.py --clients 200 --requests 6000
+    python scripts/load_benchmark.py --url http://localhost:8000 --clients 200   # running server
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+ROUTES = [
+    "/api/stocks",
+    "/api/stocks/{code}",
+    "/api/stocks/{code}/history?days=90",
+    "/api/market/overview",
+    "/api/market/top-movers",
+    "/api/news?limit=20",
+    "/api/news/stock/{code}",
+    "/api/portfolio",
+]
+
+
+def seed_database(database_url: str, stocks: int = 40, days: int = 750, news: int = 500) -> None:
+    """Fill an empty database with deterministic synthetic data (no-op if stocks exist)."""
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.db.database import create_db_and_tables, engine, is_data_loaded
+
+    create_db_and_tables()
+    if not is_data_loaded():
+        seed(engine, stocks, days, news)
+
+
+def seed(engine, stocks: int = 40, days: int = 750, news: int = 500) -> None:
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from app.db.database import News, Portfolio, PriceData, Stock
+
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=days)
+    with Session(engine) as session:
+        session.execute(insert(Stock), [
+            {"id": i + 1, "code": f"BM{i:03d}", "name": f"Bench {i}", "groupe": 11} for i in range(stocks)
+        ])
+        prices = []
+        for stock_id in range(1, stocks + 1):
+            close = rng.uniform(5, 150)
+            for day in range(days):
+                close *= 1 + rng.gauss(0, 0.012)
+                prices.append({
+                    "stock_id": stock_id, "date": start + timedelta(days=day),
+                    "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                    "volume": rng.randint(100, 50000), "transactions": rng.randint(1, 200), "capital": close * 1000,
+                })
+        session.execute(insert(PriceData), prices)
+        session.execute(insert(News), [
+            {
+                "url": f"https://bench.local/news/{i}", "title": f"Article {i}", "content": "Lorem ipsum " * 40,
+                "date": datetime.now() - timedelta(hours=i), "source": "bench",
+                "stock_code": f"BM{i % stocks:03d}", "language": "fr", "sentiment_score": rng.uniform(-1, 1),
+                "created_at": datetime.now() - timedelta(hours=i),
+            }
+            for i in range(news)
+        ])
+        session.execute(insert(Portfolio), [
+            {
+                "user_id": "demo-investor-001", "stock_code": f"BM{i:03d}", "quantity": 10 * (i + 1),
+                "avg_buy_price": 20.0, "created_at": datetime.now(),
+            }
+            for i in range(8)
+        ])
+        session.commit()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load(base_url: str, clients: int, total_requests: int, routes: List[str]) -> Dict:
+    errors = 0
+    counter = iter(range(total_requests))
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        listed = (await client.get("/api/stocks")).json()
+        code = listed[len(listed) // 2]["code"] if listed else "SFBT"
+        routes = [route.format(code=code) for route in routes]
+        latencies: Dict[str, List[float]] = {route: [] for route in routes}
+
+        # Warm up connections, caches and lazily created engines
+        for route in routes:
+            await client.get(route)
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                route = routes[i % len(routes)]
+                started = time.perf_counter()
+                try:
+                    response = await client.get(route)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = (time.perf_counter() - started) * 1000
+                if ok:
+                    latencies[route].append(elapsed)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        wall = time.perf_counter() - started
+
+    every = sorted(latency for values in latencies.values() for latency in values)
+    return {
+        "requests": total_requests,
+        "errors": errors,
+        "seconds": wall,
+        "rps": total_requests / wall,
+        "p50": percentile(every, 50),
+        "p99": percentile(every, 99),
+        "routes": {
+            route: (percentile(sorted(values), 50), percentile(sorted(values), 99))
+            for route, values in latencies.items()
+        },
+    }
+
+
+def wait_until_up(base_url: str, process: subprocess.Popen, timeout: float = 120) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("Server did not start in time")
+
+
+def start_server(database_url: str, async_engine: bool, port: int, workdir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "DATABASE_ASYNC": "true" if async_engine else "false",
+        "DEMO_MODE": "true",
+        "ENABLE_NEWS_SCHEDULER": "false",
+        "ENABLE_MARKET_POLLER": "false",
+        "PYTHONPATH": str(BACKEND_DIR),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def print_result(label: str, result: Dict) -> None:
+    print(
+        f"\n[{label}] {result['requests']} requests in {result['seconds']:.2f}s: "
+        f"{result['rps']:.0f} req/s, p50 {result['p50']:.1f} ms, p99 {result['p99']:.1f} ms, "
+        f"{result['errors']} errors"
+    )
+    for route, (p50, p99) in result["routes"].items():
+        print(f"  {route:40} p50 {p50:8.1f} ms   p99 {p99:8.1f} ms")
+
+
+def compare(clients: int, total_requests: int, port: int, database_url: Optional[str], modes: List[str]) -> None:
+    with tempfile.TemporaryDirectory(prefix="kanz-bench-") as workdir:
+        database_url = database_url or f"sqlite:///{Path(workdir) / 'bench.db'}"
+        print(f"Seeding {database_url} ...")
+        seed_database(database_url)
+
+        results = {}
+        for label in modes:
+            async_engine = label == "async"
+            server = start_server(database_url, async_engine, port, workdir)
+            try:
+                wait_until_up(f"http://127.0.0.1:{port}", server)
+                results[label] = asyncio.run(run_load(f"http://127.0.0.1:{port}", clients, total_requests, ROUTES))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            print_result(label, results[label])
+
+    if len(results) < 2:
+        return
+    sync, async_ = results["sync"], results["async"]
+    print(
+        f"\nasync vs sync: {async_['rps'] / sync['rps']:.2f}x req/s, "
+        f"p50 {sync['p50']:.1f} -> {async_['p50']:.1f} ms, p99 {sync['p99']:.1f} -> {async_['p99']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p50/p99 latency and req/s of the hot read routes, sync vs async engine")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=6000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", help="Database to serve (seeded if empty) instead of a temporary SQLite file")
+    parser.add_argument("--modes", default="sync,async", help="Handler modes to run: sync, async or both")
+    parser.add_argument("--url", help="Only load an already running server at this base URL")
+    args = parser.parse_args()
+
+    if args.url:
+        print_result(args.url, asyncio.run(run_load(args.url.rstrip("/"), args.clients, args.requests, ROUTES)))
+    else:
+        modes = [mode.strip() for mode in args.modes.split(",") if mode.strip() in ("sync", "async")]
+        compare(args.clients, args.requests, args.port, args.database_url, modes)
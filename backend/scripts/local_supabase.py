@@ -0,0 +1,143 @@
+"""
+Local stand-in for the Supabase auth API (GoTrue), for running the backend with
+DEMO_MODE=false without a Supabase project.
+
+Implements the endpoints the backend and supabase-py use: sign up, password
+log in, get user, log out and the JWKS document. Users live in memory. Access
+tokens are shaped like Supabase's (sub, email, aud=authenticated, role,
+user_metadata, exp) and signed with --secret (HS256) or, with --algorithm RS256,
+with a key generated at start-up and published at /auth/v1/.well-known/jwks.json.
+
+    python scripts/local_supabase.py --port 54321 --secret local-jwt-secret
+
+then start the backend with the environment it prints.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from jose import jwk, jwt
+
+TOKEN_TTL = 3600
+
+
+def _signing_keys(algorithm: str, secret: str):
+    """(key tokens are signed with, JWKS document)."""
+    if algorithm.startswith("HS"):
+        return secret, {"keys": []}
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public = jwk.construct(pem, algorithm).public_key().to_dict()
+    public.update({"kid": uuid.uuid4().hex[:16], "use": "sig", "alg": algorithm})
+    return pem, {"keys": [public]}
+
+
+def create_app(secret: str = "local-jwt-secret", algorithm: str = "HS256", token_ttl: int = TOKEN_TTL) -> FastAPI:
+    app = FastAPI(title="Local Supabase auth")
+    key, jwks = _signing_keys(algorithm, secret)
+    kid = jwks["keys"][0]["kid"] if jwks["keys"] else None
+    # email -> user, plus the password hash under "_password"
+    users: Dict[str, Dict] = {}
+
+    def public(user: Dict) -> Dict:
+        return {k: v for k, v in user.items() if not k.startswith("_")}
+
+    def issue(user: Dict, expires_in: int = token_ttl) -> Dict:
+        now = int(time.time())
+        claims = {
+            "sub": user["id"], "email": user["email"], "aud": "authenticated", "role": "authenticated",
+            "user_metadata": user["user_metadata"], "app_metadata": user["app_metadata"],
+            "iat": now, "exp": now + expires_in, "iss": "local-supabase",
+        }
+        token = jwt.encode(claims, key, algorithm=algorithm, headers={"kid": kid} if kid else None)
+        return {
+            "access_token": token, "token_type": "bearer", "expires_in": expires_in, "expires_at": now + expires_in,
+            "refresh_token": uuid.uuid4().hex, "user": public(user),
+        }
+
+    def _hash(password: str) -> str:
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def _bearer(authorization: Optional[str]) -> Dict:
+        token = (authorization or "").removeprefix("Bearer ").strip()
+        try:
+            claims = jwt.decode(token, key if algorithm.startswith("HS") else jwks["keys"][0], algorithms=[algorithm], audience="authenticated")
+        except Exception as e:
+            raise HTTPException(status_code=401, detail={"msg": f"invalid JWT: {e}"})
+        user = next((u for u in users.values() if u["id"] == claims["sub"]), None)
+        if user is None:
+            raise HTTPException(status_code=404, detail={"msg": "User not found"})
+        return user
+
+    @app.post("/auth/v1/signup")
+    async def signup(request: Request):
+        body = await request.json()
+        if body["email"] in users:
+            raise HTTPException(status_code=422, detail={"msg": "User already registered"})
+        now = datetime.now(timezone.utc).isoformat()
+        user = {
+            "id": str(uuid.uuid4()), "aud": "authenticated", "role": "authenticated", "email": body["email"],
+            "email_confirmed_at": now, "created_at": now, "updated_at": now, "last_sign_in_at": now,
+            "app_metadata": {"provider": "email", "providers": ["email"]},
+            "user_metadata": (body.get("data") or {}), "identities": [],
+            "_password": _hash(body["password"]),
+        }
+        users[body["email"]] = user
+        # Auto-confirmed: the session comes back with the user, like a project without email confirmation
+        return issue(user)
+
+    @app.post("/auth/v1/token")
+    async def token(request: Request, grant_type: str = "password"):
+        body = await request.json()
+        user = users.get(body.get("email", ""))
+        if grant_type != "password" or user is None or user["_password"] != _hash(body.get("password", "")):
+            raise HTTPException(status_code=400, detail={"error": "invalid_grant", "error_description": "Invalid login credentials"})
+        return issue(user)
+
+    @app.get("/auth/v1/user")
+    async def get_user(authorization: Optional[str] = Header(None)):
+        return public(_bearer(authorization))
+
+    @app.post("/auth/v1/logout")
+    async def logout():
+        return Response(status_code=204)
+
+    @app.get("/auth/v1/.well-known/jwks.json")
+    async def keys():
+        return jwks
+
+    app.state.issue = issue
+    app.state.users = users
+    return app
+
+
+def anon_key(secret: str) -> str:
+    """A Supabase-style anon key for SUPABASE_KEY (supabase-py expects a JWT)."""
+    return jwt.encode({"role": "anon", "iss": "local-supabase", "exp": int(time.time()) + 10 * 365 * 86400}, secret, algorithm="HS256")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Supabase auth stand-in")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--secret", default="local-jwt-secret")
+    parser.add_argument("--algorithm", default="HS256", choices=["HS256", "RS256"])
+    args = parser.parse_args()
+    url = f"http://127.0.0.1:{args.port}"
+    print("Start the backend with:")
+    print(f"  DEMO_MODE=false SUPABASE_URL={url} SUPABASE_KEY={anon_key(args.secret)} \\")
+    print(f"  JWT_SECRET={args.secret} JWT_ALGORITHM={args.algorithm}")
+    uvicorn.run(create_app(args.secret, args.algorithm), host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,77 @@
+"""
+Monte Carlo simulation latency: run_simulation for --paths paths over several
+horizons with both samplers, on a synthetic returns window of --holdings stocks
+(no database involved, the window normally comes from the risk cache).
+
+Checks the 200 ms budget for 10k paths, that a seed reproduces a run exactly,
+and that the simulated mean terminal value is close to the analytic one.
+
+    python scripts/monte_carlo_benchmark.py --paths 10000 --holdings 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.monte_carlo import run_simulation  # noqa: E402
+from app.services.portfolio_risk import ReturnsWindow  # noqa: E402
+
+BUDGET_MS = 200
+
+
+def _window(holdings: int, days: int, seed: int) -> ReturnsWindow:
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0003, 0.008, days)
+    betas = rng.uniform(0.5, 1.5, holdings)
+    returns = market[:, None] * betas + rng.normal(0.0002, 0.012, (days, holdings))
+    codes = tuple(f"BM{i:03d}" for i in range(holdings))
+    return ReturnsWindow(codes, (), tuple(range(days)), returns, market, np.cov(returns, rowvar=False))
+
+
+def main(paths: int, holdings: int, days: int, repeat: int) -> None:
+    window = _window(holdings, days, seed=7)
+    allocation = {code: 1.0 for code in window.codes}
+    print(f"{paths} paths, {holdings} stocks, {days}-day returns window")
+    print(f"\n{'method':<10} {'horizon':>8} {'median ms':>10} {'p5':>10} {'p50':>10} {'p95':>10} {'max DD p50':>11}")
+    over_budget = 0
+    for method in ("bootstrap", "gaussian"):
+        for horizon in (5, 20, 60, 250):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = run_simulation(window, allocation, 10_000, horizon, paths, method, seed=42)
+                timings.append((time.perf_counter() - started) * 1000)
+            median = statistics.median(timings)
+            over_budget += horizon <= 60 and median > BUDGET_MS
+            terminal = result["terminal"]
+            print(
+                f"{method:<10} {horizon:>8} {median:10.1f} {terminal['p5']:10.0f} {terminal['p50']:10.0f} "
+                f"{terminal['p95']:10.0f} {result['max_drawdown']['p50_pct']:10.2f}%"
+            )
+
+    first = run_simulation(window, allocation, 10_000, 20, paths, "gaussian", seed=123)
+    again = run_simulation(window, allocation, 10_000, 20, paths, "gaussian", seed=123)
+    # Buy-and-hold of equal weights: E[value] = mean over stocks of (1 + mu_i)^horizon
+    expected = 10_000 * np.mean((1 + window.returns.mean(axis=0)) ** 20)
+    print(f"\nmean terminal value {first['terminal']['mean']:.1f} vs analytic {expected:.1f}")
+    print("[OK] Seeded runs identical" if first == again else "[WARN] Seeded runs differ")
+    print(f"[OK] Horizons up to 60 days under {BUDGET_MS} ms" if not over_budget else f"[WARN] {over_budget} runs over {BUDGET_MS} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation latency")
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--holdings", type=int, default=20)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.paths, args.holdings, args.days, args.repeat)
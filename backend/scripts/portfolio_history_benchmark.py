@@ -0,0 +1,137 @@
+"""
+Portfolio value history latency: a naive build with one price query per trade
+and a Python loop over its days, the pivoted query with the matrix product (cold
+cache), and a repeat view (cached series). Checks both builds give the same
+daily values.
+
+    python scripts/portfolio_history_benchmark.py --stocks 80 --trades 40 --days 750
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from app.db.database import PriceData, Stock, Trade, create_db_engine  # noqa: E402
+from app.services.portfolio_history import history_cache, portfolio_history  # noqa: E402
+from load_benchmark import seed  # noqa: E402
+
+USER = "bench-history"
+
+
+def _median_ms(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _naive_history(session: Session, trades: List[Trade], since: datetime) -> Dict[datetime, float]:
+    """date -> value the slow way: a query per trade, then every day of every trade in Python."""
+    value: Dict[datetime, float] = {}
+    for trade in trades:
+        prices = session.exec(
+            select(PriceData.date, PriceData.close).join(Stock, Stock.id == PriceData.stock_id)
+            .where(Stock.code == trade.stock_code, PriceData.date >= since)
+            .order_by(PriceData.date)  # type: ignore[attr-defined]
+        ).all()
+        sign = 1 if trade.side == "buy" else -1
+        for date, close in prices:
+            if date.date() >= trade.executed_at.date():
+                value[date] = value.get(date, 0.0) + sign * trade.quantity * close
+    return value
+
+
+def _trades(session: Session, stocks: int, count: int, rng: random.Random) -> List[Trade]:
+    """Buys, and sells of part of what is held at the time, in date order, at that day's close."""
+    closes = {
+        (code, date): close
+        for date, code, close in session.exec(
+            select(PriceData.date, Stock.code, PriceData.close).join(Stock, Stock.id == PriceData.stock_id)
+        ).all()
+    }
+    dates = sorted({date for _, date in closes})
+    held: Dict[str, int] = {}
+    trades = []
+    for date in sorted(rng.choice(dates) for _ in range(count)):
+        sellable = [code for code, quantity in held.items() if quantity > 1]
+        if sellable and rng.random() < 0.3:
+            code = rng.choice(sellable)
+            side, quantity = "sell", rng.randint(1, held[code] // 2)
+        else:
+            code = f"BM{rng.randrange(stocks):03d}"
+            side, quantity = "buy", rng.randint(1, 500)
+        held[code] = held.get(code, 0) + (quantity if side == "buy" else -quantity)
+        trades.append(Trade(
+            user_id=USER, stock_code=code, side=side, quantity=quantity,
+            price=closes[code, date] * rng.uniform(0.99, 1.01), executed_at=date,
+        ))
+    return trades
+
+
+def main(stocks: int, days: int, count: int, repeat: int) -> None:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory(prefix="kanz-history-") as workdir:
+        engine = create_db_engine(f"sqlite:///{Path(workdir) / 'history.db'}")
+        SQLModel.metadata.create_all(engine)
+        seed(engine, stocks, days, news=1)
+        with Session(engine) as session:
+            session.add_all(_trades(session, stocks, count, rng))
+            session.commit()
+        print(f"{stocks} stocks x {days} days, {count} trades")
+
+        with Session(engine) as session:
+            trades = session.exec(select(Trade).where(Trade.user_id == USER).order_by(Trade.id)).all()
+            since = min(t.executed_at for t in trades).replace(hour=0, minute=0, second=0, microsecond=0)
+
+            def cold():
+                history_cache.clear()
+                return portfolio_history(session, USER, days)
+
+            def warm():
+                return portfolio_history(session, USER, days)
+
+            history = cold()
+            naive = _naive_history(session, trades, since)
+            rows = [
+                ("per-trade loops", _median_ms(lambda: _naive_history(session, trades, since), max(1, repeat // 3))),
+                ("pivot + matvec", _median_ms(cold, repeat)),
+                ("cached", _median_ms(warm, repeat)),
+            ]
+        engine.dispose()
+
+    for label, ms in rows:
+        print(f"{label:<16} {ms:9.2f} ms")
+    worst = max(abs(point["value"] - naive.get(point["date"], 0.0)) for point in history["points"])
+    summary = history["summary"]
+    print(
+        f"{len(history['points'])} points, end value {summary['end_value']:.0f}, "
+        f"P&L {summary['pnl_pct']:.2f}%, time-weighted {summary['time_weighted_return_pct']:.2f}%, "
+        f"max drawdown {summary['max_drawdown_pct']:.2f}%"
+    )
+    print("[OK] Values match" if worst < 1e-6 else f"[WARN] Values differ from the loop by up to {worst:.6f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pivoted value history vs per-trade loops")
+    parser.add_argument("--stocks", type=int, default=80)
+    parser.add_argument("--days", type=int, default=750)
+    parser.add_argument("--trades", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+    main(args.stocks, args.days, args.trades, args.repeat)
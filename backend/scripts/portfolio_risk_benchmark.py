@@ -0,0 +1,119 @@
+"""
+Portfolio risk latency: the first request of the day (market series, holdings
+query, pivot, covariance), a new set of holdings once the market series is
+cached, a repeat request (cached returns window), and a naive version with one
+price query per held stock and pure-Python covariance loops, which also checks
+the volatility.
+
+    python scripts/portfolio_risk_benchmark.py --stocks 80 --holdings 20 --window 250
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from app.db.database import PriceData, Stock, create_db_engine  # noqa: E402
+from app.services.portfolio_risk import portfolio_risk, returns_window, risk_cache  # noqa: E402
+from load_benchmark import seed  # noqa: E402
+
+
+def _median_ms(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _naive_volatility(session: Session, values: Dict[str, float], window: int) -> float:
+    """Daily portfolio volatility the slow way: a query per stock and nested loops."""
+    series: Dict[str, List[float]] = {}
+    for code in values:
+        closes = session.exec(
+            select(PriceData.close).join(Stock, Stock.id == PriceData.stock_id)
+            .where(Stock.code == code).order_by(PriceData.date.desc()).limit(window + 1)  # type: ignore[attr-defined]
+        ).all()[::-1]
+        series[code] = [closes[i] / closes[i - 1] - 1 for i in range(1, len(closes))]
+    total = sum(values.values())
+    codes = list(values)
+    means = {code: sum(series[code]) / len(series[code]) for code in codes}
+    variance = 0.0
+    for a in codes:
+        for b in codes:
+            cov = sum(
+                (x - means[a]) * (y - means[b]) for x, y in zip(series[a], series[b])
+            ) / (len(series[a]) - 1)
+            variance += values[a] / total * values[b] / total * cov
+    return math.sqrt(variance)
+
+
+def main(stocks: int, days: int, holdings: int, window: int, repeat: int) -> None:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory(prefix="kanz-risk-") as workdir:
+        engine = create_db_engine(f"sqlite:///{Path(workdir) / 'risk.db'}")
+        SQLModel.metadata.create_all(engine)
+        seed(engine, stocks, days, news=1)
+        values = {f"BM{i:03d}": rng.uniform(1_000, 50_000) for i in rng.sample(range(stocks), holdings)}
+        print(f"{stocks} stocks x {days} days, {holdings} holdings, {window}-day window")
+
+        with Session(engine) as session:
+            def cold():
+                risk_cache.clear()
+                return portfolio_risk(returns_window(session, list(values), window), values)
+
+            portfolios = [
+                {f"BM{i:03d}": value for i, value in zip(rng.sample(range(stocks), holdings), values.values())}
+                for _ in range(repeat)
+            ]
+
+            def new_holdings():
+                held = portfolios.pop()
+                return portfolio_risk(returns_window(session, list(held), window), held)
+
+            def warm():
+                return portfolio_risk(returns_window(session, list(values), window), values)
+
+            report = cold()
+            naive_sigma = _naive_volatility(session, values, window)
+            rows = [
+                ("first of day", _median_ms(cold, repeat)),
+                ("new holdings", _median_ms(new_holdings, repeat)),
+                ("repeat", _median_ms(warm, repeat)),
+                ("naive loops", _median_ms(lambda: _naive_volatility(session, values, window), max(1, repeat // 3))),
+            ]
+        engine.dispose()
+
+    for label, ms in rows:
+        print(f"{label:<14} {ms:9.2f} ms")
+    sigma = report["volatility"]["daily_pct"] / 100
+    print(
+        f"daily volatility {sigma * 100:.4f}% (naive {naive_sigma * 100:.4f}%), "
+        f"VaR95 hist {report['var']['historical']['pct']:.3f}%, beta {report['beta']:.3f}"
+    )
+    print("[OK] Volatility matches" if abs(sigma - naive_sigma) < 1e-9 else "[WARN] Volatility differs from the naive loop")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized portfolio risk vs per-stock loops")
+    parser.add_argument("--stocks", type=int, default=80)
+    parser.add_argument("--days", type=int, default=750)
+    parser.add_argument("--holdings", type=int, default=20)
+    parser.add_argument("--window", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+    main(args.stocks, args.days, args.holdings, args.window, args.repeat)
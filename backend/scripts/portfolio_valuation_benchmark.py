@@ -0,0 +1,123 @@
+"""
+Portfolio valuation cost: the previous per-position price lookups (two queries
+per holding) vs the single snapshot query + NumPy valuation, for one portfolio
+and for a leaderboard over every user's portfolio.
+
+Seeds a temporary SQLite file with --stocks stocks of synthetic daily prices and
+--users portfolios of --positions holdings each, then times (median of --repeat).
+
+    python scripts/portfolio_valuation_benchmark.py --users 1000 --positions 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from app.db.database import Portfolio, PriceData, Stock, create_db_engine  # noqa: E402
+from app.services.portfolio_valuation import (  # noqa: E402
+    price_snapshot, snapshot_statement, value_portfolios, value_positions,
+)
+from load_benchmark import seed  # noqa: E402
+
+
+def _median_ms(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _old_latest_close(session: Session, stock_code: str):
+    stock = session.exec(select(Stock).where(Stock.code == stock_code)).first()
+    if not stock:
+        return None
+    return session.exec(
+        select(PriceData.close).where(PriceData.stock_id == stock.id).order_by(PriceData.date.desc()).limit(1)
+    ).first()
+
+
+def _old_value(session: Session, positions) -> float:
+    total = 0.0
+    for position in positions:
+        close = _old_latest_close(session, position.stock_code)
+        total += (close or position.avg_buy_price) * position.quantity
+    return total
+
+
+def main(stocks: int, days: int, users: int, positions: int, repeat: int) -> None:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory(prefix="kanz-valuation-") as workdir:
+        engine = create_db_engine(f"sqlite:///{Path(workdir) / 'valuation.db'}")
+        SQLModel.metadata.create_all(engine)
+        seed(engine, stocks, days, news=1)
+        with Session(engine) as session:
+            session.execute(insert(Portfolio), [
+                {
+                    "user_id": f"user-{u:05d}", "stock_code": f"BM{code:03d}", "quantity": rng.randint(1, 500),
+                    "avg_buy_price": rng.uniform(5, 150), "created_at": datetime.now(),
+                }
+                for u in range(users) for code in rng.sample(range(stocks), min(positions, stocks))
+            ])
+            session.commit()
+        print(f"{stocks} stocks x {days} days, {users} users x {positions} positions")
+
+        with Session(engine) as session:
+            mine = session.exec(select(Portfolio).where(Portfolio.user_id == "user-00000")).all()
+            everyone = session.exec(select(Portfolio)).all()
+
+            def new_one():
+                return value_positions(mine, price_snapshot(session.exec(snapshot_statement(p.stock_code for p in mine)).all()))
+
+            def new_all():
+                rows = session.exec(snapshot_statement({p.stock_code for p in everyone})).all()
+                return value_portfolios(everyone, price_snapshot(rows))
+
+            def old_all():
+                by_user = {}
+                for position in everyone:
+                    by_user.setdefault(position.user_id, []).append(position)
+                return {user: _old_value(session, held) for user, held in by_user.items()}
+
+            # Same totals both ways
+            old_totals = old_all()
+            new_totals = {entry["user_id"]: entry["market_value"] for entry in new_all()}
+            agree = all(abs(old_totals[u] - new_totals[u]) < 1e-6 * max(1.0, old_totals[u]) for u in old_totals)
+
+            rows = [
+                ("one portfolio", _median_ms(lambda: _old_value(session, mine), repeat), _median_ms(new_one, repeat)),
+                (f"all {users} users", _median_ms(old_all, max(1, repeat // 3)), _median_ms(new_all, repeat)),
+            ]
+        engine.dispose()
+
+    print(f"\n{'valuation':<18} {'old ms':>10} {'new ms':>10} {'speedup':>8}")
+    for label, old, new in rows:
+        print(f"{label:<18} {old:10.2f} {new:10.2f} {old / new:7.0f}x")
+    print("[OK] Same market values" if agree else "[WARN] Valuations disagree")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched portfolio valuation vs per-position lookups")
+    parser.add_argument("--stocks", type=int, default=80)
+    parser.add_argument("--days", type=int, default=500)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+    main(args.stocks, args.days, args.users, args.positions, args.repeat)
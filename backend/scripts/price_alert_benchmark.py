@@ -0,0 +1,105 @@
+"""
+Price-target evaluation cost per tick: the heap-indexed PriceAlertEngine vs a
+linear scan over the same rules.
+
+--rules synthetic "above" / "below" targets are spread over --stocks stocks around
+a base price; --ticks quotes then random-walk each stock. Both evaluators see the
+same ticks and must fire the same rules (persistence is stubbed out, this times
+the in-memory evaluation a live quote pays). Reports microseconds per tick and
+rules fired.
+
+    python scripts/price_alert_benchmark.py --rules 100000 --stocks 80 --ticks 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.price_alerts import PriceAlertEngine, PriceTarget  # noqa: E402
+
+
+def _rules(rng: random.Random, count: int, stocks: int) -> List[PriceTarget]:
+    rules = []
+    for rule_id in range(count):
+        direction = rng.choice(("above", "below"))
+        # Mostly out of reach, like real targets: above ones over the price, below ones under
+        spread = rng.uniform(0.0, 0.3) * (1 if direction == "above" else -1)
+        rules.append(
+            PriceTarget(rule_id, f"user-{rule_id % 5000}", f"BM{rule_id % stocks:03d}", direction, round(10.0 * (1 + spread), 3))
+        )
+    return rules
+
+
+def _ticks(rng: random.Random, count: int, stocks: int) -> List[tuple]:
+    prices = {f"BM{i:03d}": 10.0 for i in range(stocks)}
+    ticks = []
+    for _ in range(count):
+        code = f"BM{rng.randrange(stocks):03d}"
+        prices[code] = max(0.01, prices[code] * (1 + rng.gauss(0, 0.01)))
+        ticks.append((code, prices[code]))
+    return ticks
+
+
+class LinearScan:
+    """Every active rule of the stock checked on every tick."""
+
+    def __init__(self, rules: List[PriceTarget]):
+        self.books: Dict[str, List[PriceTarget]] = {}
+        for rule in rules:
+            self.books.setdefault(rule.stock_code, []).append(rule)
+
+    def evaluate(self, stock_code: str, price: float) -> List[PriceTarget]:
+        book = self.books.get(stock_code, [])
+        fired, active = [], []
+        for rule in book:
+            hit = price >= rule.target if rule.direction == "above" else price <= rule.target
+            (fired if hit else active).append(rule)
+        if fired:
+            self.books[stock_code] = active
+        return fired
+
+
+def _time(evaluate, ticks: List[tuple]) -> tuple:
+    fired = set()
+    started = time.perf_counter()
+    for code, price in ticks:
+        for rule in evaluate(code, price):
+            fired.add(rule.id)
+    return (time.perf_counter() - started) / len(ticks) * 1e6, fired
+
+
+def main(rules: int, stocks: int, ticks: int, seed: int) -> None:
+    rng = random.Random(seed)
+    targets = _rules(rng, rules, stocks)
+    replay = _ticks(rng, ticks, stocks)
+    print(f"{rules} price targets over {stocks} stocks, {ticks} ticks")
+
+    started = time.perf_counter()
+    engine = PriceAlertEngine(on_fire=lambda fired, price: None)
+    engine.add_many(targets)
+    print(f"indexed in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    engine_us, engine_fired = _time(lambda code, price: engine.on_tick(code, price), replay)
+    scan_us, scan_fired = _time(LinearScan(targets).evaluate, replay)
+    print(f"engine:      {engine_us:8.2f} us/tick, {len(engine_fired)} rules fired")
+    print(f"linear scan: {scan_us:8.2f} us/tick, {len(scan_fired)} rules fired")
+    print(f"speedup {scan_us / engine_us:.0f}x")
+    print("[OK] Same rules fired" if engine_fired == scan_fired else "[WARN] Evaluators disagree")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Price-target evaluation per tick")
+    parser.add_argument("--rules", type=int, default=100_000)
+    parser.add_argument("--stocks", type=int, default=80)
+    parser.add_argument("--ticks", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.rules, args.stocks, args.ticks, args.seed)
@@ -0,0 +1,128 @@
+"""
+Connection soak test: drives the hot read routes for a long run (100k requests by
+default) and samples /api/health/db while it runs. With request-scoped sessions the
+checked-out and open connection counts stay flat instead of growing until GC.
+
+    python scripts/soak_test.py --requests 100000 --clients 50
+    python scripts/soak_test.py --url http://localhost:8000 --requests 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from load_benchmark import ROUTES, seed_database, start_server, wait_until_up  # noqa: E402
+
+
+def _pool_sample(stats: Dict, done: int, errors: int, started: float) -> Dict:
+    pool = stats["sync"]
+    return {
+        "requests": done,
+        "errors": errors,
+        "rps": done / max(time.perf_counter() - started, 1e-9),
+        "checked_out": pool["checked_out"],
+        "peak": pool["peak_checked_out"],
+        "open": pool["open_connections"],
+        "overflow": pool.get("pool", {}).get("overflow"),
+        "wait_p99": pool["wait_ms"]["p99"],
+        "timeouts": pool["timeouts"],
+    }
+
+
+def _print_sample(sample: Dict) -> None:
+    print(
+        f"{sample['requests']:>9} {sample['rps']:>7.0f} {sample['errors']:>7} {sample['checked_out']:>8} "
+        f"{sample['peak']:>5} {sample['open']:>5} {str(sample['overflow']):>8} {sample['wait_p99']:>9.2f} "
+        f"{sample['timeouts']:>8}"
+    )
+
+
+async def soak(base_url: str, total_requests: int, clients: int, interval: float) -> List[Dict]:
+    done = 0
+    errors = 0
+    error_kinds: Counter = Counter()
+    counter = iter(range(total_requests))
+    samples: List[Dict] = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        listed = (await client.get("/api/stocks")).json()
+        code = listed[len(listed) // 2]["code"] if listed else "SFBT"
+        routes = [route.format(code=code) for route in ROUTES]
+
+        async def worker():
+            nonlocal done, errors
+            for i in counter:
+                try:
+                    response = await client.get(routes[i % len(routes)])
+                    if response.status_code != 200:
+                        errors += 1
+                        error_kinds[f"HTTP {response.status_code}"] += 1
+                except httpx.HTTPError as e:
+                    errors += 1
+                    error_kinds[type(e).__name__] += 1
+                done += 1
+
+        print(f"{'requests':>9} {'req/s':>7} {'errors':>7} {'checkout':>8} {'peak':>5} {'open':>5} {'overflow':>8} {'wait p99':>9} {'timeouts':>8}")
+        started = time.perf_counter()
+        workers = asyncio.gather(*(worker() for _ in range(clients)))
+        while not workers.done():
+            await asyncio.wait([workers], timeout=interval)
+            sample = _pool_sample((await client.get("/api/health/db")).json(), done, errors, started)
+            samples.append(sample)
+            _print_sample(sample)
+        await workers
+    if error_kinds:
+        print("errors: " + ", ".join(f"{kind} x{count}" for kind, count in error_kinds.most_common()))
+    return samples
+
+
+def report(samples: List[Dict]) -> None:
+    if len(samples) < 2:
+        return
+    half = samples[len(samples) // 2:]
+    growth = samples[-1]["open"] - half[0]["open"]
+    print(
+        f"\nopen connections: {samples[0]['open']} -> {samples[-1]['open']} "
+        f"(second half growth {growth:+d}), peak checked out {samples[-1]['peak']}, "
+        f"pool timeouts {samples[-1]['timeouts']}, errors {samples[-1]['errors']}"
+    )
+    print("[OK] Connection count flat" if growth <= 0 and samples[-1]["timeouts"] == 0 else "[WARN] Connections grew")
+
+
+def main(total_requests: int, clients: int, interval: float, port: int, url: Optional[str]) -> None:
+    if url:
+        report(asyncio.run(soak(url.rstrip("/"), total_requests, clients, interval)))
+        return
+    with tempfile.TemporaryDirectory(prefix="kanz-soak-") as workdir:
+        database_url = f"sqlite:///{Path(workdir) / 'soak.db'}"
+        seed_database(database_url)
+        server = start_server(database_url, False, port, workdir)
+        try:
+            wait_until_up(f"http://127.0.0.1:{port}", server)
+            report(asyncio.run(soak(f"http://127.0.0.1:{port}", total_requests, clients, interval)))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flat connection count over a long request run")
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=10, help="Seconds between pool samples")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--url", help="Soak an already running server instead of a seeded local one")
+    args = parser.parse_args()
+    main(args.requests, args.clients, args.interval, args.port, args.url)
@@ -0,0 +1,118 @@
+"""
+Trade ledger cost: buys and multi-lot sells through record_buy/record_sell, and
+reading a user's positions from the Holding aggregate vs from every open lot
+(what GET /api/portfolio returned before the ledger, one row per buy). Checks
+the holdings and realized P&L against a plain-Python FIFO replay of the trades.
+
+    python scripts/trade_ledger_benchmark.py --trades 5000 --stocks 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from app.db.database import Holding, Portfolio, Trade, create_db_engine  # noqa: E402
+from app.services.trade_ledger import record_buy, record_sell  # noqa: E402
+
+USER = "bench-ledger"
+
+
+def _median_ms(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _fifo_replay(trades: List[Trade]) -> Dict[str, Tuple[int, float]]:
+    """code -> (open quantity, realized P&L) the obvious way."""
+    lots: Dict[str, Deque[List[float]]] = {}
+    realized: Dict[str, float] = {}
+    for trade in trades:
+        queue = lots.setdefault(trade.stock_code, deque())
+        if trade.side == "buy":
+            queue.append([trade.quantity, trade.price])
+            continue
+        remaining = trade.quantity
+        while remaining:
+            used = min(queue[0][0], remaining)
+            realized[trade.stock_code] = realized.get(trade.stock_code, 0.0) + used * (trade.price - queue[0][1])
+            queue[0][0] -= used
+            remaining -= used
+            if not queue[0][0]:
+                queue.popleft()
+    return {code: (int(sum(q for q, _ in queue)), realized.get(code, 0.0)) for code, queue in lots.items()}
+
+
+def main(trades: int, stocks: int, repeat: int) -> None:
+    rng = random.Random(7)
+    codes = [f"BM{i:03d}" for i in range(stocks)]
+    with tempfile.TemporaryDirectory(prefix="kanz-ledger-") as workdir:
+        engine = create_db_engine(f"sqlite:///{Path(workdir) / 'ledger.db'}")
+        SQLModel.metadata.create_all(engine)
+        buy_ms: List[float] = []
+        sell_ms: List[float] = []
+        lots_per_sell: List[int] = []
+        with Session(engine) as session:
+            held: Dict[str, int] = {}
+            for _ in range(trades):
+                code = rng.choice(codes)
+                started = time.perf_counter()
+                if held.get(code, 0) > 100 and rng.random() < 0.1:
+                    quantity = rng.randint(1, held[code])
+                    before = len(session.exec(select(Portfolio.id).where(Portfolio.user_id == USER, Portfolio.stock_code == code)).all())
+                    started = time.perf_counter()
+                    record_sell(session, USER, code, quantity, rng.uniform(5, 150))
+                    sell_ms.append((time.perf_counter() - started) * 1000)
+                    after = len(session.exec(select(Portfolio.id).where(Portfolio.user_id == USER, Portfolio.stock_code == code)).all())
+                    lots_per_sell.append(before - after + 1)
+                    held[code] -= quantity
+                else:
+                    quantity = rng.randint(1, 50)
+                    record_buy(session, USER, code, quantity, rng.uniform(5, 150))
+                    buy_ms.append((time.perf_counter() - started) * 1000)
+                    held[code] = held.get(code, 0) + quantity
+
+            lots = session.exec(select(Portfolio.id).where(Portfolio.user_id == USER)).all()
+            read_lots = _median_ms(lambda: session.exec(select(Portfolio).where(Portfolio.user_id == USER)).all(), repeat)
+            read_holdings = _median_ms(
+                lambda: session.exec(select(Holding).where(Holding.user_id == USER, Holding.quantity > 0)).all(), repeat
+            )
+            holdings = {h.stock_code: h for h in session.exec(select(Holding).where(Holding.user_id == USER)).all()}
+            expected = _fifo_replay(session.exec(select(Trade).where(Trade.user_id == USER).order_by(Trade.id)).all())
+        engine.dispose()
+
+    print(f"{trades} trades over {stocks} stocks: {len(buy_ms)} buys, {len(sell_ms)} sells, {len(lots)} open lots")
+    print(f"buy                 {statistics.median(buy_ms):9.2f} ms")
+    print(f"sell                {statistics.median(sell_ms):9.2f} ms  (up to {max(lots_per_sell)} lots per sell)")
+    print(f"positions from lots {read_lots:9.2f} ms  ({len(lots)} rows)")
+    print(f"positions (holding) {read_holdings:9.2f} ms  ({sum(1 for h in holdings.values() if h.quantity)} rows)")
+    worst = max(
+        max(abs(holdings[code].quantity - quantity), abs(holdings[code].realized_pnl - realized))
+        for code, (quantity, realized) in expected.items()
+    )
+    print("[OK] Holdings match the FIFO replay" if worst < 1e-6 else f"[WARN] Holdings differ from the replay by {worst}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trade ledger and holding aggregate")
+    parser.add_argument("--trades", type=int, default=5000)
+    parser.add_argument("--stocks", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+    main(args.trades, args.stocks, args.repeat)
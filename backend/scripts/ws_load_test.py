@@ -0,0 +1,224 @@
+"""
+Alerts WebSocket fan-out load test.
+
+Runs the alerts router in-process under uvicorn, opens 1,000 WebSocket clients
+against /api/alerts/ws/alerts (each with a random stock / severity filter, or none),
+then publishes synthetic alerts through the hub at a fixed rate. A few "slow"
+clients complete the handshake and then never read, so once the socket buffers
+are full their server-side queues fill up and the slow-consumer policy kicks in.
+
+Reports connect time, fan-out latency (publish -> client receive) p50/p99/max,
+messages delivered vs. expected from the filters, filter violations, and how the
+hub handled the slow clients.
+
+    python scripts/ws_load_test.py --clients 1000 --rate 5 --seconds 20
+    python scripts/ws_load_test.py --clients 100 --slow 10 --payload 32768 --queue-size 32 --policy disconnect
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from load_benchmark import percentile  # noqa: E402
+
+STOCKS = ["SFBT", "BIAT", "ATB", "BNA", "STB", "UIB", "ATTIJ", "PGH", "SAH", "DH"]
+SEVERITIES = ["low", "medium", "high"]
+
+
+def _random_filter(rng: random.Random) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+    roll = rng.random()
+    if roll < 0.25:
+        return None, None
+    if roll < 0.6:
+        return rng.sample(STOCKS, rng.randint(1, 3)), None
+    if roll < 0.8:
+        return None, rng.sample(SEVERITIES, rng.randint(1, 2))
+    return rng.sample(STOCKS, rng.randint(1, 3)), rng.sample(SEVERITIES, rng.randint(1, 2))
+
+
+def _matches(alert: Dict, stocks: Optional[List[str]], severities: Optional[List[str]]) -> bool:
+    return (stocks is None or alert["stock_code"] in stocks) and (severities is None or alert["severity"] in severities)
+
+
+def _query(stocks: Optional[List[str]], severities: Optional[List[str]]) -> str:
+    params = []
+    if stocks:
+        params.append("stocks=" + ",".join(stocks))
+    if severities:
+        params.append("severity=" + ",".join(severities))
+    return "?" + "&".join(params) if params else ""
+
+
+def start_server(port: int):
+    """The alerts router alone, served by uvicorn on a background thread."""
+    import uvicorn
+    from fastapi import FastAPI
+
+    from app.api.routes import alerts
+
+    app = FastAPI()
+    app.include_router(alerts.router)
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning", backlog=4096))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+class Client:
+    def __init__(self, stocks: Optional[List[str]], severities: Optional[List[str]], slow: bool = False):
+        self.stocks = stocks
+        self.severities = severities
+        self.slow = slow
+        self.latencies: List[float] = []
+        self.received = 0
+        self.violations = 0
+        self.close_code: Optional[int] = None
+        self.done = asyncio.Event()
+
+    async def run(self, url: str, connected: asyncio.Semaphore, ready: asyncio.Event):
+        if self.slow:
+            await self._stall(url, connected)
+            return
+        import websockets
+
+        async with websockets.connect(
+            url + _query(self.stocks, self.severities), ping_interval=None, open_timeout=60, close_timeout=1
+        ) as ws:
+            connected.release()
+            await ready.wait()
+            try:
+                while True:
+                    message = json.loads(await ws.recv())
+                    if message["type"] == "bench_end":
+                        break
+                    if message["type"] != "alert":
+                        continue
+                    self.received += 1
+                    self.latencies.append((time.time() - message["published_at"]) * 1000)
+                    if not _matches(message, self.stocks, self.severities):
+                        self.violations += 1
+            except websockets.ConnectionClosed as e:
+                self.close_code = e.rcvd.code if e.rcvd else None
+        self.done.set()
+
+    async def _stall(self, url: str, connected: asyncio.Semaphore):
+        # Raw handshake, then never read: client libraries keep draining the socket into
+        # their own buffers, which would hide the back-pressure from the server
+        host, port = url.split("/")[2].split(":")
+        path = "/" + url.split("/", 3)[3]
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, (host, int(port)))
+        reader, writer = await asyncio.open_connection(sock=sock, limit=1024)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        await reader.readuntil(b"\r\n\r\n")
+        connected.release()
+        await self.done.wait()
+        writer.transport.abort()
+
+
+async def run(clients: int, slow: int, rate: float, seconds: float, payload: int, port: int) -> None:
+    from app.services.alert_hub import alert_hub
+
+    rng = random.Random(42)
+    url = f"ws://127.0.0.1:{port}/api/alerts/ws/alerts"
+    fleet = [Client(*_random_filter(rng)) for _ in range(clients)] + [Client(None, None, slow=True) for _ in range(slow)]
+    connected = asyncio.Semaphore(0)
+    ready = asyncio.Event()
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(client.run(url, connected, ready)) for client in fleet]
+    for _ in fleet:
+        await connected.acquire()
+    print(f"{len(fleet)} clients connected in {time.perf_counter() - started:.2f}s ({slow} slow)")
+    ready.set()
+
+    padding = "x" * payload
+    alerts: List[Dict] = []
+    interval = 1 / rate
+    started = time.perf_counter()
+    for i in range(int(rate * seconds)):
+        alert = {
+            "type": "alert", "id": i, "stock_code": rng.choice(STOCKS), "severity": rng.choice(SEVERITIES),
+            "alert_type": "volume_spike", "message": padding, "published_at": time.time(),
+        }
+        alerts.append(alert)
+        alert_hub.publish_threadsafe(alert)
+        await asyncio.sleep(max(0.0, started + (i + 1) * interval - time.perf_counter()))
+    publish_seconds = time.perf_counter() - started
+
+    alert_hub.publish_threadsafe({"type": "bench_end"})
+    fast = [client for client in fleet if not client.slow]
+    await asyncio.wait([asyncio.ensure_future(c.done.wait()) for c in fast], timeout=30)
+    await asyncio.sleep(0.5)
+    for client in fleet:
+        client.done.set()
+    await asyncio.wait(tasks, timeout=10)
+
+    latencies = sorted(latency for client in fast for latency in client.latencies)
+    expected = sum(_matches(alert, c.stocks, c.severities) for alert in alerts for c in fast)
+    received = sum(client.received for client in fast)
+    stats = alert_hub.stats()
+    print(f"{len(alerts)} alerts published in {publish_seconds:.1f}s ({len(alerts) / publish_seconds:.0f}/s)")
+    print(f"delivered {received}/{expected} filtered messages to fast clients ({received / publish_seconds:.0f} msg/s)")
+    if latencies:
+        print(
+            f"fan-out latency p50 {percentile(latencies, 50):.1f} ms, p99 {percentile(latencies, 99):.1f} ms, "
+            f"max {latencies[-1]:.1f} ms"
+        )
+    print(f"filter violations: {sum(client.violations for client in fast)}")
+    print(
+        f"slow consumers ({stats['slow_policy']}): {stats['dropped']} messages dropped, "
+        f"{stats['slow_disconnects']} disconnected; fast clients closed early: "
+        f"{sum(1 for client in fast if client.close_code is not None)}"
+    )
+    print("[OK] Fan-out complete" if received == expected else "[WARN] Fast clients missed messages")
+
+
+def main(clients: int, slow: int, rate: float, seconds: float, payload: int, port: int, policy: str, queue_size: int) -> None:
+    # Read by app.core.config at import time
+    os.environ["ALERT_WS_SLOW_POLICY"] = policy
+    os.environ["ALERT_WS_QUEUE_SIZE"] = str(queue_size)
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    server, thread = start_server(port)
+    try:
+        asyncio.run(run(clients, slow, rate, seconds, payload, port))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alerts WebSocket fan-out with 1,000 clients")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--slow", type=int, default=10, help="Extra clients that never read")
+    parser.add_argument("--rate", type=float, default=5, help="Alerts published per second")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--payload", type=int, default=256, help="Bytes of padding per alert")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--policy", choices=["drop", "disconnect"], default="drop")
+    parser.add_argument("--queue-size", type=int, default=100)
+    args = parser.parse_args()
+    main(args.clients, args.slow, args.rate, args.seconds, args.payload, args.port, args.policy, args.queue_size)
@@ -51,6 +51,38 @@ CREATE TABLE IF NOT EXISTS portfolio (
 
 CREATE INDEX IF NOT EXISTS idx_portfolio_user ON portfolio(user_id);
 
+-- Trade ledger (append-only); portfolio rows are the open lots, consumed FIFO by sells
+CREATE TABLE IF NOT EXISTS trade (
+    id SERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    stock_code TEXT NOT NULL,
+    side TEXT NOT NULL CHECK (side IN ('buy', 'sell')),
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    price FLOAT NOT NULL,
+    realized_pnl FLOAT,
+    executed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_trade_user_id ON trade(user_id, id);
+
+ALTER TABLE portfolio ADD COLUMN IF NOT EXISTS trade_id INTEGER REFERENCES trade(id);
+CREATE INDEX IF NOT EXISTS idx_portfolio_user_stock_id ON portfolio(user_id, stock_code, id);
+
+-- Per-(user, stock) aggregate of the open lots, updated with every trade
+CREATE TABLE IF NOT EXISTS holding (
+    id SERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    stock_code TEXT NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    cost_basis FLOAT NOT NULL DEFAULT 0,
+    avg_buy_price FLOAT NOT NULL DEFAULT 0,
+    realized_pnl FLOAT NOT NULL DEFAULT 0,
+    last_trade_id INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_holding_user_stock UNIQUE (user_id, stock_code)
+);
+
 -- Watchlist table
 CREATE TABLE IF NOT EXISTS watchlist (
     id SERIAL PRIMARY KEY,
@@ -66,12 +98,51 @@ CREATE TABLE IF NOT EXISTS alert (
     stock_code TEXT NOT NULL,
     alert_type TEXT NOT NULL,
     message TEXT NOT NULL,
-    severity TEXT DEFAULT 'info' CHECK (severity IN ('info', 'warning', 'critical')),
+    severity TEXT DEFAULT 'MEDIUM',
     timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    is_read BOOLEAN DEFAULT FALSE
+    is_read BOOLEAN DEFAULT FALSE,
+    user_id TEXT  -- NULL = market-wide, otherwise the supabase uid the alert is for
 );
 
+-- Existing databases: the backend writes LOW/MEDIUM/HIGH severities, and price
+-- target alerts are addressed to one user
+ALTER TABLE alert DROP CONSTRAINT IF EXISTS alert_severity_check;
+ALTER TABLE alert ADD COLUMN IF NOT EXISTS user_id TEXT;
+
 CREATE INDEX IF NOT EXISTS idx_alert_timestamp ON alert(timestamp DESC);
+-- Unread counts (index-only range per user and read state) and the keyset-paginated feed
+CREATE INDEX IF NOT EXISTS idx_alert_user_read_timestamp ON alert(user_id, is_read, timestamp);
+CREATE INDEX IF NOT EXISTS idx_alert_user_timestamp ON alert(user_id, timestamp, id);
+
+-- Per-user read state of market-wide alerts (user_id NULL): single reads, and
+-- "mark all as read" up to read_before
+CREATE TABLE IF NOT EXISTS alert_read (
+    user_id TEXT NOT NULL,
+    alert_id INTEGER NOT NULL REFERENCES alert(id) ON DELETE CASCADE,
+    read_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, alert_id)
+);
+
+CREATE TABLE IF NOT EXISTS alert_read_mark (
+    user_id TEXT PRIMARY KEY,
+    read_before TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Price target rules ("notify me when SFBT goes above 12.5"), one-shot
+CREATE TABLE IF NOT EXISTS price_alert_rule (
+    id SERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    stock_code TEXT NOT NULL,
+    direction TEXT NOT NULL CHECK (direction IN ('above', 'below')),
+    target_price FLOAT NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    triggered_at TIMESTAMP WITH TIME ZONE,
+    triggered_price FLOAT
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_alert_rule_user ON price_alert_rule(user_id);
+CREATE INDEX IF NOT EXISTS idx_price_alert_rule_active ON price_alert_rule(stock_code) WHERE is_active;
 
 -- Predictions cache table (optional, for storing ML predictions)
 CREATE TABLE IF NOT EXISTS prediction_cache (
@@ -92,11 +163,23 @@ CREATE TABLE IF NOT EXISTS prediction_cache (
 -- Row Level Security (RLS) policies
 ALTER TABLE portfolio ENABLE ROW LEVEL SECURITY;
 ALTER TABLE watchlist ENABLE ROW LEVEL SECURITY;
+ALTER TABLE trade ENABLE ROW LEVEL SECURITY;
+ALTER TABLE holding ENABLE ROW LEVEL SECURITY;
 
 -- Allow users to manage their own portfolio
 CREATE POLICY "Users can manage their portfolio" ON portfolio
     FOR ALL USING (user_id = auth.uid()::text);
 
+-- Trades are appended and read, never edited
+CREATE POLICY "Users can read their trades" ON trade
+    FOR SELECT USING (user_id = auth.uid()::text);
+
+CREATE POLICY "Users can record their trades" ON trade
+    FOR INSERT WITH CHECK (user_id = auth.uid()::text);
+
+CREATE POLICY "Users can manage their holdings" ON holding
+    FOR ALL USING (user_id = auth.uid()::text);
+
 -- Allow users to manage their own watchlist  
 CREATE POLICY "Users can manage their watchlist" ON watchlist
     FOR ALL USING (user_id = auth.uid()::text);
@@ -154,6 +237,11 @@ CREATE POLICY "Public read access for news" ON news
 GRANT SELECT ON stock TO anon, authenticated;
 GRANT SELECT ON price_data TO anon, authenticated;
 GRANT ALL ON portfolio TO authenticated;
+GRANT SELECT, INSERT ON trade TO authenticated;
+GRANT ALL ON holding TO authenticated;
 GRANT ALL ON watchlist TO authenticated;
 GRANT SELECT ON alert TO anon, authenticated;
+GRANT ALL ON price_alert_rule TO authenticated;
+GRANT ALL ON alert_read TO authenticated;
+GRANT ALL ON alert_read_mark TO authenticated;
 GRANT SELECT ON news TO anon, authenticated;
@@ -0,0 +1,50 @@
+"""Shared fixtures: every test gets its own SQLite database, never ./kanz.db."""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Read by app.core.config at import, so set before any app module is imported
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='kanz-tests-')}/kanz.db")
+os.environ.setdefault("DEMO_MODE", "true")
+
+import pytest  # noqa: E402
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from app.db.database import PriceData, Stock, create_db_engine  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(db_engine)
+    yield db_engine
+    db_engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as db_session:
+        yield db_session
+
+
+@pytest.fixture
+def add_prices(session):
+    """add_prices({code: [close, ...]}) stores one daily PriceData row per close, from `start`."""
+
+    def add(closes, start=datetime(2024, 1, 1), volume=1000):
+        for code, series in closes.items():
+            stock = session.exec(select(Stock).where(Stock.code == code)).first() or Stock(code=code, name=code)
+            session.add(stock)
+            session.flush()
+            session.add_all(
+                PriceData(
+                    stock_id=stock.id, date=start + timedelta(days=day), open=close, high=close, low=close,
+                    close=close, volume=volume, transactions=10, capital=0.0,
+                )
+                for day, close in enumerate(series)
+                if close is not None
+            )
+        session.commit()
+
+    return add
@@ -0,0 +1,104 @@
+"""Per-user alert feed: keyset pages, read state and unread counts."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.database import Alert
+from app.services import alert_feed
+from app.services.alert_feed import decode_cursor, encode_cursor, feed, mark_all_read, mark_read, unread_count
+
+ME, OTHER = "me", "other"
+
+
+def _add(session, minutes_ago, user_id=None, **fields):
+    alert = Alert(
+        stock_code=fields.get("stock_code", "AAA"), alert_type="PRICE_MOVE", message=f"{minutes_ago} min",
+        severity="MEDIUM", user_id=user_id, timestamp=fields.get("timestamp") or datetime.utcnow() - timedelta(minutes=minutes_ago),
+    )
+    session.add(alert)
+    session.commit()
+    return alert
+
+
+def _walk(session, limit):
+    pages, cursor = [], None
+    while True:
+        items, next_cursor = feed(session, ME, limit, decode_cursor(cursor) if cursor else None)
+        pages.append([item["id"] for item in items])
+        if next_cursor is None:
+            return pages
+        cursor = next_cursor
+
+
+def test_pages_cover_both_buckets_once_newest_first(session):
+    alerts = [_add(session, m, ME if m % 2 else None) for m in range(1, 8)]
+    _add(session, 0, OTHER)
+    pages = _walk(session, 3)
+    assert pages == [[a.id for a in alerts[0:3]], [a.id for a in alerts[3:6]], [alerts[6].id]]
+
+
+def test_last_full_page_has_no_next_cursor(session):
+    alerts = [_add(session, m) for m in range(1, 5)]
+    assert _walk(session, 2) == [[alerts[0].id, alerts[1].id], [alerts[2].id, alerts[3].id]]
+    assert _walk(session, 4) == [[a.id for a in alerts]]
+
+
+def test_equal_timestamps_split_across_pages_by_id(session):
+    same = datetime.utcnow() - timedelta(minutes=5)
+    alerts = [_add(session, 5, ME if i % 2 else None, timestamp=same) for i in range(5)]
+    pages = _walk(session, 2)
+    assert sum(pages, []) == [a.id for a in reversed(alerts)]
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+def test_cursor_round_trip_and_garbage(session):
+    alert = _add(session, 1)
+    assert decode_cursor(encode_cursor(alert)) == (alert.timestamp, alert.id)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_unread_counts_follow_reads(session):
+    mine = _add(session, 1, ME)
+    market = [_add(session, m) for m in (2, 3, 4)]
+    _add(session, 5, OTHER)
+    # Older than ALERT_UNREAD_DAYS: already read
+    _add(session, 60 * 24 * 30)
+    assert unread_count(session, ME) == 4
+    assert unread_count(session, OTHER) == 4
+
+    assert mark_read(session, ME, mine.id)
+    assert mark_read(session, ME, market[0].id)
+    assert mark_read(session, ME, market[0].id)
+    assert unread_count(session, ME) == 2
+    # Market-wide reads are per user
+    assert unread_count(session, OTHER) == 4
+    items, _ = feed(session, ME)
+    assert {item["id"]: item["is_read"] for item in items}[market[0].id]
+
+
+def test_mark_all_read_and_later_alerts(session):
+    _add(session, 2, ME)
+    _add(session, 3)
+    mark_all_read(session, ME)
+    assert unread_count(session, ME) == 0
+    _add(session, 0)
+    assert unread_count(session, ME) == 1
+    assert [item["is_read"] for item in feed(session, ME)[0]] == [False, True, True]
+
+
+def test_other_users_alerts_are_invisible(session):
+    theirs = _add(session, 1, OTHER)
+    assert not mark_read(session, ME, theirs.id)
+    assert feed(session, ME) == ([], None)
+
+
+def test_old_market_alerts_stay_unread_without_the_cutoff(session, monkeypatch):
+    old = _add(session, 60 * 24 * 30)
+    assert unread_count(session, ME) == 0
+    monkeypatch.setattr(alert_feed, "ALERT_UNREAD_DAYS", 0)
+    assert unread_count(session, ME) == 1
+    assert feed(session, ME)[0][0]["is_read"] is False
+    assert mark_read(session, ME, old.id)
+    assert unread_count(session, ME) == 0
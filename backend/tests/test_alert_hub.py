@@ -0,0 +1,108 @@
+"""Alerts WebSocket hub: filtering, per-connection queues and slow consumers."""
+
+import asyncio
+
+import pytest
+
+from app.services.alert_hub import CLOSE_SLOW_CONSUMER, AlertHub
+
+
+class FakeSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _alert(code="AAA", severity="HIGH", user_id=None):
+    return {"type": "alert", "stock_code": code, "severity": severity, "user_id": user_id, "message": "m"}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_messages_reach_matching_subscribers_only():
+    async def scenario():
+        hub = AlertHub(heartbeat_interval=60)
+        everyone, aaa_high, mine = FakeSocket(), FakeSocket(), FakeSocket()
+        await hub.subscribe(everyone)
+        await hub.subscribe(aaa_high, stock_codes=["AAA"], severities=["high"])
+        await hub.subscribe(mine, user_id="u1")
+        hub.publish(_alert("AAA", "HIGH"))
+        hub.publish(_alert("AAA", "LOW"))
+        hub.publish(_alert("BBB", "HIGH"))
+        hub.publish(_alert("AAA", "HIGH", user_id="u1"))
+        hub.publish({"type": "heartbeat"})
+        await asyncio.sleep(0.05)
+        await hub.stop()
+        return [len(s.sent) for s in (everyone, aaa_high, mine)]
+
+    # everyone: 3 market alerts + heartbeat; aaa_high: 1 + heartbeat; mine: 3 market + its own + heartbeat
+    assert run(scenario()) == [4, 2, 5]
+
+
+def test_slow_subscriber_drops_its_oldest_messages_without_delaying_others():
+    async def scenario():
+        hub = AlertHub(queue_size=2, heartbeat_interval=60, send_timeout=5, slow_policy="drop")
+        fast, slow = FakeSocket(), FakeSocket(delay=10)
+        await hub.subscribe(fast)
+        slow_subscription = await hub.subscribe(slow)
+        await asyncio.sleep(0)
+        for i in range(6):
+            hub.publish(_alert(f"S{i}"))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        stats = hub.stats()
+        await hub.stop()
+        return len(fast.sent), slow_subscription.dropped, stats
+
+    fast_sent, dropped, stats = run(scenario())
+    assert fast_sent == 6
+    assert dropped >= 3
+    assert stats["dropped"] == dropped
+
+
+def test_disconnect_policy_closes_a_full_subscriber():
+    async def scenario():
+        hub = AlertHub(queue_size=1, heartbeat_interval=60, send_timeout=5, slow_policy="disconnect")
+        slow = FakeSocket(delay=10)
+        await hub.subscribe(slow)
+        await asyncio.sleep(0)
+        for i in range(3):
+            hub.publish(_alert(f"S{i}"))
+        await asyncio.sleep(0.05)
+        stats = hub.stats()
+        await hub.stop()
+        return slow.closed_with, stats
+
+    closed_with, stats = run(scenario())
+    assert closed_with == CLOSE_SLOW_CONSUMER
+    assert (stats["slow_disconnects"], stats["connections"]) == (1, 0)
+
+
+def test_blocked_send_times_out_and_disconnects():
+    async def scenario():
+        hub = AlertHub(heartbeat_interval=60, send_timeout=0.05)
+        stuck = FakeSocket(delay=10)
+        await hub.subscribe(stuck)
+        hub.publish(_alert())
+        await asyncio.sleep(0.2)
+        return stuck.closed_with, hub.stats()["connections"]
+
+    assert run(scenario()) == (CLOSE_SLOW_CONSUMER, 0)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AlertHub(slow_policy="block")
@@ -0,0 +1,108 @@
+"""Alert pipeline batching: dedupe, rate limiting, insert and publish."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.db.database import Alert, News
+from app.services.alert_pipeline import AlertEvent, AlertPipeline, price_target_event, sentiment_swing_events
+
+
+@pytest.fixture
+def published():
+    return []
+
+
+@pytest.fixture
+def pipeline(engine, published):
+    def publish(message):
+        published.append(message)
+        return True
+
+    return AlertPipeline(session_factory=lambda: Session(engine), publish=publish, rate_limit=300, dedupe_ttl=3600)
+
+
+def _stored(engine):
+    with Session(engine) as session:
+        return session.exec(select(Alert.stock_code, Alert.alert_type, Alert.severity, Alert.user_id).order_by(Alert.id)).all()
+
+
+def test_batch_is_inserted_and_published_with_ids(engine, pipeline, published):
+    pipeline._flush([AlertEvent("AAA", "VOLUME_SPIKE", "x3"), AlertEvent("BBB", "PRICE_MOVE", "+6%")])
+    assert _stored(engine) == [("AAA", "VOLUME_SPIKE", "MEDIUM", None), ("BBB", "PRICE_MOVE", "MEDIUM", None)]
+    with Session(engine) as session:
+        ids = session.exec(select(Alert.id).order_by(Alert.id)).all()
+    assert [message["id"] for message in published] == ids
+
+
+def test_duplicates_and_repeats_are_dropped(engine, pipeline):
+    pipeline._flush([AlertEvent("AAA", "VOLUME_SPIKE", "x3"), AlertEvent("AAA", "VOLUME_SPIKE", "x3")])
+    pipeline._flush([AlertEvent("AAA", "VOLUME_SPIKE", "x3")])
+    # Same (stock, type), new message, no escalation: rate limited
+    pipeline._flush([AlertEvent("AAA", "VOLUME_SPIKE", "x4")])
+    assert len(_stored(engine)) == 1
+    assert pipeline.stats()["deduplicated"] == 2
+    assert pipeline.stats()["rate_limited"] == 1
+
+
+def test_escalation_passes_the_rate_limit(engine, pipeline):
+    pipeline._flush([AlertEvent("AAA", "PRICE_MOVE", "+6%", "MEDIUM")])
+    pipeline._flush([AlertEvent("AAA", "PRICE_MOVE", "+9%", "HIGH")])
+    assert [row.severity for row in _stored(engine)] == ["MEDIUM", "HIGH"]
+
+
+def test_user_alerts_skip_the_rate_limit(engine, pipeline):
+    pipeline._flush([
+        price_target_event("AAA", 10.0, 10.2, "above", user_id="u1"),
+        price_target_event("AAA", 10.1, 10.2, "above", user_id="u1"),
+        price_target_event("AAA", 10.0, 10.2, "above", user_id="u2"),
+    ])
+    assert [row.user_id for row in _stored(engine)] == ["u1", "u1", "u2"]
+
+
+def test_restart_does_not_refire_stored_alerts(engine, pipeline, published):
+    pipeline._flush([AlertEvent("AAA", "VOLUME_SPIKE", "x3")])
+    restarted = AlertPipeline(session_factory=lambda: Session(engine), publish=published.append, dedupe_ttl=3600)
+    restarted._load_recent()
+    restarted._flush([AlertEvent("AAA", "VOLUME_SPIKE", "x3")])
+    assert len(_stored(engine)) == 1
+
+
+def test_failed_insert_is_not_remembered(engine, published):
+    failures = [RuntimeError("database is locked")]
+
+    def session_factory():
+        if failures:
+            raise failures.pop()
+        return Session(engine)
+
+    pipeline = AlertPipeline(session_factory=session_factory, publish=published.append, rate_limit=300, dedupe_ttl=3600)
+    pipeline._flush([AlertEvent("AAA", "VOLUME_SPIKE", "x3")])
+    assert (_stored(engine), published, pipeline.stats()["errors"]) == ([], [], 1)
+    # Neither a duplicate nor rate limited: the retry is stored and pushed
+    pipeline._flush([AlertEvent("AAA", "VOLUME_SPIKE", "x3")])
+    assert _stored(engine) == [("AAA", "VOLUME_SPIKE", "MEDIUM", None)]
+    assert len(published) == 1
+    assert (pipeline.stats()["deduplicated"], pipeline.stats()["rate_limited"]) == (0, 0)
+
+
+def test_sentiment_swing_against_the_recent_average(session):
+    old = datetime.utcnow() - timedelta(days=2)
+    session.add_all([
+        News(url=f"old-{i}", title="t", source="s", stock_code="AAA", sentiment_score=0.1, created_at=old) for i in range(3)
+    ] + [
+        News(url=f"calm-{i}", title="t", source="s", stock_code="BBB", sentiment_score=0.2, created_at=old) for i in range(3)
+    ])
+    fresh = [
+        News(url="new-1", title="t", source="s", stock_code="AAA", sentiment_score=-0.6),
+        News(url="new-2", title="t", source="s", stock_code="BBB", sentiment_score=0.25),
+        News(url="new-3", title="t", source="s", stock_code="CCC", sentiment_score=0.9),
+    ]
+    session.add_all(fresh)
+    session.commit()
+
+    events = sentiment_swing_events(session, fresh)
+    # BBB moved less than the threshold, CCC has no baseline
+    assert [(e.stock_code, e.alert_type, e.severity) for e in events] == [("AAA", "SENTIMENT_SWING", "HIGH")]
+    assert "down" in events[0].message
@@ -0,0 +1,80 @@
+"""Anomaly detection stays read-only; live snapshots feed the alert pipeline."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.db.database import PriceData, Stock
+from app.services import anomaly
+from app.services.anomaly import AnomalyService, emit_live_anomalies, historical_stats, live_anomaly_batch
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    results = []
+    monkeypatch.setattr(anomaly, "_emit_alerts", results.extend)
+    return results
+
+
+@pytest.fixture
+def service():
+    rules = AnomalyService()
+    rules.detector = None
+    return rules
+
+
+def _rows(stock_id=1, days=25, close=10.0, volume=1000):
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    return [
+        PriceData(
+            stock_id=stock_id, date=start + timedelta(days=i), open=close, high=close * 1.01, low=close * 0.99,
+            close=close, volume=volume, transactions=50, capital=0.0,
+        )
+        for i in range(days)
+    ]
+
+
+def test_detect_does_not_emit(emitted, service):
+    history = _rows()
+    current = {"open": 10, "high": 12, "low": 10, "close": 12, "volume": 9000, "transactions": 50}
+    result = service.detect("AAA", current, historical_stats(history))
+    assert result["is_anomaly"]
+    service.detect_batch([{"stock_code": "AAA", "current": current, "historical": historical_stats(history)}])
+    assert emitted == []
+
+
+def test_live_batch_compares_the_quote_with_earlier_days():
+    history = _rows()
+    today = PriceData(stock_id=1, date=datetime.now(), open=1, high=1, low=1, close=1, volume=1, transactions=1, capital=0)
+    quotes = {
+        "AAA": {"price": 11.0, "open": 10.0, "high": 11.0, "low": 10.0, "volume": 5000},
+        "BBB": {"price": None, "error": "Data unavailable"},
+        "CCC": {"price": 5.0},
+    }
+    items = live_anomaly_batch(quotes, {"AAA": history + [today]})
+    assert [item["stock_code"] for item in items] == ["AAA"]
+    # Today's stored row is replaced by the live quote
+    assert items[0]["historical"]["prev_close"] == 10.0
+    assert items[0]["current"]["close"] == 11.0
+    assert items[0]["current"]["transactions"] == items[0]["historical"]["tx_ma_20"]
+
+
+def test_live_anomalies_are_emitted(engine, monkeypatch, emitted, service):
+    with Session(engine) as session:
+        for code in ("AAA", "BBB"):
+            stock = Stock(code=code, name=code)
+            session.add(stock)
+            session.flush()
+            session.add_all(_rows(stock.id))
+        session.commit()
+    monkeypatch.setattr(anomaly, "session_scope", lambda: Session(engine))
+
+    quotes = {
+        "AAA": {"price": 10.05, "open": 10.0, "high": 10.1, "low": 10.0, "volume": 900},
+        "BBB": {"price": 12.0, "open": 10.0, "high": 12.0, "low": 10.0, "volume": 8000},
+    }
+    assert emit_live_anomalies(quotes, service) == 1
+    flagged = [result["stock"] for result in emitted if result["is_anomaly"]]
+    assert flagged == ["BBB"]
+    assert emit_live_anomalies({"BBB": {"price": None, "error": "Data unavailable"}}, service) == 0
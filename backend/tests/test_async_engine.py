@@ -0,0 +1,40 @@
+"""Async engine: driver URL mapping and reads through AsyncSession."""
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.database import Stock, async_database_url
+from app.db.queries import group_latest_prices, latest_prices_statement
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./kanz.db", "sqlite+aiosqlite:///./kanz.db"),
+    ("postgresql://u:p@db:5432/kanz?sslmode=require", "postgresql+asyncpg://u:p@db:5432/kanz?ssl=require"),
+    ("postgres://u:p@db/kanz", "postgresql+asyncpg://u:p@db/kanz"),
+])
+def test_async_database_url(url, expected):
+    assert async_database_url(url) == expected
+
+
+def test_unsupported_backend_is_rejected():
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@db/kanz")
+
+
+def test_async_session_reads_the_same_rows(session, engine, add_prices):
+    add_prices({"AAA": [1.0, 2.0, 3.0], "BBB": [5.0, 4.0]})
+
+    async def read():
+        async_engine = create_async_engine(async_database_url(str(engine.url)))
+        async with AsyncSession(async_engine) as async_session:
+            codes = (await async_session.exec(select(Stock.code).order_by(Stock.code))).all()
+            rows = (await async_session.exec(latest_prices_statement(depth=2))).all()
+        await async_engine.dispose()
+        return codes, [(stock.code, [p.close for p in prices]) for stock, prices in group_latest_prices(rows)]
+
+    expected = [(stock.code, [p.close for p in prices]) for stock, prices in group_latest_prices(session.exec(latest_prices_statement(depth=2)).all())]
+    assert asyncio.run(read()) == (["AAA", "BBB"], expected)
@@ -0,0 +1,29 @@
+"""DB_PROFILE: SQLAlchemy defaults (baseline) vs a sized pool and SQLite pragmas (tuned)."""
+
+import pytest
+from sqlalchemy import text
+
+from app.db.database import create_db_engine, engine_options, sqlite_pragmas
+
+
+def test_baseline_profile_keeps_sqlalchemy_defaults(tmp_path):
+    assert engine_options(f"sqlite:///{tmp_path / 'x.db'}", "baseline") == {}
+    assert sqlite_pragmas("baseline") == []
+
+
+def test_in_memory_sqlite_has_no_pool_to_size():
+    assert engine_options("sqlite://", "tuned") == {}
+
+
+def test_unknown_profile_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        engine_options(f"sqlite:///{tmp_path / 'x.db'}", "fastest")
+
+
+def test_tuned_profile_sizes_the_pool_and_sets_wal(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_pre_ping"} <= set(engine_options(url, "tuned"))
+    tuned = create_db_engine(url, "tuned")
+    with tuned.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    tuned.dispose()
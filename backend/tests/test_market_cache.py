@@ -0,0 +1,115 @@
+"""Market data cache: single-flight loading, TTL expiry and stale-while-revalidate."""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import market_data
+from app.services.market_data import MarketDataService
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(market_data, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+@pytest.fixture
+def service(clock):
+    market = MarketDataService(cache_ttl=60, stale_ttl=300)
+    yield market
+    market._refresher.shutdown(wait=True)
+    market._quote_pool.shutdown(wait=True)
+
+
+class Loader:
+    """Counts calls; each call returns the next value, optionally after `release` is set."""
+
+    def __init__(self, block=False):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return f"v{self.calls}"
+
+
+def test_concurrent_misses_share_one_fetch(service):
+    loader = Loader(block=True)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service._cached("k", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert loader.started.wait(5)
+    loader.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert loader.calls == 1
+    assert results == ["v1"] * 8
+
+
+def test_fresh_values_are_served_until_the_ttl_then_refetched(service, clock):
+    loader = Loader()
+    assert service._cached("k", loader) == "v1"
+    clock.now += 59
+    assert service._cached("k", loader) == "v1"
+    assert loader.calls == 1
+    # Past the stale window as well: the caller waits for a new fetch
+    clock.now += 60 + 300
+    assert service._cached("k", loader) == "v2"
+    assert loader.calls == 2
+
+
+def test_stale_read_triggers_exactly_one_background_refresh(service, clock):
+    loader = Loader()
+    service._cached("k", loader)
+    loader.release.clear()
+    loader.started.clear()
+    clock.now += 120
+
+    # Served at once while the refresh is blocked
+    assert [service._cached("k", loader) for _ in range(5)] == ["v1"] * 5
+    assert loader.started.wait(5)
+    refresh = service._inflight["k"]
+    loader.release.set()
+    assert refresh.result(5) == "v2"
+    assert loader.calls == 2
+    assert service._cached("k", loader) == "v2"
+    assert loader.calls == 2
+
+
+def test_fresh_skips_the_cached_value(service):
+    loader = Loader()
+    service._cached("k", loader)
+    assert service._cached("k", loader, fresh=True) == "v2"
+    assert service._cached("k", loader) == "v2"
+
+
+def test_loader_errors_are_not_cached(service):
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise market_data.MarketDataUnavailable("down")
+
+    for _ in range(2):
+        with pytest.raises(market_data.MarketDataUnavailable):
+            service._cached("k", failing)
+    assert len(calls) == 2
+    assert service._inflight == {}
+    assert service._cached("k", Loader()) == "v1"
@@ -0,0 +1,101 @@
+"""Live-market poller: snapshot building, listeners and the poll loop."""
+
+import threading
+import time
+
+import pytest
+
+from app.services import market_poller
+from app.services.market_poller import LiveMarketPoller
+
+
+class FakeMarket:
+    def __init__(self):
+        self.failing = set()
+        self.polls = 0
+
+    def get_tunindex(self, fresh=False):
+        self.polls += 1
+        return {"value": 9000.0 + self.polls}
+
+    def get_top_movers(self, limit, fresh=False):
+        return {"gainers": [{"code": "AAA"}], "losers": []}
+
+    def get_stock_quote(self, code, fresh=False):
+        if code in self.failing:
+            return {"code": code, "price": None, "error": "Data unavailable"}
+        return {"code": code, "price": 10.0 + self.polls}
+
+
+@pytest.fixture
+def market():
+    return FakeMarket()
+
+
+@pytest.fixture
+def poller(market, monkeypatch):
+    monkeypatch.setattr(market_poller, "is_market_open", lambda: True)
+    live = LiveMarketPoller(service=market, interval_seconds=60, max_workers=2, stock_codes=lambda: ["AAA", "BBB"])
+    yield live
+    live.stop()
+
+
+def test_failed_quotes_keep_the_last_good_one(poller, market):
+    first = poller.poll_once()
+    market.failing.add("BBB")
+    time.sleep(0.05)
+    second = poller.poll_once()
+    assert second.quotes["AAA"]["price"] == 12.0
+    assert second.quotes["BBB"] is first.quotes["BBB"]
+    assert second.tunindex["value"] == 9002.0
+    # The carried-over quote keeps the time it was fetched, not the new poll's
+    assert second.quote_fetched_at["BBB"] == first.quote_fetched_at["BBB"]
+    assert second.quote_age_seconds("BBB") >= second.quote_age_seconds("AAA") + 0.05
+
+
+def test_symbol_without_a_good_quote_stays_out_of_the_snapshot(poller, market):
+    market.failing.add("BBB")
+    snapshot = poller.poll_once()
+    assert list(snapshot.quotes) == ["AAA"]
+    assert snapshot.quote_age_seconds("BBB") is None
+
+
+def test_stop_interrupts_the_wait(poller):
+    refreshed = threading.Event()
+    poller.add_snapshot_listener(lambda snapshot: refreshed.set())
+    poller.start()
+    assert refreshed.wait(5)
+    assert poller.running
+    started = time.perf_counter()
+    poller.stop()
+    # Waiting on the stop event, not sleeping out the 60 s interval
+    assert time.perf_counter() - started < 2
+    assert not poller.running
+
+
+def test_sub_second_interval_polls_at_that_rate(poller, market):
+    poller.interval = 0.05
+    snapshots = []
+    poller.add_snapshot_listener(snapshots.append)
+    poller.start()
+    time.sleep(0.5)
+    poller.stop()
+    # Several polls in half a second, but paced by the interval rather than spinning
+    assert 3 <= len(snapshots) <= 15
+    assert market.polls == len(snapshots)
+
+
+def test_failing_listener_does_not_stop_the_loop(poller):
+    calls = []
+
+    def broken(snapshot):
+        calls.append(snapshot)
+        raise RuntimeError("boom")
+
+    poller.interval = 0.05
+    poller.add_snapshot_listener(broken)
+    poller.start()
+    time.sleep(0.3)
+    poller.stop()
+    assert len(calls) >= 2
+    assert poller.last_error is None
@@ -0,0 +1,119 @@
+"""Live market routes served from the poller snapshot."""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import market
+from app.services.market_poller import MarketSnapshot
+
+
+class FakeMarketData:
+    def __init__(self):
+        self.requested = []
+        self.batches = []
+
+    def get_stock_quote(self, code, fresh=False):
+        self.requested.append(code)
+        if code == "DOWN":
+            return {"code": code, "price": None, "error": "Data unavailable"}
+        return {"code": code, "price": 5.0}
+
+    def get_stock_quotes(self, codes):
+        self.batches.append(list(codes))
+        quotes, errors = {}, {}
+        for code in codes:
+            quote = self.get_stock_quote(code)
+            if quote.get("error"):
+                errors[code] = quote["error"]
+            else:
+                quotes[code] = quote
+        return quotes, errors
+
+
+@pytest.fixture
+def market_data(monkeypatch):
+    fake = FakeMarketData()
+    monkeypatch.setattr(market, "market_data_service", fake)
+    return fake
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    now = time.time()
+    live = MarketSnapshot(
+        quotes={"AAA": {"code": "AAA", "price": 10.0}, "BBB": {"code": "BBB", "price": 20.0}},
+        quote_fetched_at={"AAA": now - 1, "BBB": now - 120},
+        updated_at=now - 1,
+    )
+    monkeypatch.setattr(market.live_market_poller, "snapshot", live)
+    return live
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(market.router)
+    return TestClient(app)
+
+
+def test_quote_from_the_snapshot_reports_its_own_age(client, snapshot, market_data):
+    fresh = client.get("/api/market/live/quote/AAA").json()
+    carried = client.get("/api/market/live/quote/BBB").json()
+    assert fresh["price"] == 10.0
+    assert fresh["snapshot_age_seconds"] == pytest.approx(1, abs=0.5)
+    assert carried["snapshot_age_seconds"] == pytest.approx(120, abs=0.5)
+    assert market_data.requested == []
+
+
+def test_quote_missing_from_the_snapshot_is_fetched_live(client, snapshot, market_data):
+    response = client.get("/api/market/live/quote/CCC")
+    assert response.status_code == 200
+    assert response.json() == {"code": "CCC", "price": 5.0, "snapshot_age_seconds": None}
+
+
+def test_unavailable_quote_is_a_503(client, snapshot, market_data):
+    response = client.get("/api/market/live/quote/DOWN")
+    assert response.status_code == 503
+    assert "Data unavailable" in response.json()["detail"]
+
+
+def test_batch_mixes_snapshot_and_live_quotes_with_per_symbol_errors(client, snapshot, market_data):
+    response = client.get("/api/market/live/quotes", params={"codes": "AAA, CCC,DOWN,BBB"})
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["quotes"]) == ["AAA", "CCC", "BBB"]
+    assert body["quotes"]["CCC"] == {"code": "CCC", "price": 5.0}
+    assert body["errors"] == {"DOWN": "Data unavailable"}
+    # Oldest snapshot quote served
+    assert body["snapshot_age_seconds"] == pytest.approx(120, abs=0.5)
+    assert market_data.batches == [["CCC", "DOWN"]]
+
+
+def test_batch_fetches_each_repeated_code_once(client, snapshot, market_data):
+    body = client.get("/api/market/live/quotes", params={"codes": "CCC,AAA,CCC,,CCC,AAA"}).json()
+    assert list(body["quotes"]) == ["CCC", "AAA"]
+    assert market_data.batches == [["CCC"]]
+
+
+def test_batch_from_the_snapshot_alone_makes_no_fetch(client, snapshot, market_data):
+    body = client.get("/api/market/live/quotes", params={"codes": "AAA"}).json()
+    assert body["snapshot_age_seconds"] == pytest.approx(1, abs=0.5)
+    assert market_data.batches == []
+
+
+def test_batch_is_capped(client, snapshot, market_data):
+    codes = [f"S{i}" for i in range(market.MAX_BATCH_QUOTES + 1)]
+    response = client.get("/api/market/live/quotes", params={"codes": ",".join(codes)})
+    assert response.status_code == 400
+    # The cap counts distinct codes
+    repeated = ",".join(codes[:market.MAX_BATCH_QUOTES] * 2)
+    assert client.get("/api/market/live/quotes", params={"codes": repeated}).status_code == 200
+    assert market_data.batches == [codes[:market.MAX_BATCH_QUOTES]]
+
+
+def test_batch_without_codes_is_a_400(client, snapshot, market_data):
+    assert client.get("/api/market/live/quotes", params={"codes": " , "}).status_code == 400
+    assert market_data.batches == []
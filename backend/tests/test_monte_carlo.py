@@ -0,0 +1,69 @@
+"""Monte Carlo paths: reproducibility, bounds and agreement with the window's moments."""
+
+import numpy as np
+import pytest
+
+from app.services.monte_carlo import run_simulation, simulate_paths
+from app.services.portfolio_risk import ReturnsWindow
+
+
+def _window(returns, codes=("AAA", "BBB")):
+    returns = np.asarray(returns, dtype=float)
+    return ReturnsWindow(
+        codes=tuple(codes), missing=(), dates=tuple(range(len(returns))), returns=returns,
+        market=returns.mean(axis=1), covariance=np.cov(returns, rowvar=False, ddof=1).reshape(len(codes), len(codes)),
+    )
+
+
+@pytest.fixture
+def window():
+    rng = np.random.default_rng(11)
+    return _window(rng.multivariate_normal([0.001, 0.0], [[4e-4, 1e-4], [1e-4, 1e-4]], size=250))
+
+
+def test_seed_makes_runs_reproducible(window):
+    first = run_simulation(window, {"AAA": 1, "BBB": 1}, 1000.0, horizon=10, paths=500, seed=5)
+    again = run_simulation(window, {"AAA": 1, "BBB": 1}, 1000.0, horizon=10, paths=500, seed=5)
+    assert first["terminal"] == again["terminal"]
+    assert first["seed"] == 5
+    assert run_simulation(window, {"AAA": 1}, 1000.0, horizon=5, paths=100)["seed"] is not None
+
+
+@pytest.mark.parametrize("method", ["bootstrap", "gaussian"])
+def test_terminal_moments_follow_the_window(window, method):
+    weights = np.array([0.5, 0.5])
+    values = simulate_paths(window, weights, horizon=20, paths=20000, method=method, seed=1)
+    assert values.shape == (20000, 21)
+    assert np.all(values[:, 0] == 1.0) and np.all(values >= 0)
+    daily = window.returns @ weights
+    log_growth = np.log(values[:, -1])
+    # Compounded 20-day growth: mean ~ 20 x daily mean, sd ~ sqrt(20) x daily sd
+    assert log_growth.mean() == pytest.approx(20 * np.log1p(daily).mean(), abs=0.004)
+    assert log_growth.std() == pytest.approx(np.sqrt(20) * daily.std(), rel=0.05)
+
+
+def test_bootstrap_only_replays_historical_days():
+    window = _window([[0.01, 0.01], [-0.01, -0.01]])
+    values = simulate_paths(window, np.array([0.5, 0.5]), horizon=3, paths=50, seed=2)
+    steps = values[:, 1:] / values[:, :-1]
+    assert np.allclose(np.minimum(abs(steps - 1.01), abs(steps - 0.99)), 0, atol=1e-6)
+
+
+def test_summary_and_allocation(window):
+    result = run_simulation(window, {"AAA": 300.0, "BBB": 100.0, "ZZZ": 50.0}, 400.0, horizon=5, paths=2000, seed=3)
+    assert result["allocation"] == {"AAA": 0.75, "BBB": 0.25}
+    assert result["excluded"] == ["ZZZ"]
+    bands = result["bands"]
+    assert all(bands["p5"][t] <= bands["p50"][t] <= bands["p95"][t] for t in range(6))
+    assert bands["p50"][0] == pytest.approx(400.0)
+    assert 0.0 <= result["terminal"]["probability_of_loss"] <= 1.0
+    assert result["terminal"]["cvar"]["pct"] >= result["terminal"]["var"]["pct"]
+
+
+def test_invalid_requests(window):
+    with pytest.raises(ValueError):
+        run_simulation(window, {"ZZZ": 1.0}, 100.0)
+    with pytest.raises(ValueError):
+        run_simulation(window, {"AAA": 1.0}, 100.0, horizon=1000, paths=100_000)
+    with pytest.raises(ValueError):
+        simulate_paths(window, np.array([1.0, 0.0]), 5, 10, method="sobol")
@@ -0,0 +1,57 @@
+"""Pool instrumentation and request-scoped sessions."""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session, select
+
+from app.db import database
+from app.db.database import Stock, create_db_engine, get_session
+from app.db.pool_metrics import PoolMetrics, instrumented_pool_class
+
+
+def test_checkouts_are_counted_and_connections_returned(tmp_path):
+    metrics = PoolMetrics()
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", "tuned", metrics=metrics)
+    for _ in range(3):
+        with Session(db_engine) as session:
+            session.execute(text("SELECT 1"))
+    stats = metrics.snapshot(db_engine.pool)
+    assert (stats["checkouts"], stats["checked_out"], stats["open_connections"]) == (3, 0, 1)
+    assert stats["pool"]["class"] == "InstrumentedQueuePool"
+    assert stats["pool"]["checked_out"] == 0
+    db_engine.dispose()
+
+
+def test_exhausted_pool_records_the_wait_and_the_timeout(tmp_path):
+    metrics = PoolMetrics()
+    db_engine = create_engine(
+        f"sqlite:///{tmp_path / 'tiny.db'}", poolclass=instrumented_pool_class(QueuePool, metrics),
+        pool_size=1, max_overflow=0, pool_timeout=0.1, connect_args={"check_same_thread": False},
+    )
+    metrics.attach(db_engine)
+    held = db_engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        db_engine.connect()
+    threading.Timer(0.05, held.close).start()
+    with db_engine.connect():
+        pass
+    stats = metrics.snapshot()
+    assert stats["timeouts"] == 1
+    assert stats["wait_ms"]["max"] >= 50
+    assert stats["peak_checked_out"] == 1
+    db_engine.dispose()
+
+
+def test_request_session_is_closed_after_the_request(monkeypatch, engine):
+    metrics = PoolMetrics()
+    metrics.attach(engine)
+    monkeypatch.setattr(database, "engine", engine)
+    dependency = get_session()
+    next(dependency).exec(select(Stock)).all()
+    assert metrics.snapshot()["checked_out"] == 1
+    dependency.close()
+    assert metrics.snapshot()["checked_out"] == 0
@@ -0,0 +1,87 @@
+"""Portfolio value history replayed from the trade ledger."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.database import Trade
+from app.services.portfolio_history import history_cache, portfolio_history
+
+USER = "history-user"
+START = datetime(2024, 1, 1)
+AAA = [10.0, 11.0, 12.0, 11.0, 13.0, 14.0, 14.0, 15.0, 16.0, 17.0]
+BBB = [20.0, 20.0, 21.0, 22.0, 22.0, 23.0, None, 25.0, 24.0, 26.0]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    history_cache.clear()
+    yield
+    history_cache.clear()
+
+
+def _trade(session, day, code, side, quantity, price):
+    session.add(Trade(
+        user_id=USER, stock_code=code, side=side, quantity=quantity, price=price,
+        executed_at=START + timedelta(days=day, hours=11),
+    ))
+    session.commit()
+
+
+@pytest.fixture
+def ledger(session, add_prices):
+    add_prices({"AAA": AAA, "BBB": BBB}, start=START)
+    _trade(session, 1, "AAA", "buy", 10, 11.0)
+    _trade(session, 3, "BBB", "buy", 5, 22.0)
+    _trade(session, 5, "AAA", "sell", 4, 14.0)
+
+
+def _expected(day):
+    """Value and net invested on `day` the long way."""
+    bbb = BBB[day] if BBB[day] is not None else BBB[day - 1]
+    aaa_held = (10 if day >= 1 else 0) - (4 if day >= 5 else 0)
+    bbb_held = 5 if day >= 3 else 0
+    invested = (110.0 if day >= 1 else 0) + (110.0 if day >= 3 else 0) - (56.0 if day >= 5 else 0)
+    return aaa_held * AAA[day] + bbb_held * bbb, invested
+
+
+def test_daily_values_replay_the_trades(session, ledger):
+    history = portfolio_history(session, USER, 365)
+    points = history["points"]
+    # Starts on the first day anything is held; BBB's missing close is carried forward
+    assert [p["date"] for p in points] == [START + timedelta(days=d) for d in range(1, 10)]
+    for day, point in enumerate(points, start=1):
+        value, invested = _expected(day)
+        assert point["value"] == pytest.approx(value)
+        assert point["invested"] == pytest.approx(invested)
+        assert point["pnl"] == pytest.approx(value - invested)
+
+    summary = history["summary"]
+    assert summary["end_value"] == pytest.approx(6 * 17 + 5 * 26)
+    assert summary["high"] == pytest.approx(max(p["value"] for p in points))
+
+
+def test_time_weighted_return_ignores_deposits(session, ledger):
+    summary = portfolio_history(session, USER, 365)["summary"]
+    index = 1.0
+    for day in range(2, 10):
+        previous, _ = _expected(day - 1)
+        value, invested = _expected(day)
+        flow = invested - _expected(day - 1)[1]
+        index *= value / (previous + flow)
+    assert summary["time_weighted_return_pct"] == pytest.approx((index - 1) * 100)
+    assert summary["max_drawdown_pct"] >= 0
+
+
+def test_cached_until_the_next_trade(session, ledger):
+    first = portfolio_history(session, USER, 365)
+    assert portfolio_history(session, USER, 365) is first
+    _trade(session, 8, "BBB", "sell", 5, 24.0)
+    latest = portfolio_history(session, USER, 365)
+    assert latest is not first
+    assert latest["points"][-1]["value"] == pytest.approx(6 * 17)
+
+
+def test_no_trades(session, add_prices):
+    add_prices({"AAA": AAA}, start=START)
+    assert portfolio_history(session, USER, 365) == {"as_of": START + timedelta(days=9), "points": [], "summary": None}
@@ -0,0 +1,82 @@
+"""Portfolio risk from a returns window, checked against plain per-day arithmetic."""
+
+import math
+from datetime import datetime
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from app.services.portfolio_risk import build_window, portfolio_risk, returns_window, risk_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    risk_cache.clear()
+    yield
+    risk_cache.clear()
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(3)
+    market = rng.normal(0.0005, 0.01, 80)
+    series = {
+        "AAA": 10 * np.cumprod(1 + 1.2 * market + rng.normal(0, 0.004, 80)),
+        "BBB": 40 * np.cumprod(1 + 0.5 * market + rng.normal(0, 0.008, 80)),
+        "CCC": 5 * np.cumprod(1 + rng.normal(0, 0.02, 80)),
+    }
+    return {code: [float(c) for c in values] for code, values in series.items()}
+
+
+def _returns(series, window):
+    closes = np.array(series[-(window + 1):])
+    return closes[1:] / closes[:-1] - 1
+
+
+def test_risk_matches_a_direct_computation(session, add_prices, closes):
+    add_prices(closes)
+    window = returns_window(session, ["AAA", "BBB"], 60)
+    assert window.codes == ("AAA", "BBB") and len(window.returns) == 60
+
+    result = portfolio_risk(window, {"AAA": 3000.0, "BBB": 1000.0}, confidence=0.95)
+    daily = {code: _returns(series, 60) for code, series in closes.items()}
+    portfolio = 0.75 * daily["AAA"] + 0.25 * daily["BBB"]
+    market = np.mean([daily[code] for code in closes], axis=0)
+
+    sigma = portfolio.std(ddof=1)
+    assert result["volatility"]["daily_pct"] == pytest.approx(sigma * 100)
+    assert result["volatility"]["annualized_pct"] == pytest.approx(sigma * math.sqrt(252) * 100)
+    cutoff = np.quantile(portfolio, 0.05)
+    assert result["var"]["historical"]["pct"] == pytest.approx(-cutoff * 100)
+    assert result["cvar"]["historical"]["amount"] == pytest.approx(-portfolio[portfolio <= cutoff].mean() * 4000)
+    z = NormalDist().inv_cdf(0.05)
+    assert result["var"]["parametric"]["pct"] == pytest.approx(-(portfolio.mean() + z * sigma) * 100)
+    beta = np.cov(portfolio, market, ddof=1)[0, 1] / market.var(ddof=1)
+    assert result["beta"] == pytest.approx(beta)
+    assert result["correlation"]["matrix"][0][1] == pytest.approx(np.corrcoef(daily["AAA"], daily["BBB"])[0, 1], abs=1e-4)
+    assert sum(stock["risk_contribution_pct"] for stock in result["stocks"]) == pytest.approx(100.0)
+
+
+def test_window_is_cached_per_price_date(session, add_prices, closes):
+    add_prices(closes)
+    first = returns_window(session, ["BBB", "AAA"], 30)
+    assert returns_window(session, ["AAA", "BBB"], 30) is first
+    add_prices({"AAA": [closes["AAA"][-1]]}, start=datetime(2024, 3, 21))
+    assert returns_window(session, ["AAA", "BBB"], 30) is not first
+
+
+def test_short_history_is_reported_missing(session, add_prices, closes):
+    add_prices({**closes, "NEW": [None] * 75 + [1.0, 1.1, 1.2, 1.1, 1.0]})
+    window = returns_window(session, ["AAA", "NEW"], 60)
+    assert (window.codes, window.missing) == (("AAA",), ("NEW",))
+    result = portfolio_risk(window, {"AAA": 100.0, "NEW": 50.0})
+    assert result["excluded"] == ["NEW"]
+    assert [stock["stock_code"] for stock in result["stocks"]] == ["AAA"]
+
+
+def test_not_enough_dates(session, add_prices):
+    add_prices({"AAA": [1.0, 1.1]})
+    assert returns_window(session, ["AAA"], 60) is None
+    empty = build_window([], ["AAA"], {})
+    assert portfolio_risk(empty, {"AAA": 10.0})["stocks"] == []
@@ -0,0 +1,63 @@
+"""Position valuation against one latest-price snapshot."""
+
+import pytest
+
+from app.db.database import Holding
+from app.services.portfolio_valuation import price_snapshot, snapshot_statement, value_portfolios, value_positions
+
+
+def _holding(user_id, code, quantity, avg_buy_price):
+    return Holding(user_id=user_id, stock_code=code, quantity=quantity, cost_basis=quantity * avg_buy_price, avg_buy_price=avg_buy_price)
+
+
+@pytest.fixture
+def snapshot(session, add_prices):
+    add_prices({"AAA": [9.0, 10.0, 12.0], "BBB": [50.0, 40.0]})
+    return price_snapshot(session.exec(snapshot_statement(["AAA", "BBB", "ZZZ"])).all())
+
+
+def test_snapshot_has_latest_and_previous_close(snapshot):
+    assert (snapshot["AAA"].close, snapshot["AAA"].previous_close) == (12.0, 10.0)
+    assert (snapshot["BBB"].close, snapshot["BBB"].previous_close) == (40.0, 50.0)
+    assert "ZZZ" not in snapshot
+
+
+def test_positions_and_totals(snapshot):
+    positions = [_holding("u", "AAA", 10, 8.0), _holding("u", "BBB", 2, 45.0), _holding("u", "ZZZ", 5, 3.0)]
+    result = value_positions(positions, snapshot)
+    aaa, bbb, zzz = result["positions"]
+
+    assert (aaa["current_value"], aaa["unrealized_pnl"], aaa["day_change"]) == (120.0, 40.0, 20.0)
+    assert aaa["unrealized_pnl_pct"] == pytest.approx(50.0)
+    assert aaa["day_change_pct"] == pytest.approx(20.0)
+    assert (bbb["unrealized_pnl"], bbb["day_change"]) == (-10.0, -20.0)
+    # Unpriced: no P&L, counted at cost
+    assert (zzz["current_price"], zzz["unrealized_pnl"], zzz["day_change"]) == (None, None, None)
+
+    summary = result["summary"]
+    assert summary["market_value"] == pytest.approx(120 + 80 + 15)
+    assert summary["cost_basis"] == pytest.approx(80 + 90 + 15)
+    assert summary["unrealized_pnl"] == pytest.approx(30.0)
+    assert summary["day_change"] == pytest.approx(0.0)
+    assert summary["unpriced"] == 1
+    assert sum(item["weight"] for item in result["positions"]) == pytest.approx(1.0)
+
+
+def test_empty_portfolio():
+    result = value_positions([], {})
+    assert result["positions"] == []
+    assert result["summary"]["market_value"] == 0.0
+
+
+def test_every_user_at_once_matches_one_by_one(snapshot):
+    positions = [
+        _holding("a", "AAA", 10, 8.0), _holding("a", "BBB", 1, 60.0),
+        _holding("b", "BBB", 3, 30.0),
+        _holding("c", "ZZZ", 4, 2.0),
+    ]
+    ranked = value_portfolios(positions, snapshot)
+    assert [entry["user_id"] for entry in ranked] == ["b", "a", "c"]
+    for entry in ranked:
+        mine = value_positions([p for p in positions if p.user_id == entry["user_id"]], snapshot)["summary"]
+        assert entry["market_value"] == pytest.approx(mine["market_value"])
+        assert entry["return_pct"] == pytest.approx(mine["unrealized_pnl_pct"])
@@ -0,0 +1,117 @@
+"""Price-target rules fire once, on the first quote at or past their target."""
+
+import pytest
+from sqlmodel import Session, select
+
+from app.db.database import PriceAlertRule
+from app.services import price_alerts
+from app.services.price_alerts import PriceAlertEngine, PriceTarget
+
+
+@pytest.fixture
+def fired():
+    return []
+
+
+@pytest.fixture
+def engine_with_rules(fired):
+    alerts = PriceAlertEngine(on_fire=lambda rules, price: fired.append((sorted(r.id for r in rules), price)))
+    alerts.add_many([
+        PriceTarget(1, "u1", "AAA", "above", 11.0),
+        PriceTarget(2, "u2", "AAA", "above", 12.0),
+        PriceTarget(3, "u1", "AAA", "below", 9.0),
+        PriceTarget(4, "u2", "AAA", "below", 8.0),
+        PriceTarget(5, "u1", "BBB", "above", 1.0),
+    ])
+    return alerts
+
+
+def test_upward_crossing_fires_above_targets_only(engine_with_rules, fired):
+    assert engine_with_rules.on_tick("AAA", 10.5) == []
+    assert [r.id for r in engine_with_rules.on_tick("AAA", 12.0)] == [1, 2]
+    assert fired == [([1, 2], 12.0)]
+
+
+def test_downward_crossing_fires_below_targets_only(engine_with_rules, fired):
+    assert sorted(r.id for r in engine_with_rules.on_tick("AAA", 8.5)) == [3]
+    assert sorted(r.id for r in engine_with_rules.on_tick("AAA", 7.0)) == [4]
+    assert fired == [([3], 8.5), ([4], 7.0)]
+
+
+def test_rules_fire_once(engine_with_rules, fired):
+    engine_with_rules.on_tick("AAA", 11.0)
+    engine_with_rules.on_tick("AAA", 10.0)
+    engine_with_rules.on_tick("AAA", 11.5)
+    assert fired == [([1], 11.0)]
+    assert engine_with_rules.stats()["active_rules"] == 4
+
+
+def test_other_stocks_and_missing_prices_are_ignored(engine_with_rules, fired):
+    assert engine_with_rules.on_tick("CCC", 100.0) == []
+    assert engine_with_rules.on_tick("BBB", None) == []
+    assert fired == []
+
+
+def test_removed_rules_do_not_fire(engine_with_rules, fired):
+    assert engine_with_rules.remove(2)
+    assert not engine_with_rules.remove(2)
+    engine_with_rules.on_tick("AAA", 20.0)
+    assert fired == [([1], 20.0)]
+
+
+def test_stock_codes_are_matched_upper_case(fired):
+    alerts = PriceAlertEngine(on_fire=lambda rules, price: fired.append((sorted(r.id for r in rules), price)))
+    alerts.add_many([PriceTarget(1, "u1", "sfbt", "above", 11.0), PriceTarget(2, "u1", "SFBT", "above", 12.0)])
+    assert [r.id for r in alerts.on_tick("Sfbt", 12.0)] == [1, 2]
+    alerts.add(PriceTarget(3, "u1", "biat", "below", 9.0))
+    assert alerts.remove(3)
+    assert alerts.on_tick("BIAT", 1.0) == []
+    assert fired == [([1, 2], 12.0)]
+
+
+def test_equal_targets_fire_together():
+    alerts = PriceAlertEngine(on_fire=lambda rules, price: None)
+    alerts.add_many(PriceTarget(i, "u1", "AAA", "below", 9.0) for i in range(5))
+    assert alerts.on_tick("AAA", 9.5) == []
+    assert sorted(r.id for r in alerts.on_tick("AAA", 9.0)) == [0, 1, 2, 3, 4]
+
+
+def test_removed_rules_are_dropped_from_the_heaps():
+    alerts = PriceAlertEngine(on_fire=lambda rules, price: None)
+    alerts.add_many(PriceTarget(i, "u1", "AAA", "above", 10.0 + i) for i in range(1000))
+    for i in range(1, 1000):
+        alerts.remove(i)
+    book = alerts._books["AAA"]
+    assert len(book) == 1
+    # Rebuilt once removed entries outnumbered the active ones
+    assert len(book.above) < 200
+    assert [r.id for r in alerts.on_tick("AAA", 5000.0)] == [0]
+    assert alerts.stats()["active_rules"] == 0
+
+
+def test_invalid_direction_is_rejected(engine_with_rules):
+    with pytest.raises(ValueError):
+        engine_with_rules.add(PriceTarget(9, "u1", "AAA", "sideways", 1.0))
+
+
+def test_fired_rules_are_deactivated_and_alerted(engine, monkeypatch):
+    with Session(engine) as session:
+        session.add_all([
+            PriceAlertRule(user_id="u1", stock_code="AAA", direction="above", target_price=11.0),
+            PriceAlertRule(user_id="u2", stock_code="AAA", direction="below", target_price=9.0),
+            PriceAlertRule(user_id="u3", stock_code="AAA", direction="above", target_price=5.0, is_active=False),
+        ])
+        session.commit()
+    submitted = []
+    monkeypatch.setattr(price_alerts, "session_scope", lambda: Session(engine))
+    monkeypatch.setattr(price_alerts.alert_pipeline, "submit", lambda events: submitted.extend(events))
+
+    alerts = PriceAlertEngine()
+    assert alerts.load() == 2
+    alerts.on_tick("AAA", 11.2)
+
+    with Session(engine) as session:
+        rules = {rule.user_id: rule for rule in session.exec(select(PriceAlertRule))}
+    assert (rules["u1"].is_active, rules["u1"].triggered_price) == (False, 11.2)
+    assert rules["u2"].is_active
+    assert [(e.user_id, e.alert_type) for e in submitted] == [("u1", "PRICE_TARGET")]
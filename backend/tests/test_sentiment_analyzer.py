@@ -0,0 +1,56 @@
+"""Sentiment analyzer backed by a worker pool: lazy start and versioned cache keys."""
+
+import sys
+from pathlib import Path
+
+NLP_PATH = Path(__file__).resolve().parent.parent.parent / "nlp"
+if str(NLP_PATH) not in sys.path:
+    sys.path.insert(0, str(NLP_PATH))
+
+from sentiment.analyzer import SentimentAnalyzer  # noqa: E402
+from sentiment.cache import SentimentCache  # noqa: E402
+
+
+class FakePool:
+    """Stands in for SentimentWorkerPool: scores every text 0.5 once started."""
+
+    def __init__(self):
+        self.version = None
+        self.starts = 0
+        self.calls = 0
+
+    def start(self):
+        self.starts += 1
+        self.version = "fake-model:fp32"
+
+    def analyze_texts(self, texts, languages=None):
+        self.calls += 1
+        return [{"score": 0.5, "label": "positive", "confidence": 0.9, "language": lang} for lang in languages]
+
+
+def test_version_does_not_start_the_pool():
+    pool = FakePool()
+    analyzer = SentimentAnalyzer(workers=pool)
+    assert analyzer.version is None
+    assert pool.starts == 0
+
+
+def test_first_batch_starts_the_pool_and_keys_the_cache_by_its_version(tmp_path):
+    pool = FakePool()
+    cache = SentimentCache(str(tmp_path / "sentiment.db"))
+    analyzer = SentimentAnalyzer(workers=pool, cache=cache)
+    texts = ["La société annonce une hausse de ses bénéfices", "Résultats en baisse pour le groupe"]
+
+    first = analyzer.analyze_texts(texts, ["fr", "fr"])
+    assert pool.starts == 1 and analyzer.version == "fake-model:fp32"
+    assert [r["score"] for r in first] == [0.5, 0.5]
+
+    # Served from the cache under the pool's version
+    assert analyzer.analyze_texts(texts, ["fr", "fr"]) == first
+    assert pool.calls == 1
+
+
+def test_short_texts_never_start_the_pool():
+    pool = FakePool()
+    SentimentAnalyzer(workers=pool).analyze_texts(["", "court"])
+    assert pool.starts == 0
@@ -0,0 +1,43 @@
+"""Stock routes that read the price history: anomaly and recommendation."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import stocks
+from app.db.database import get_session
+
+# Steady closes and volumes, then a 10% jump on twenty times the volume
+CLOSES = [10.0 + 0.01 * day for day in range(20)] + [11.2]
+
+
+@pytest.fixture
+def client(session, add_prices):
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=len(CLOSES))
+    add_prices({"SFBT": CLOSES[:-1]}, start=start)
+    add_prices({"SFBT": CLOSES[-1:]}, start=start + timedelta(days=len(CLOSES) - 1), volume=20000)
+    app = FastAPI()
+    app.include_router(stocks.router)
+    app.dependency_overrides[get_session] = lambda: session
+    return TestClient(app)
+
+
+def test_anomaly_compares_the_latest_day_with_the_history(client):
+    response = client.get("/api/stocks/SFBT/anomaly")
+    assert response.status_code == 200
+    result = response.json()
+    assert result["stock"] == "SFBT"
+    assert result["is_anomaly"] is True
+
+
+def test_recommendation_combines_prediction_sentiment_and_anomalies(client):
+    response = client.get("/api/stocks/SFBT/recommendation")
+    assert response.status_code == 200
+    assert response.json()["action"] in ("BUY", "HOLD", "SELL")
+
+
+def test_unknown_stock_is_a_404(client):
+    assert client.get("/api/stocks/NOPE/anomaly").status_code == 404
+    assert client.get("/api/stocks/NOPE/recommendation").status_code == 404
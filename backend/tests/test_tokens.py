@@ -0,0 +1,96 @@
+"""Local access-token verification and the authenticated-user caches."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app.core import auth, tokens
+from app.core.tokens import InvalidToken, claims_cache, verify_token
+
+SECRET = "test-jwt-secret"
+
+
+@pytest.fixture(autouse=True)
+def hs256(monkeypatch):
+    monkeypatch.setattr(tokens, "JWT_SECRET", SECRET)
+    monkeypatch.setattr(tokens, "JWT_ALGORITHM", "HS256")
+    monkeypatch.setattr(tokens, "JWT_AUDIENCE", "authenticated")
+    claims_cache.clear()
+    auth.user_cache.clear()
+    yield
+    claims_cache.clear()
+    auth.user_cache.clear()
+
+
+def _token(secret: str = SECRET, **overrides) -> str:
+    claims = {"sub": "uid-1", "email": "a@example.com", "aud": "authenticated", "exp": int(time.time()) + 600}
+    claims.update(overrides)
+    return jwt.encode({k: v for k, v in claims.items() if v is not None}, secret, algorithm="HS256")
+
+
+def test_valid_token_is_verified_and_cached():
+    token = _token()
+    assert verify_token(token)["sub"] == "uid-1"
+    assert claims_cache.get(token)["email"] == "a@example.com"
+
+
+def test_forged_signature_is_rejected():
+    with pytest.raises(InvalidToken):
+        verify_token(_token(secret="someone-else"))
+
+
+def test_missing_exp_is_rejected_and_not_cached():
+    token = _token(exp=None)
+    with pytest.raises(InvalidToken):
+        verify_token(token)
+    assert claims_cache.get(token) is None
+
+
+def test_expired_token_is_rejected():
+    with pytest.raises(InvalidToken):
+        verify_token(_token(exp=int(time.time()) - 10))
+
+
+def test_wrong_audience_is_rejected():
+    with pytest.raises(InvalidToken):
+        verify_token(_token(aud="anon"))
+
+
+@pytest.mark.parametrize("secret", ["", tokens.JWT_SECRET_PLACEHOLDER])
+def test_unconfigured_secret_rejects_every_token(monkeypatch, secret):
+    monkeypatch.setattr(tokens, "JWT_SECRET", secret)
+    assert not tokens.signing_secret_configured()
+    with pytest.raises(InvalidToken):
+        verify_token(_token(secret=secret or "x"))
+
+
+def test_claims_are_not_cached_past_exp():
+    token = _token(exp=int(time.time()) + 2)
+    verify_token(token)
+    expires_at, _ = claims_cache._entries[token]
+    assert expires_at <= time.monotonic() + 2
+
+
+def _current_user(token, session):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(auth.get_current_user(credentials, session))
+
+
+def test_current_user_is_created_once_then_served_from_cache(monkeypatch, session):
+    monkeypatch.setattr(auth, "DEMO_MODE", False)
+    token = _token()
+    user = _current_user(token, session)
+    assert (user.supabase_uid, user.email) == ("uid-1", "a@example.com")
+    # Second request: both caches warm, no DB needed
+    assert _current_user(token, None).id == user.id
+
+
+def test_current_user_rejects_forged_token(monkeypatch, session):
+    monkeypatch.setattr(auth, "DEMO_MODE", False)
+    with pytest.raises(HTTPException) as excinfo:
+        _current_user(_token(secret="someone-else"), session)
+    assert excinfo.value.status_code == 401
@@ -0,0 +1,176 @@
+"""FIFO lot matching, holdings and the ledger backfill."""
+
+import threading
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session, select
+
+from app.db.database import Holding, Portfolio, Trade
+from app.services import trade_ledger
+from app.services.portfolio_valuation import value_positions
+from app.services.trade_ledger import (
+    InsufficientQuantity,
+    PositionNotFound,
+    backfill_ledger,
+    first_lot_statement,
+    record_buy,
+    record_sell,
+    trades_page,
+)
+
+USER = "ledger-user"
+
+
+def _lots(session, code="AAA"):
+    return [
+        (lot.quantity, lot.avg_buy_price)
+        for lot in session.exec(select(Portfolio).where(Portfolio.user_id == USER, Portfolio.stock_code == code).order_by(Portfolio.id))
+    ]
+
+
+def test_partial_sell_spans_lots_oldest_first(session):
+    record_buy(session, USER, "AAA", 10, 10.0)
+    record_buy(session, USER, "AAA", 10, 20.0)
+    record_buy(session, USER, "AAA", 10, 30.0)
+
+    trade, holding = record_sell(session, USER, "AAA", 15, 25.0)
+
+    # 10 @ 10 and 5 @ 20 consumed: cost 200, proceeds 375
+    assert trade.realized_pnl == pytest.approx(175.0)
+    assert _lots(session) == [(5, 20.0), (10, 30.0)]
+    assert holding.quantity == 15
+    assert holding.cost_basis == pytest.approx(400.0)
+    assert holding.avg_buy_price == pytest.approx(400.0 / 15)
+    assert holding.realized_pnl == pytest.approx(175.0)
+
+
+def test_selling_everything_closes_the_position(session):
+    record_buy(session, USER, "AAA", 4, 12.5)
+    record_buy(session, USER, "AAA", 6, 7.3)
+    _, holding = record_sell(session, USER, "AAA", 10, 9.0)
+    assert _lots(session) == []
+    assert (holding.quantity, holding.cost_basis, holding.avg_buy_price) == (0, 0.0, 0.0)
+    with pytest.raises(PositionNotFound):
+        record_sell(session, USER, "AAA", 1, 9.0)
+
+
+def test_oversell_is_rejected_without_writing(session):
+    record_buy(session, USER, "AAA", 10, 10.0)
+    record_buy(session, USER, "AAA", 5, 12.0)
+    with pytest.raises(InsufficientQuantity):
+        record_sell(session, USER, "AAA", 16, 11.0)
+    assert _lots(session) == [(10, 10.0), (5, 12.0)]
+    assert [t.side for t in session.exec(select(Trade))] == ["buy", "buy"]
+    assert session.exec(select(Holding)).one().quantity == 15
+
+
+def test_unknown_position_is_rejected(session):
+    with pytest.raises(PositionNotFound):
+        record_sell(session, USER, "ZZZ", 1, 1.0)
+
+
+def test_trades_page_walks_back_by_id(session):
+    for price in range(1, 6):
+        record_buy(session, USER, "AAA", 1, float(price))
+    first = trades_page(session, USER, limit=2)
+    second = trades_page(session, USER, limit=2, before=first[-1].id)
+    last = trades_page(session, USER, limit=2, before=second[-1].id)
+    assert [t.price for t in first + second + last] == [5.0, 4.0, 3.0, 2.0, 1.0]
+    assert trades_page(session, USER, limit=2, before=last[-1].id) == []
+
+
+def test_position_id_is_the_oldest_open_lot(session):
+    _, first = record_buy(session, USER, "AAA", 10, 10.0)
+    _, second = record_buy(session, USER, "AAA", 10, 20.0)
+    holding = session.exec(select(Holding)).one()
+    lot_ids = dict(session.exec(first_lot_statement(USER)).all())
+    item = value_positions([holding], {}, lot_ids)["positions"][0]
+    assert (item["id"], item["holding_id"]) == (first.id, holding.id)
+
+    record_sell(session, USER, "AAA", 10, 15.0)
+    assert dict(session.exec(first_lot_statement(USER)).all()) == {"AAA": second.id}
+
+
+def test_concurrent_first_buys_share_one_holding(engine):
+    errors = []
+    barrier = threading.Barrier(4)
+
+    def buy():
+        try:
+            with Session(engine) as session:
+                barrier.wait()
+                record_buy(session, USER, "AAA", 5, 10.0)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=buy) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with Session(engine) as session:
+        holdings = session.exec(select(Holding)).all()
+        assert [(h.quantity, h.cost_basis) for h in holdings] == [(20, 200.0)]
+
+
+def test_concurrent_sells_do_not_share_a_lot(engine, monkeypatch):
+    with Session(engine) as session:
+        record_buy(session, USER, "AAA", 10, 10.0)
+    # Both sellers read the holding before either writes, unless the first one holds the lock
+    barrier = threading.Barrier(2, timeout=0.5)
+    read_holding = trade_ledger._holding
+
+    def holding_then_wait(*args):
+        holding = read_holding(*args)
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        return holding
+
+    monkeypatch.setattr(trade_ledger, "_holding", holding_then_wait)
+    results = []
+
+    def sell():
+        try:
+            with Session(engine) as session:
+                results.append(record_sell(session, USER, "AAA", 10, 12.0)[0].realized_pnl)
+        except (PositionNotFound, InsufficientQuantity) as e:
+            results.append(type(e))
+
+    threads = [threading.Thread(target=sell) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 2 and set(results) == {20.0, PositionNotFound}
+    with Session(engine) as session:
+        assert session.exec(select(Holding.quantity)).all() == [0]
+        assert [t.side for t in session.exec(select(Trade).order_by(Trade.id))] == ["buy", "sell"]
+
+
+def test_backfill_records_old_lots_once(session):
+    session.add_all([
+        Portfolio(user_id=USER, stock_code="AAA", quantity=10, avg_buy_price=10.0, created_at=datetime(2024, 1, 2)),
+        Portfolio(user_id=USER, stock_code="AAA", quantity=5, avg_buy_price=16.0, created_at=datetime(2024, 2, 1)),
+        Portfolio(user_id=USER, stock_code="BBB", quantity=3, avg_buy_price=50.0, created_at=datetime(2024, 3, 1)),
+    ])
+    session.commit()
+
+    assert backfill_ledger(session) == 3
+    assert backfill_ledger(session) == 0
+
+    trades = session.exec(select(Trade).order_by(Trade.id)).all()
+    assert [(t.stock_code, t.side, t.quantity) for t in trades] == [("AAA", "buy", 10), ("AAA", "buy", 5), ("BBB", "buy", 3)]
+    holdings = {h.stock_code: h for h in session.exec(select(Holding))}
+    assert len(holdings) == 2
+    assert (holdings["AAA"].quantity, holdings["AAA"].cost_basis) == (15, 180.0)
+    assert holdings["AAA"].avg_buy_price == pytest.approx(12.0)
+
+    # Backfilled positions trade like any other
+    trade, _ = record_sell(session, USER, "AAA", 12, 20.0)
+    assert trade.realized_pnl == pytest.approx(12 * 20.0 - (10 * 10.0 + 2 * 16.0))
@@ -29,6 +29,7 @@ export const api = {
     sentiment: () => request('/api/market/sentiment'),
     live: () => request('/api/market/live'),
     liveQuote: (stockCode) => request(`/api/market/live/quote/${stockCode}`),
+    liveQuotes: (stockCodes) => request(`/api/market/live/quotes?codes=${encodeURIComponent(stockCodes.join(','))}`),
     liveTunindex: () => request('/api/market/live/tunindex'),
     liveMovers: (limit = 10) => request(`/api/market/live/movers?limit=${limit}`),
   },
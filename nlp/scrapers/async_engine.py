@@ -0,0 +1,287 @@
+"""
+Concurrent asyncio scraping engine.
+Runs every (stock, keyword, source) search and the article body fetches
+concurrently over one httpx.AsyncClient. Politeness is enforced per host with
+a concurrency limit and a token-bucket rate limiter instead of fixed sleeps.
+Pages of one search are still fetched in order so pagination can stop early.
+With a CrawlFrontier attached, pagination also stops at the first page whose
+results were all seen by earlier runs, and only new article pages are fetched.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+NLP_ROOT = Path(__file__).parent.parent
+if str(NLP_ROOT) not in sys.path:
+    sys.path.insert(0, str(NLP_ROOT))
+
+from scrapers.collector import DEFAULT_STOCK_QUOTA, ArticleCollector
+from scrapers.frontier import CrawlFrontier
+from scrapers.http_cache import HTTPCache, get_http_cache
+from scrapers.news_scrapers import STOCK_KEYWORDS, BaseScraper
+from scrapers.parsing import SubtreeFilter, make_soup
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7,ar;q=0.6',
+}
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HostLimiter:
+    def __init__(self, concurrency: int, rate: float, burst: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+
+
+class AsyncScrapeEngine:
+    def __init__(
+        self,
+        scrapers: Dict[str, BaseScraper],
+        per_host_concurrency: int = 4,
+        requests_per_second: float = 2.0,
+        burst: float = 4.0,
+        timeout: float = 20.0,
+        client: Optional[httpx.AsyncClient] = None,
+        frontier: Optional[CrawlFrontier] = None,
+    ):
+        self.scrapers = scrapers
+        self.per_host_concurrency = per_host_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.timeout = timeout
+        self._client = client
+        self.frontier = frontier
+        self._limiters: Dict[str, HostLimiter] = {}
+        self.stats = {'requests': 0, 'errors': 0}
+
+    def _limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = HostLimiter(self.per_host_concurrency, self.requests_per_second, self.burst)
+        return self._limiters[host]
+
+    async def _get(self, limiter: HostLimiter, url: str, headers: Optional[Dict]) -> httpx.Response:
+        """One request through the host's token bucket; the caller holds the host's semaphore."""
+        await limiter.bucket.acquire()
+        self.stats['requests'] += 1
+        return await self._client.get(url, headers=headers)
+
+    async def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict] = None,
+        http_cache: Optional[HTTPCache] = None,
+        source: str = '',
+    ) -> Optional[str]:
+        limiter = self._limiter(url)
+        async with limiter.semaphore:
+            try:
+                conditional = http_cache.validators(url) if http_cache else {}
+                response = await self._get(limiter, url, {**(headers or {}), **conditional})
+                if response.status_code == 304:
+                    cached = http_cache.load(url)
+                    if cached is not None:
+                        stored_headers, body = cached
+                        http_cache.record(source, saved=len(body))
+                        return httpx.Response(200, headers=stored_headers, content=body).text
+                    # Evicted between the lookup and the answer: fetch unconditionally, still rate-limited
+                    response = await self._get(limiter, url, headers)
+                response.raise_for_status()
+                if http_cache:
+                    http_cache.store(url, source, response.headers, response.content)
+                    http_cache.record(source, downloaded=len(response.content))
+                return response.text
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"[WARN] Error fetching {url}: {e}")
+                return None
+
+    async def fetch_soup(
+        self,
+        scraper: BaseScraper,
+        url: str,
+        parse_only: Optional[SubtreeFilter] = None,
+    ) -> Optional[BeautifulSoup]:
+        # Share the scraper session's headers and HTTP cache
+        html = await self.fetch(
+            url,
+            headers=dict(scraper.session.headers),
+            http_cache=getattr(scraper.session, 'cache', None),
+            source=scraper.source,
+        )
+        if html is None:
+            return None
+        # Parsing is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(make_soup, html, parse_only)
+
+    async def _search_pages(self, scraper: BaseScraper, pages: List[str]) -> List[Dict]:
+        articles = []
+        for url in pages:
+            soup = await self.fetch_soup(scraper, url)
+            if not soup:
+                break
+            found = scraper.parse_search_page(soup, url)
+            if not found:
+                break
+            articles.extend(found)
+            # Results are newest first: a page of known URLs means the rest is old too.
+            # The frontier matches on url_key, so raw links with tracking params still count
+            if self.frontier is not None and self.frontier.all_known(a['url'] for a in found):
+                break
+        return articles
+
+    async def search(self, scraper: BaseScraper, keyword: str, max_pages: int = 2) -> List[Dict]:
+        results = await asyncio.gather(*(
+            self._search_pages(scraper, pages)
+            for pages in scraper.search_requests(keyword, max_pages)
+        ))
+        return [article for articles in results for article in articles]
+
+    async def get_news_for_stock(self, stock_code: str, max_pages: int = 2) -> List[Dict]:
+        keywords = STOCK_KEYWORDS.get(stock_code, [stock_code])
+        tasks = [
+            self.search(scraper, keyword, max_pages)
+            for keyword in keywords[:2]
+            for scraper in self.scrapers.values()
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        def stream():
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"[WARN] Search failed for {stock_code}: {result}")
+                    continue
+                yield from result
+
+        collector = ArticleCollector(quota=DEFAULT_STOCK_QUOTA, stock_code=stock_code)
+        return list(collector.collect(stream()))
+
+    async def get_full_article(self, article: Dict) -> Optional[Dict]:
+        scraper = self.scrapers.get(article.get('source', ''))
+        if not scraper:
+            return None
+        url = article.get('url', '')
+        soup = await self.fetch_soup(scraper, url, scraper.ARTICLE_FILTER)
+        if not soup:
+            return None
+        return scraper.parse_article_page(soup, url)
+
+    async def scrape(self, stock_codes: Iterable[str], fetch_content: bool = True, max_pages: int = 2) -> List[Dict]:
+        """
+        Search all stocks concurrently, then fetch article bodies concurrently.
+        With a frontier, only articles whose page was not fetched by a previous
+        run are returned (and fetched).
+        """
+        # Limiters hold asyncio primitives bound to the running loop
+        self._limiters = {}
+        owns_client = self._client is None
+        if owns_client:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers=DEFAULT_HEADERS,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        try:
+            per_stock = await asyncio.gather(*(
+                self.get_news_for_stock(code, max_pages) for code in stock_codes
+            ))
+
+            unique_articles = list(ArticleCollector().collect(
+                article for articles in per_stock for article in articles
+            ))
+
+            if self.frontier is not None:
+                self.frontier.add_discovered(unique_articles)
+                done = self.frontier.fetched(a['url'] for a in unique_articles)
+                unique_articles = [a for a in unique_articles if a['url'] not in done]
+
+            if fetch_content:
+                bodies = await asyncio.gather(
+                    *(self.get_full_article(article) for article in unique_articles),
+                    return_exceptions=True,
+                )
+                for article, full in zip(unique_articles, bodies):
+                    if isinstance(full, dict) and full.get('content'):
+                        article['description'] = full['content']
+                    else:
+                        article['description'] = ''
+                if self.frontier is not None:
+                    self.frontier.mark_fetched([
+                        {**article, 'content': full['content'] if isinstance(full, dict) else None}
+                        for article, full in zip(unique_articles, bodies)
+                    ])
+
+            return unique_articles
+        finally:
+            if owns_client:
+                await self._client.aclose()
+                self._client = None
+
+    def run(self, stock_codes: Iterable[str], fetch_content: bool = True, max_pages: int = 2) -> List[Dict]:
+        """Blocking entry point for threads without an event loop (e.g. the scheduler)."""
+        return asyncio.run(self.scrape(list(stock_codes), fetch_content, max_pages))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from scrapers.fixture_server import FixtureServer
+    from scrapers.news_scrapers import NewsAggregator
+
+    parser = argparse.ArgumentParser(description='Async scraping engine')
+    parser.add_argument('--fixtures', help='Serve recorded pages from this directory instead of the live sites')
+    parser.add_argument('--stocks', nargs='*', default=list(STOCK_KEYWORDS))
+    parser.add_argument('--no-content', action='store_true')
+    parser.add_argument('--rps', type=float, default=2.0, help='Requests per second per host')
+    parser.add_argument('--frontier', help='Crawl frontier database; repeated runs only fetch new articles')
+    args = parser.parse_args()
+
+    server = FixtureServer(args.fixtures).start() if args.fixtures else None
+    try:
+        aggregator = NewsAggregator(base_url_for=server.base_url_for if server else None)
+        frontier = CrawlFrontier(args.frontier) if args.frontier else None
+        engine = AsyncScrapeEngine(aggregator.scrapers, requests_per_second=args.rps, frontier=frontier)
+        started = time.perf_counter()
+        articles = engine.run(args.stocks, fetch_content=not args.no_content)
+        elapsed = time.perf_counter() - started
+        print(f"[RESULT] {len(articles)} articles for {len(args.stocks)} stocks in {elapsed:.2f}s "
+              f"({engine.stats['requests']} requests, {engine.stats['errors']} errors)")
+        if frontier:
+            print(f"[FRONTIER] {frontier.stats()}")
+        for source, counts in get_http_cache().stats()['sources'].items():
+            print(f"[HTTP] {source}: {counts}")
+    finally:
+        if server:
+            server.stop()
@@ -0,0 +1,74 @@
+"""
+Streaming article collector shared by every scraper.
+Search results flow through ArticleCollector.collect as a generator: URLs are
+cleaned of tracking parameters, deduplicated on a normalized key with a set,
+and consumption stops as soon as the quota is reached, so lazily fetched
+search pages past that point are never requested.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+DEFAULT_STOCK_QUOTA = 90
+
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'amp', '_ga', 'yclid',
+})
+TRACKING_PREFIXES = ('utm_',)
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param in TRACKING_PARAMS or param.startswith(TRACKING_PREFIXES)
+
+
+def clean_url(url: str) -> str:
+    """Drop tracking parameters and the fragment; the result is still fetchable."""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+def url_key(url: str) -> str:
+    """Dedup key: clean_url plus case-insensitive scheme/host and no trailing slash."""
+    parts = urlsplit(clean_url(url))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ''))
+
+
+class ArticleCollector:
+    def __init__(self, quota: Optional[int] = None, stock_code: Optional[str] = None):
+        self.quota = quota
+        self.stock_code = stock_code
+        self.seen: Set[str] = set()
+        self.articles: List[Dict] = []
+
+    @property
+    def full(self) -> bool:
+        return self.quota is not None and len(self.articles) >= self.quota
+
+    def offer(self, article: Dict) -> bool:
+        """Add an article unless its URL was already collected (or the quota is reached)."""
+        if self.full or not article.get('url'):
+            return False
+        article['url'] = clean_url(article['url'])
+        key = url_key(article['url'])
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        if self.stock_code:
+            article['stock_code'] = self.stock_code
+        self.articles.append(article)
+        return True
+
+    def collect(self, articles: Iterable[Dict]) -> Iterator[Dict]:
+        if self.full:
+            return
+        for article in articles:
+            if self.offer(article):
+                yield article
+                # Return before pulling (and possibly fetching) anything else
+                if self.full:
+                    return
@@ -0,0 +1,183 @@
+"""
+Local HTTP server for recorded news pages.
+Pages live in a fixtures directory with an index.json mapping each original
+(unquoted) URL, e.g. "https://www.webmanagercenter.com/?s=SFBT&paged=1", to a file.
+The server exposes them as http://127.0.0.1:<port>/<host>/<path>?<query>, and
+rewrites "{{origin}}" in the stored HTML to its own address, so links inside
+recorded pages resolve back to the server. Pages carry an ETag (hash of the
+body) and a Last-Modified (the file's mtime), and conditional requests that
+still match are answered 304 Not Modified, like the live sites do.
+
+Record pages from the live sites with:
+    python scrapers/fixture_server.py --dir scrapers/fixtures --record URL [URL ...]
+"""
+
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+
+
+DEFAULT_FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+
+def _not_modified(headers, etag: str, mtime: int) -> bool:
+    """True when the request's validators still match the page (If-None-Match wins over If-Modified-Since)."""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        return etag in {tag.strip() for tag in if_none_match.split(',')} or if_none_match.strip() == '*'
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _load_index(directory: Path) -> Dict[str, str]:
+    index_path = directory / 'index.json'
+    if not index_path.exists():
+        return {}
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FixtureServer:
+    """
+    `delay` holds every response for that many seconds, to look like a slow
+    site. `hits` lists the URLs requested, `not_modified` those answered 304,
+    and `peak_in_flight` is the most requests served at the same time.
+    """
+
+    def __init__(self, directory: Optional[str] = None, host: str = '127.0.0.1', port: int = 0, delay: float = 0.0):
+        self.directory = Path(directory) if directory else DEFAULT_FIXTURES_DIR
+        self.index = _load_index(self.directory)
+        self.delay = delay
+        self.hits: List[str] = []
+        self.not_modified: List[str] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                original = 'https://' + unquote(self.path.lstrip('/'))
+                with server._lock:
+                    server.hits.append(original)
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    if server.delay:
+                        time.sleep(server.delay)
+                    self._respond(original)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _respond(self, original: str):
+                filename = server.index.get(original)
+                if not filename:
+                    self.send_error(404)
+                    return
+                path = server.directory / filename
+                body = path.read_text(encoding='utf-8').replace('{{origin}}', server.origin).encode('utf-8')
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                mtime = int(path.stat().st_mtime)
+                if _not_modified(self.headers, etag, mtime):
+                    with server._lock:
+                        server.not_modified.append(original)
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', formatdate(mtime, usegmt=True))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def origin(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_url_for(self, base_url: str) -> str:
+        """Map a live base URL (https://host) to its location on this server."""
+        return f"{self.origin}/{urlsplit(base_url).netloc}"
+
+    def start(self) -> 'FixtureServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record(urls: List[str], directory: Optional[str] = None):
+    """Download live pages into a fixtures directory and update its index."""
+    import requests
+
+    directory = Path(directory) if directory else DEFAULT_FIXTURES_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    index = _load_index(directory)
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+    for url in urls:
+        response = session.get(url, timeout=(10, 20))
+        response.raise_for_status()
+        html = response.text
+        # Point absolute links on recorded hosts back at the fixture server
+        for host in {urlsplit(u).netloc for u in urls}:
+            html = html.replace(f'https://{host}', '{{origin}}/' + host)
+        filename = f"{urlsplit(url).netloc}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]}.html"
+        (directory / filename).write_text(html, encoding='utf-8')
+        index[unquote(url)] = filename
+        print(f"[OK] Recorded {url} -> {filename}")
+
+    with open(directory / 'index.json', 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve or record news page fixtures')
+    parser.add_argument('--dir', default=str(DEFAULT_FIXTURES_DIR))
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--record', nargs='+', metavar='URL', help='Record these live URLs and exit')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.dir)
+    else:
+        with FixtureServer(args.dir, port=args.port) as server:
+            print(f"[OK] Serving {len(server.index)} fixture pages at {server.origin}")
+            try:
+                while True:
+                    time.sleep(60)
+            except KeyboardInterrupt:
+                pass
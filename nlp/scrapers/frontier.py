@@ -0,0 +1,139 @@
+"""
+Persistent crawl frontier.
+Remembers every article URL the scrapers have discovered, when it was first
+seen and last fetched, the hash of its parsed content and its fetch status,
+so repeated runs only download article pages they have not parsed yet and
+stop paginating once search results are all known.
+
+URLs are stored and looked up by collector.url_key, so a link that differs
+only by tracking parameters, fragment, trailing slash or host case is the
+same page; lookups return the URLs as they were passed in.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from scrapers.collector import url_key
+
+
+DEFAULT_FRONTIER_PATH = Path(__file__).parent.parent / 'data' / 'crawl_frontier.sqlite3'
+
+STATUS_DISCOVERED = 'discovered'
+STATUS_FETCHED = 'fetched'
+STATUS_FAILED = 'failed'
+
+# PRAGMA user_version: 1 = urls stored as url_key
+SCHEMA_VERSION = 1
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+class CrawlFrontier:
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else DEFAULT_FRONTIER_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS crawl_frontier ('
+            ' url TEXT PRIMARY KEY,'
+            ' source TEXT NOT NULL,'
+            ' first_seen TEXT NOT NULL,'
+            ' last_fetched TEXT,'
+            ' content_hash TEXT,'
+            ' status TEXT NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_crawl_frontier_status ON crawl_frontier (status)')
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+            self._rekey()
+        self._conn.commit()
+
+    def _rekey(self):
+        """Store rows saved as plain URLs (before url_key) under their key; of several forms the fetched one wins."""
+        progress = {STATUS_FETCHED: 2, STATUS_FAILED: 1}
+        rows: Dict[str, tuple] = {}
+        for row in self._conn.execute(
+            'SELECT url, source, first_seen, last_fetched, content_hash, status FROM crawl_frontier'
+        ):
+            key = url_key(row[0])
+            if key not in rows or progress.get(row[5], 0) > progress.get(rows[key][5], 0):
+                rows[key] = (key, *row[1:])
+        self._conn.execute('DELETE FROM crawl_frontier')
+        self._conn.executemany('INSERT INTO crawl_frontier VALUES (?, ?, ?, ?, ?, ?)', list(rows.values()))
+        self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _select_urls(self, urls: Iterable[str], condition: str = '') -> Set[str]:
+        """The given URLs whose key is stored (and matches `condition`)."""
+        by_key: Dict[str, List[str]] = {}
+        for url in urls:
+            by_key.setdefault(url_key(url), []).append(url)
+        keys = list(by_key)
+        found: Set[str] = set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f'SELECT url FROM crawl_frontier WHERE url IN ({placeholders}){condition}', chunk
+            ).fetchall()
+            found.update(url for row in rows for url in by_key[row[0]])
+        return found
+
+    def known(self, urls: Iterable[str]) -> Set[str]:
+        """URLs discovered by any previous run."""
+        with self._lock:
+            return self._select_urls(urls)
+
+    def all_known(self, urls: Iterable[str]) -> bool:
+        urls = list(dict.fromkeys(urls))
+        return bool(urls) and len(self.known(urls)) == len(urls)
+
+    def fetched(self, urls: Iterable[str]) -> Set[str]:
+        """URLs whose article page was already downloaded and parsed."""
+        with self._lock:
+            return self._select_urls(urls, f" AND status = '{STATUS_FETCHED}'")
+
+    def add_discovered(self, articles: List[Dict]):
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO crawl_frontier (url, source, first_seen, status) VALUES (?, ?, ?, ?)',
+                [(url_key(a['url']), a.get('source', ''), now, STATUS_DISCOVERED) for a in articles],
+            )
+            self._conn.commit()
+
+    def mark_fetched(self, results: List[Dict]):
+        """Record fetch outcomes as dicts with url, source and content (None on failure)."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO crawl_frontier (url, source, first_seen, last_fetched, content_hash, status)'
+                ' VALUES (?, ?, ?, ?, ?, ?)'
+                ' ON CONFLICT(url) DO UPDATE SET last_fetched = excluded.last_fetched,'
+                ' content_hash = excluded.content_hash, status = excluded.status',
+                [
+                    (
+                        url_key(r['url']), r.get('source', ''), now, now,
+                        content_hash(r['content']) if r.get('content') is not None else None,
+                        STATUS_FETCHED if r.get('content') is not None else STATUS_FAILED,
+                    )
+                    for r in results
+                ],
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM crawl_frontier GROUP BY status').fetchall()
+        counts = dict(rows)
+        return {'total': sum(counts.values()), **counts}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
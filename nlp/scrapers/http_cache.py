@@ -0,0 +1,190 @@
+"""
+Conditional-request HTTP cache shared by the news scrapers and the market data service.
+Responses carrying an ETag or Last-Modified header are stored zlib-compressed in
+SQLite. Later requests for the same URL send If-None-Match / If-Modified-Since,
+and a 304 answer is served from the stored body. The store is bounded by size
+(least recently used entries are evicted first) and counts bytes saved per source.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+DEFAULT_HTTP_CACHE_PATH = Path(__file__).parent.parent / 'data' / 'http_cache.sqlite3'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Headers needed to rebuild a response from the cache
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class HTTPCache:
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path else DEFAULT_HTTP_CACHE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Dict[str, int]] = {}
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS http_cache ('
+            ' url TEXT PRIMARY KEY,'
+            ' source TEXT NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' headers TEXT NOT NULL,'
+            ' body BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_http_cache_last_used ON http_cache (last_used)')
+        self._conn.commit()
+        self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a cached URL (empty if not cached)."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified FROM http_cache WHERE url = ?', (url,)
+            ).fetchone()
+        if not row:
+            return {}
+        headers = {}
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def load(self, url: str) -> Optional[Tuple[Dict[str, str], bytes]]:
+        with self._lock:
+            row = self._conn.execute('SELECT headers, body FROM http_cache WHERE url = ?', (url,)).fetchone()
+            if not row:
+                return None
+            self._conn.execute('UPDATE http_cache SET last_used = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+        return json.loads(row[0]), zlib.decompress(row[1])
+
+    def store(self, url: str, source: str, headers, body: bytes):
+        """Cache a 200 response; responses without validators cannot be revalidated and are skipped."""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        stored = {name: headers[name] for name in STORED_HEADERS if headers.get(name)}
+        compressed = zlib.compress(body, 6)
+        if len(compressed) > self.max_bytes:
+            return
+
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM http_cache WHERE url = ?', (url,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO http_cache (url, source, etag, last_modified, headers, body, size, last_used)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, source, etag, last_modified, json.dumps(stored), compressed, len(compressed), time.time()),
+            )
+            self._total += len(compressed) - (row[0] if row else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop least recently used entries down to 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        evicted = []
+        for url, size in self._conn.execute('SELECT url, size FROM http_cache ORDER BY last_used'):
+            if self._total <= target:
+                break
+            evicted.append((url,))
+            self._total -= size
+        self._conn.executemany('DELETE FROM http_cache WHERE url = ?', evicted)
+
+    def record(self, source: str, downloaded: int = 0, saved: int = 0):
+        with self._lock:
+            counts = self._sources.setdefault(
+                source, {'requests': 0, 'not_modified': 0, 'bytes_downloaded': 0, 'bytes_saved': 0}
+            )
+            counts['requests'] += 1
+            counts['bytes_downloaded'] += downloaded
+            if saved:
+                counts['not_modified'] += 1
+                counts['bytes_saved'] += saved
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM http_cache').fetchone()[0]
+            return {
+                'entries': entries,
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+                'sources': {source: dict(counts) for source, counts in self._sources.items()},
+            }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM http_cache')
+            self._conn.commit()
+            self._total = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedSession(requests.Session):
+    """requests.Session that revalidates GETs against an HTTPCache."""
+
+    def __init__(self, cache: Optional[HTTPCache] = None, source: str = ''):
+        super().__init__()
+        self.cache = cache or get_http_cache()
+        self.source = source
+
+    def request(self, method, url, *args, **kwargs):
+        if method.upper() != 'GET' or kwargs.get('params') or kwargs.get('stream'):
+            return super().request(method, url, *args, **kwargs)
+
+        source = self.source or urlsplit(url).netloc
+        headers = kwargs.pop('headers', None) or {}
+        response = super().request(method, url, *args, headers={**self.cache.validators(url), **headers}, **kwargs)
+
+        if response.status_code == 304:
+            cached = self.cache.load(url)
+            if cached is None:
+                # Evicted between the lookup and the answer: fetch unconditionally
+                return super().request(method, url, *args, headers=headers, **kwargs)
+            stored_headers, body = cached
+            response.status_code = 200
+            response.reason = 'OK'
+            response.headers = CaseInsensitiveDict({**stored_headers, **response.headers})
+            response.encoding = get_encoding_from_headers(response.headers)
+            response._content = body
+            self.cache.record(source, saved=len(body))
+        elif response.status_code == 200:
+            self.cache.store(url, source, response.headers, response.content)
+            self.cache.record(source, downloaded=len(response.content))
+
+        return response
+
+
+_http_cache: Optional[HTTPCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Process-wide cache shared by every scraper and the market data service."""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HTTPCache()
+        return _http_cache
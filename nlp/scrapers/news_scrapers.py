@@ -4,15 +4,23 @@ Scrape financial news from Tunisian sources for sentiment analysis.
 Supports French and Arabic news sources.
 """
 
-import requests
+import sys
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional
 import time
 import re
 import json
 from pathlib import Path
 
+NLP_ROOT = Path(__file__).parent.parent
+if str(NLP_ROOT) not in sys.path:
+    sys.path.insert(0, str(NLP_ROOT))
+
+from scrapers.collector import DEFAULT_STOCK_QUOTA, ArticleCollector
+from scrapers.http_cache import CachedSession, HTTPCache
+from scrapers.parsing import SubtreeFilter, make_soup
+
 
 STOCK_KEYWORDS_AR = {
     'SFBT': ['سفبت', 'الشركة التونسية للمشروبات', 'مصانع الجعة بتونس', 'مشروبات تونس'],
@@ -54,76 +62,106 @@ STOCK_KEYWORDS = {
 
 
 class BaseScraper:
-    def __init__(self, base_url: str, rate_limit: float = 1.0):
+    """
+    Scrapers describe which pages to fetch (search_requests) and how to parse
+    them (parse_search_page / parse_article_page). Fetching is done either here
+    with a blocking requests session, or by scrapers.async_engine. Both
+    revalidate pages through the session's HTTP cache.
+    """
+    source = ''
+    # Subtrees parse_article_page reads; None parses the whole page
+    ARTICLE_FILTER: Optional[SubtreeFilter] = None
+    
+    def __init__(self, base_url: str, rate_limit: float = 1.0, http_cache: Optional[HTTPCache] = None):
         self.base_url = base_url
         self.rate_limit = rate_limit
-        self.session = requests.Session()
+        self.session = CachedSession(http_cache, source=self.source)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7,ar;q=0.6',
         })
     
-    def _get(self, url: str) -> Optional[BeautifulSoup]:
+    def _get(self, url: str, parse_only: Optional[SubtreeFilter] = None) -> Optional[BeautifulSoup]:
         try:
             response = self.session.get(url, timeout=(10, 20))
             response.raise_for_status()
             time.sleep(self.rate_limit)
-            return BeautifulSoup(response.text, 'lxml')
+            return make_soup(response.text, parse_only)
         except KeyboardInterrupt:
             raise
         except Exception as e:
             print(f"[WARN] Error fetching {url}: {e}")
             return None
     
-    def search(self, keyword: str, max_pages: int = 3) -> List[Dict]:
+    def search_requests(self, keyword: str, max_pages: int = 3) -> List[List[str]]:
+        """Search page URLs, grouped into sequences that are paginated in order."""
         raise NotImplementedError
     
-    def parse_article(self, url: str) -> Optional[Dict]:
+    def parse_search_page(self, soup: BeautifulSoup, url: str) -> List[Dict]:
+        raise NotImplementedError
+    
+    def parse_article_page(self, soup: BeautifulSoup, url: str) -> Optional[Dict]:
         raise NotImplementedError
+    
+    def iter_search(self, keyword: str, max_pages: int = 3) -> Iterator[Dict]:
+        """Yield search results page by page; a page is only fetched once the previous one is consumed."""
+        for pages in self.search_requests(keyword, max_pages):
+            for url in pages:
+                soup = self._get(url)
+                if not soup:
+                    break
+                found = self.parse_search_page(soup, url)
+                if not found:
+                    break
+                yield from found
+    
+    def search(self, keyword: str, max_pages: int = 3) -> List[Dict]:
+        return list(ArticleCollector().collect(self.iter_search(keyword, max_pages)))
+    
+    def parse_article(self, url: str) -> Optional[Dict]:
+        soup = self._get(url, self.ARTICLE_FILTER)
+        if not soup:
+            return None
+        return self.parse_article_page(soup, url)
 
 
 class WebManagerScraper(BaseScraper):
-    def __init__(self):
-        super().__init__('https://www.webmanagercenter.com')
+    source = 'webmanagercenter'
+    BASE_URL = 'https://www.webmanagercenter.com'
+    ARTICLE_FILTER = SubtreeFilter(['h1', 'time'], r'entry-title|date|td-post-content')
     
-    def search(self, keyword: str, max_pages: int = 3) -> List[Dict]:
+    def __init__(self, base_url: str = BASE_URL):
+        super().__init__(base_url)
+    
+    def search_requests(self, keyword: str, max_pages: int = 3) -> List[List[str]]:
+        return [[f"{self.base_url}/?s={keyword}&paged={page}" for page in range(1, max_pages + 1)]]
+    
+    def parse_search_page(self, soup: BeautifulSoup, url: str) -> List[Dict]:
         articles = []
+        article_elements = soup.select('h3 a[href*="webmanagercenter.com"]')
         
-        for page in range(1, max_pages + 1):
-            search_url = f"{self.base_url}/?s={keyword}&paged={page}"
-            soup = self._get(search_url)
+        for link in article_elements[:15]:
+            href = link.get('href', '')
+            title_text = link.get_text(strip=True)
             
-            if not soup:
-                continue
-            
-            article_elements = soup.select('h3 a[href*="webmanagercenter.com"]')
-            
-            for link in article_elements[:15]:
-                href = link.get('href', '')
-                title_text = link.get_text(strip=True)
+            if href and title_text and len(title_text) > 10:
+                date_str = datetime.now().strftime('%Y-%m-%d')
+                date_match = re.search(r'/(\d{4})/(\d{2})/(\d{2})/', href)
+                if date_match:
+                    date_str = f"{date_match.group(1)}-{date_match.group(2)}-{date_match.group(3)}"
                 
-                if href and title_text and len(title_text) > 10:
-                    date_str = datetime.now().strftime('%Y-%m-%d')
-                    date_match = re.search(r'/(\d{4})/(\d{2})/(\d{2})/', href)
-                    if date_match:
-                        date_str = f"{date_match.group(1)}-{date_match.group(2)}-{date_match.group(3)}"
-                    
-                    articles.append({
-                        'url': href,
-                        'title': title_text,
-                        'date': date_str,
-                        'source': 'webmanagercenter',
-                        'language': 'fr'
-                    })
+                articles.append({
+                    'url': href,
+                    'title': title_text,
+                    'date': date_str,
+                    'source': 'webmanagercenter',
+                    'language': 'fr'
+                })
         
         return articles
     
-    def parse_article(self, url: str) -> Optional[Dict]:
-        soup = self._get(url)
-        if not soup:
-            return None
-        
+    def parse_article_page(self, soup: BeautifulSoup, url: str) -> Optional[Dict]:
         title = soup.select_one('h1, .entry-title')
         date = soup.select_one('time, .date')
         content_div = soup.select_one('.td-post-content')
@@ -157,58 +195,56 @@ class WebManagerScraper(BaseScraper):
 
 
 class BusinessNewsScraper(BaseScraper):
-    def __init__(self):
-        super().__init__('https://businessnews.com.tn')
+    source = 'businessnews'
+    BASE_URL = 'https://businessnews.com.tn'
+    ARTICLE_FILTER = SubtreeFilter(['h1', 'article'], r'content')
     
-    def search(self, keyword: str, max_pages: int = 3) -> List[Dict]:
-        articles = []
-        
+    def __init__(self, base_url: str = BASE_URL):
+        super().__init__(base_url)
+    
+    def search_requests(self, keyword: str, max_pages: int = 3) -> List[List[str]]:
+        pages = []
         for page in range(1, max_pages + 1):
             if page == 1:
-                search_url = f"{self.base_url}/?s={keyword}"
+                pages.append(f"{self.base_url}/?s={keyword}")
             else:
-                search_url = f"{self.base_url}/page/{page}/?s={keyword}"
-            
-            soup = self._get(search_url)
-            if not soup:
-                continue
-            
-            article_elements = soup.select('article, .post, .entry, h3 a, h2 a')
+                pages.append(f"{self.base_url}/page/{page}/?s={keyword}")
+        return [pages]
+    
+    def parse_search_page(self, soup: BeautifulSoup, url: str) -> List[Dict]:
+        articles = []
+        article_elements = soup.select('article, .post, .entry, h3 a, h2 a')
+        
+        for el in article_elements[:15]:
+            if el.name == 'a':
+                link = el
+                title_text = el.get_text(strip=True)
+            else:
+                link = el.select_one('a[href]')
+                title_el = el.select_one('h2, h3, .entry-title, .title')
+                title_text = title_el.get_text(strip=True) if title_el else ''
             
-            for el in article_elements[:15]:
-                if el.name == 'a':
-                    link = el
-                    title_text = el.get_text(strip=True)
-                else:
-                    link = el.select_one('a[href]')
-                    title_el = el.select_one('h2, h3, .entry-title, .title')
-                    title_text = title_el.get_text(strip=True) if title_el else ''
+            if link and title_text and len(title_text) > 10:
+                href = link.get('href', '')
+                if not href.startswith('http'):
+                    href = self.base_url + href
                 
-                if link and title_text and len(title_text) > 10:
-                    href = link.get('href', '')
-                    if not href.startswith('http'):
-                        href = self.base_url + href
-                    
-                    date_str = datetime.now().strftime('%Y-%m-%d')
-                    date_match = re.search(r'/(\d{4})/(\d{2})/(\d{2})/', href)
-                    if date_match:
-                        date_str = f"{date_match.group(1)}-{date_match.group(2)}-{date_match.group(3)}"
-                    
-                    articles.append({
-                        'url': href,
-                        'title': title_text,
-                        'date': date_str,
-                        'source': 'businessnews',
-                        'language': 'fr'
-                    })
+                date_str = datetime.now().strftime('%Y-%m-%d')
+                date_match = re.search(r'/(\d{4})/(\d{2})/(\d{2})/', href)
+                if date_match:
+                    date_str = f"{date_match.group(1)}-{date_match.group(2)}-{date_match.group(3)}"
+                
+                articles.append({
+                    'url': href,
+                    'title': title_text,
+                    'date': date_str,
+                    'source': 'businessnews',
+                    'language': 'fr'
+                })
         
         return articles
     
-    def parse_article(self, url: str) -> Optional[Dict]:
-        soup = self._get(url)
-        if not soup:
-            return None
-        
+    def parse_article_page(self, soup: BeautifulSoup, url: str) -> Optional[Dict]:
         title = soup.select_one('h1')
         content = soup.select_one('.article-content, .content, article')
         
@@ -229,80 +265,83 @@ class BusinessNewsScraper(BaseScraper):
 
 
 class IlboursaScraper(BaseScraper):
-    def __init__(self):
-        super().__init__('https://www.ilboursa.com')
+    source = 'ilboursa'
+    BASE_URL = 'https://www.ilboursa.com'
+    ARTICLE_FILTER = SubtreeFilter(['h1', 'article'], r'title|content|article-body')
     
-    def search(self, keyword: str, max_pages: int = 3) -> List[Dict]:
-        articles = []
-        
-        soup = None
+    def __init__(self, base_url: str = BASE_URL):
+        super().__init__(base_url)
+    
+    def search_requests(self, keyword: str, max_pages: int = 3) -> List[List[str]]:
+        requests_ = []
         if ' ' not in keyword:
-            news_url = f"{self.base_url}/marches/news_valeur?s={keyword}"
-            soup = self._get(news_url)
-        
-        if soup:
-            news_links = soup.select('a[href*="/marches/"]')
-            for link in news_links[:20]:
-                href = link.get('href', '')
-                if not href.startswith('http'):
-                    href = self.base_url + href
+            requests_.append([f"{self.base_url}/marches/news_valeur?s={keyword}"])
+        requests_.append([f"{self.base_url}/search?q={keyword}"])
+        return requests_
+    
+    def parse_search_page(self, soup: BeautifulSoup, url: str) -> List[Dict]:
+        if 'news_valeur' in url:
+            return self._parse_news_valeur(soup)
+        return self._parse_search_results(soup)
+    
+    def _parse_news_valeur(self, soup: BeautifulSoup) -> List[Dict]:
+        articles = []
+        news_links = soup.select('a[href*="/marches/"]')
+        for link in news_links[:20]:
+            href = link.get('href', '')
+            if not href.startswith('http'):
+                href = self.base_url + href
+            
+            title = link.get_text(strip=True)
+            if (title and len(title) > 15 
+                and 'cotation' not in href 
+                and 'graph' not in href
+                and 'societe' not in href
+                and 'historiques' not in href
+                and 'secteur' not in href
+                and 'news_valeur' not in href
+                and 'aaz' not in href):
                 
-                title = link.get_text(strip=True)
-                if (title and len(title) > 15 
-                    and 'cotation' not in href 
-                    and 'graph' not in href
-                    and 'societe' not in href
-                    and 'historiques' not in href
-                    and 'secteur' not in href
-                    and 'news_valeur' not in href
-                    and 'aaz' not in href):
-                    
-                    date_str = datetime.now().strftime('%Y-%m-%d')
-                    parent = link.parent
-                    if parent:
-                        parent_text = parent.get_text()
-                        date_match = re.search(r'(\d{2})/(\d{2})/(\d{2,4})', parent_text)
-                        if date_match:
-                            year = date_match.group(3)
-                            if len(year) == 2:
-                                year = '20' + year
-                            date_str = f"{year}-{date_match.group(2)}-{date_match.group(1)}"
-                    
-                    articles.append({
-                        'url': href,
-                        'title': title,
-                        'date': date_str,
-                        'source': 'ilboursa',
-                        'language': 'fr'
-                    })
-        
-        search_url = f"{self.base_url}/search?q={keyword}"
-        soup = self._get(search_url)
-        
-        if soup:
-            result_links = soup.select('a.gs-title, .gsc-thumbnail-inside a, .gs-snippet a, a[href*="ilboursa.com/marches/"]')
-            for link in result_links[:10]:
-                href = link.get('href', '')
-                if not href.startswith('http'):
-                    href = self.base_url + href
+                date_str = datetime.now().strftime('%Y-%m-%d')
+                parent = link.parent
+                if parent:
+                    parent_text = parent.get_text()
+                    date_match = re.search(r'(\d{2})/(\d{2})/(\d{2,4})', parent_text)
+                    if date_match:
+                        year = date_match.group(3)
+                        if len(year) == 2:
+                            year = '20' + year
+                        date_str = f"{year}-{date_match.group(2)}-{date_match.group(1)}"
                 
-                title = link.get_text(strip=True)
-                if title and len(title) > 10 and href not in [a['url'] for a in articles]:
-                    articles.append({
-                        'url': href,
-                        'title': title,
-                        'date': datetime.now().strftime('%Y-%m-%d'),
-                        'source': 'ilboursa',
-                        'language': 'fr'
-                    })
-        
+                articles.append({
+                    'url': href,
+                    'title': title,
+                    'date': date_str,
+                    'source': 'ilboursa',
+                    'language': 'fr'
+                })
         return articles
     
-    def parse_article(self, url: str) -> Optional[Dict]:
-        soup = self._get(url)
-        if not soup:
-            return None
-        
+    def _parse_search_results(self, soup: BeautifulSoup) -> List[Dict]:
+        articles = []
+        result_links = soup.select('a.gs-title, .gsc-thumbnail-inside a, .gs-snippet a, a[href*="ilboursa.com/marches/"]')
+        for link in result_links[:10]:
+            href = link.get('href', '')
+            if not href.startswith('http'):
+                href = self.base_url + href
+            
+            title = link.get_text(strip=True)
+            if title and len(title) > 10:
+                articles.append({
+                    'url': href,
+                    'title': title,
+                    'date': datetime.now().strftime('%Y-%m-%d'),
+                    'source': 'ilboursa',
+                    'language': 'fr'
+                })
+        return articles
+    
+    def parse_article_page(self, soup: BeautifulSoup, url: str) -> Optional[Dict]:
         title = soup.select_one('h1, .title')
         content = soup.select_one('.content, article, .article-body')
         
@@ -322,74 +361,70 @@ class IlboursaScraper(BaseScraper):
 
 
 class RadioExpressFMScraper(BaseScraper):
-    def __init__(self):
-        super().__init__('https://radioexpressfm.com')
+    source = 'radioexpressfm'
+    BASE_URL = 'https://radioexpressfm.com'
+    ARTICLE_FILTER = SubtreeFilter(['h1'], r'proradio-the_content|proradio-entrycontent|td-post-content')
+    
+    def __init__(self, base_url: str = BASE_URL):
+        super().__init__(base_url)
         self.session.headers.update({
-            'Referer': 'https://radioexpressfm.com/ar/',
+            'Referer': f'{self.base_url}/ar/',
         })
     
-    def search(self, keyword: str, max_pages: int = 3) -> List[Dict]:
-        articles = []
+    def search_requests(self, keyword: str, max_pages: int = 3) -> List[List[str]]:
         ar_keywords = STOCK_KEYWORDS_AR.get(keyword, [keyword])
+        requests_ = []
         
         for ar_kw in ar_keywords[:2]:
+            pages = []
             for page in range(1, max_pages + 1):
                 if page == 1:
-                    url = f"{self.base_url}/ar/?s={ar_kw}"
+                    pages.append(f"{self.base_url}/ar/?s={ar_kw}")
                 else:
-                    url = f"{self.base_url}/ar/page/{page}/?s={ar_kw}"
-                
-                soup = self._get(url)
-                if not soup:
-                    break
-                
-                article_links = soup.select('h3 a[href*="radioexpressfm.com"]')
+                    pages.append(f"{self.base_url}/ar/page/{page}/?s={ar_kw}")
+            requests_.append(pages)
+        
+        return requests_
+    
+    def parse_search_page(self, soup: BeautifulSoup, url: str) -> List[Dict]:
+        articles = []
+        article_links = soup.select('h3 a[href*="radioexpressfm.com"]')
+        
+        for link in article_links[:15]:
+            href = link.get('href', '')
+            title = link.get_text(strip=True)
+            
+            if (title and len(title) > 10
+                and '/ar/' in href
+                and '/podcast/' not in href
+                and '/radiochannel/' not in href
+                and href != f'{self.base_url}/ar/'):
                 
-                if not article_links:
-                    break
+                date_str = datetime.now().strftime('%Y-%m-%d')
+                date_match = re.search(r'/(\d{4})/(\d{2})/', href)
+                if date_match:
+                    date_str = f"{date_match.group(1)}-{date_match.group(2)}-01"
                 
-                for link in article_links[:15]:
-                    href = link.get('href', '')
-                    title = link.get_text(strip=True)
-                    
-                    if (title and len(title) > 10
-                        and '/ar/' in href
-                        and '/podcast/' not in href
-                        and '/radiochannel/' not in href
-                        and href != 'https://radioexpressfm.com/ar/'):
-                        
-                        date_str = datetime.now().strftime('%Y-%m-%d')
-                        date_match = re.search(r'/(\d{4})/(\d{2})/', href)
-                        if date_match:
-                            date_str = f"{date_match.group(1)}-{date_match.group(2)}-01"
-                        
-                        parent = link.parent
-                        if parent:
-                            prev = parent.find_previous_sibling()
-                            if prev:
-                                prev_text = prev.get_text()
-                                dm = re.search(r'(\d{2})/(\d{2})/(\d{4})', prev_text)
-                                if dm:
-                                    date_str = f"{dm.group(3)}-{dm.group(2)}-{dm.group(1)}"
-                        
-                        if href not in [a['url'] for a in articles]:
-                            articles.append({
-                                'url': href,
-                                'title': title,
-                                'date': date_str,
-                                'source': 'radioexpressfm',
-                                'language': 'ar'
-                            })
+                parent = link.parent
+                if parent:
+                    prev = parent.find_previous_sibling()
+                    if prev:
+                        prev_text = prev.get_text()
+                        dm = re.search(r'(\d{2})/(\d{2})/(\d{4})', prev_text)
+                        if dm:
+                            date_str = f"{dm.group(3)}-{dm.group(2)}-{dm.group(1)}"
                 
-                time.sleep(self.rate_limit)
+                articles.append({
+                    'url': href,
+                    'title': title,
+                    'date': date_str,
+                    'source': 'radioexpressfm',
+                    'language': 'ar'
+                })
         
         return articles
     
-    def parse_article(self, url: str) -> Optional[Dict]:
-        soup = self._get(url)
-        if not soup:
-            return None
-        
+    def parse_article_page(self, soup: BeautifulSoup, url: str) -> Optional[Dict]:
         title = soup.select_one('h1')
         content_div = (soup.select_one('.proradio-the_content') 
                       or soup.select_one('.proradio-entrycontent')
@@ -412,36 +447,49 @@ class RadioExpressFMScraper(BaseScraper):
 
 
 class NewsAggregator:
-    def __init__(self, cache_dir: str = 'nlp/data'):
+    SCRAPERS = {
+        'webmanagercenter': WebManagerScraper,
+        'businessnews': BusinessNewsScraper,
+        'radioexpressfm': RadioExpressFMScraper,
+    }
+    
+    def __init__(
+        self,
+        cache_dir: str = 'nlp/data',
+        base_url_for: Optional[Callable[[str], str]] = None,
+        frontier=None,
+    ):
+        # base_url_for rewrites each source's base URL, e.g. to a local fixture server
+        # frontier (scrapers.frontier.CrawlFrontier) makes scrape_all return only new articles
+        self.frontier = frontier
         self.scrapers = {
-            'webmanagercenter': WebManagerScraper(),
-            'businessnews': BusinessNewsScraper(),
-            'radioexpressfm': RadioExpressFMScraper(),
+            name: cls(base_url_for(cls.BASE_URL)) if base_url_for else cls()
+            for name, cls in self.SCRAPERS.items()
         }
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
     
     def get_news_for_stock(self, stock_code: str, days_back: int = 7) -> List[Dict]:
         keywords = STOCK_KEYWORDS.get(stock_code, [stock_code])
-        all_articles = []
         
-        for keyword in keywords[:2]:
-            for name, scraper in self.scrapers.items():
-                try:
-                    articles = scraper.search(keyword, max_pages=2)
-                    all_articles.extend(articles)
-                except Exception as e:
-                    print(f"[WARN] Error with {name} scraper: {e}")
-        
-        seen_urls = set()
-        unique_articles = []
-        for article in all_articles:
-            if article['url'] not in seen_urls:
-                seen_urls.add(article['url'])
-                article['stock_code'] = stock_code
-                unique_articles.append(article)
+        def stream() -> Iterator[Dict]:
+            for keyword in keywords[:2]:
+                for name, scraper in self.scrapers.items():
+                    try:
+                        yield from scraper.iter_search(keyword, max_pages=2)
+                    except Exception as e:
+                        print(f"[WARN] Error with {name} scraper: {e}")
+        
+        # Stops searching (and fetching pages) once the quota is filled
+        collector = ArticleCollector(quota=DEFAULT_STOCK_QUOTA, stock_code=stock_code)
+        return list(collector.collect(stream()))
+    
+    def scrape_all(self, stock_codes: Optional[List[str]] = None, fetch_content: bool = True) -> List[Dict]:
+        """Scrape many stocks (and article bodies) concurrently with the async engine."""
+        from scrapers.async_engine import AsyncScrapeEngine
         
-        return unique_articles[:90]
+        engine = AsyncScrapeEngine(self.scrapers, frontier=self.frontier)
+        return engine.run(stock_codes or list(STOCK_KEYWORDS), fetch_content=fetch_content)
     
     def get_full_article(self, article: Dict) -> Optional[Dict]:
         source = article.get('source', '')
@@ -481,12 +529,7 @@ if __name__ == '__main__':
         print(f"   Found {len(articles)} articles for {stock_code}")
         all_articles.extend(articles)
     
-    seen_urls = set()
-    unique_articles = []
-    for article in all_articles:
-        if article['url'] not in seen_urls:
-            seen_urls.add(article['url'])
-            unique_articles.append(article)
+    unique_articles = list(ArticleCollector().collect(all_articles))
     
     print(f"\n[INFO] Fetching full content for {len(unique_articles)} articles...")
     for i, article in enumerate(unique_articles, 1):
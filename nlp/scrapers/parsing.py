@@ -0,0 +1,245 @@
+"""
+HTML parsing layer for article, quote and palmares pages.
+Pages are parsed with lxml (html.parser only if lxml is missing), and a
+SubtreeFilter keeps BeautifulSoup from building anything but the subtrees the
+extractors read. Quote pages use selectolax when it is installed. Numbers are
+extracted with precompiled regexes.
+
+Benchmark parse time per page on the saved fixtures:
+    python scrapers/parsing.py --repeat 200
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.filter import ElementFilter
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    LexborHTMLParser = None
+    SELECTOLAX_AVAILABLE = False
+
+
+NUMBER_RE = re.compile(r'(\d+[,.]?\d*)')
+SIGNED_NUMBER_RE = re.compile(r'([+-]?\d+[,.]?\d*)%?')
+INTEGER_RE = re.compile(r'(\d+)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class SubtreeFilter(ElementFilter):
+    """
+    parse_only filter keeping whole subtrees rooted at tags with one of `names`
+    or a class matching `class_pattern`. Tags nested in a kept subtree are always
+    kept; everything else (head, scripts, menus...) is never turned into Tags.
+    Keep the filter a superset of the selectors run on the result.
+    """
+
+    def __init__(self, names: Iterable[str] = (), class_pattern: Optional[str] = None):
+        super().__init__()
+        self.names = frozenset(names)
+        self.class_pattern: Optional[Pattern] = re.compile(class_pattern) if class_pattern else None
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        if name in self.names:
+            return True
+        if self.class_pattern is None or not attrs:
+            return False
+        classes = attrs.get('class')
+        if isinstance(classes, list):
+            classes = ' '.join(classes)
+        return bool(classes) and bool(self.class_pattern.search(classes))
+
+    def allow_string_creation(self, string) -> bool:
+        # Only text inside kept subtrees matters
+        return False
+
+
+def make_soup(html, parse_only: Optional[SubtreeFilter] = None) -> BeautifulSoup:
+    return BeautifulSoup(html, PARSER, parse_only=parse_only)
+
+
+def to_float(text: str, pattern: Pattern = NUMBER_RE) -> Optional[float]:
+    match = pattern.search(text)
+    return float(match.group(1).replace(',', '.')) if match else None
+
+
+# --- Market pages (ilboursa) ---
+
+QUOTE_PRICE_SELECTOR = "td.cours, .last-price, [class*='cours']"
+QUOTE_FILTER = SubtreeFilter(['table'], r'cours|last-price')
+
+# (label keywords, field); the first matching entry wins, as labels like "plus bas" are checked in order
+QUOTE_FIELDS = (
+    (('ouverture', 'open'), 'open'),
+    (('haut', 'high'), 'high'),
+    (('bas', 'low'), 'low'),
+    (('volume',), 'volume'),
+    (('variation', 'change'), 'change_pct'),
+)
+
+
+def _quote_fields(price_text: Optional[str], rows: Iterable[List[str]]) -> Dict:
+    data = {}
+    if price_text:
+        price = to_float(WHITESPACE_RE.sub('', price_text))
+        if price is not None:
+            data['price'] = price
+
+    for cells in rows:
+        if len(cells) < 2:
+            continue
+        label = cells[0].lower()
+        value_text = cells[1]
+        for keywords, field in QUOTE_FIELDS:
+            if any(keyword in label for keyword in keywords):
+                if field == 'volume':
+                    match = INTEGER_RE.search(WHITESPACE_RE.sub('', value_text))
+                    if match:
+                        data[field] = int(match.group(1))
+                else:
+                    value = to_float(value_text, SIGNED_NUMBER_RE if field == 'change_pct' else NUMBER_RE)
+                    if value is not None:
+                        data[field] = value
+                break
+    return data
+
+
+def parse_quote(html, use_selectolax: bool = SELECTOLAX_AVAILABLE) -> Dict:
+    """Price, open, high, low, volume and change_pct found on a quote page."""
+    if use_selectolax:
+        tree = LexborHTMLParser(html)
+        price = tree.css_first(QUOTE_PRICE_SELECTOR)
+        rows = ([cell.text(strip=True) for cell in row.css('td')] for row in tree.css('table tr'))
+        return _quote_fields(price.text(strip=True) if price else None, rows)
+
+    soup = make_soup(html, QUOTE_FILTER)
+    price = soup.select_one(QUOTE_PRICE_SELECTOR)
+    rows = ([cell.get_text(strip=True) for cell in row.select('td')] for row in soup.select('table tr'))
+    return _quote_fields(price.get_text(strip=True) if price else None, rows)
+
+
+TUNINDEX_FILTER = SubtreeFilter((), r'cours-actuel|last-price|price|variation|change')
+
+
+def parse_tunindex(html) -> Dict:
+    """{'value', 'change_pct'} of the index page, None where not found."""
+    soup = make_soup(html, TUNINDEX_FILTER)
+    value_elem = soup.select_one(".cours-actuel, .last-price, [class*='price']")
+    change_elem = soup.select_one(".variation, [class*='change']")
+    return {
+        'value': to_float(WHITESPACE_RE.sub('', value_elem.get_text(strip=True))) if value_elem else None,
+        'change_pct': to_float(change_elem.get_text(strip=True), SIGNED_NUMBER_RE) if change_elem else None,
+    }
+
+
+# Section headers are found with find_previous, so every candidate header tag is kept
+PALMARES_FILTER = SubtreeFilter(['h2', 'h3', 'div', 'table'])
+
+
+def parse_top_movers(html, limit: int = 10) -> Tuple[List[Dict], List[Dict]]:
+    soup = make_soup(html, PALMARES_FILTER)
+    gainers: List[Dict] = []
+    losers: List[Dict] = []
+
+    for table in soup.select('table'):
+        header = table.find_previous(['h2', 'h3', 'div'])
+        header_text = header.get_text(strip=True).lower() if header else ''
+        if 'hausse' in header_text or 'gainer' in header_text:
+            target = gainers
+        elif 'baisse' in header_text or 'loser' in header_text:
+            target = losers
+        else:
+            continue
+
+        for row in table.select('tr')[1:limit + 1]:
+            cells = row.select('td')
+            if len(cells) < 3:
+                continue
+            code_elem = cells[0].select_one('a')
+            code = code_elem.get_text(strip=True) if code_elem else cells[0].get_text(strip=True)
+            target.append({
+                'code': code,
+                'price': to_float(cells[1].get_text(strip=True)) or 0,
+                'change_pct': to_float(cells[2].get_text(strip=True), SIGNED_NUMBER_RE) or 0,
+            })
+
+    return gainers, losers
+
+
+def benchmark(pages: List[Tuple[str, str, Optional[SubtreeFilter]]], repeat: int = 100) -> List[Dict]:
+    """Mean parse time per page (ms) for each available parsing path."""
+    import time
+
+    def timed(fn) -> float:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - started) * 1000 / repeat
+
+    rows = []
+    for name, html, parse_only in pages:
+        row = {
+            'page': name,
+            'kb': round(len(html.encode('utf-8')) / 1024, 1),
+            'html.parser': timed(lambda: BeautifulSoup(html, 'html.parser')),
+        }
+        if PARSER == 'lxml':
+            row['lxml'] = timed(lambda: BeautifulSoup(html, 'lxml'))
+        if parse_only is not None:
+            row[f'{PARSER}+filter'] = timed(lambda: make_soup(html, parse_only))
+        if SELECTOLAX_AVAILABLE:
+            row['selectolax'] = timed(lambda: LexborHTMLParser(html))
+        rows.append(row)
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import sys
+    from pathlib import Path
+
+    NLP_ROOT = Path(__file__).parent.parent
+    if str(NLP_ROOT) not in sys.path:
+        sys.path.insert(0, str(NLP_ROOT))
+
+    from scrapers.fixture_server import DEFAULT_FIXTURES_DIR
+    from scrapers.news_scrapers import NewsAggregator
+
+    parser = argparse.ArgumentParser(description='Parse-time microbenchmark on saved HTML fixtures')
+    parser.add_argument('--dir', default=str(DEFAULT_FIXTURES_DIR))
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    directory = Path(args.dir)
+    with open(directory / 'index.json', 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    filters = {name: cls.ARTICLE_FILTER for name, cls in NewsAggregator.SCRAPERS.items()}
+    market_filters = {'cotation': QUOTE_FILTER, 'palmares': PALMARES_FILTER, 'tunindex': TUNINDEX_FILTER}
+
+    pages = []
+    for filename in sorted(set(index.values())):
+        source = filename.split('_')[0]
+        if source == 'ilboursa':
+            parse_only = next((flt for key, flt in market_filters.items() if key in filename), None)
+        else:
+            parse_only = filters.get(source) if '_article_' in filename else None
+        pages.append((filename, (directory / filename).read_text(encoding='utf-8'), parse_only))
+
+    results = benchmark(pages, args.repeat)
+    columns = ['html.parser', 'lxml', f'{PARSER}+filter', 'selectolax']
+    columns = [c for c in columns if any(c in row for row in results)]
+    print(f"{'page':45} {'KB':>6} " + ' '.join(f'{c:>14}' for c in columns))
+    for row in results:
+        cells = ' '.join(f"{row[c]:>11.3f} ms" if c in row else f"{'-':>14}" for c in columns)
+        print(f"{row['page']:45} {row['kb']:>6} {cells}")
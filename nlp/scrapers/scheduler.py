@@ -14,8 +14,10 @@ NLP_ROOT = Path(__file__).parent.parent
 if str(NLP_ROOT) not in sys.path:
     sys.path.insert(0, str(NLP_ROOT))
 
+from scrapers.frontier import CrawlFrontier
 from scrapers.news_scrapers import NewsAggregator, STOCK_KEYWORDS
 from sentiment.analyzer import SentimentAnalyzer
+from sentiment.cache import get_sentiment_cache
 
 
 class NewsScheduler:
@@ -23,10 +25,15 @@ class NewsScheduler:
         self,
         interval_seconds: int = 3600,
         on_news_callback: Optional[Callable[[List[Dict]], None]] = None,
+        analyzer: Optional[SentimentAnalyzer] = None,
+        frontier: Optional[CrawlFrontier] = None,
+        cache_size: int = 1000,
     ):
         self.interval = interval_seconds
-        self.aggregator = NewsAggregator()
-        self.analyzer = SentimentAnalyzer()
+        # The frontier persists across runs, so each run only scrapes new articles
+        self.aggregator = NewsAggregator(frontier=frontier or CrawlFrontier())
+        self.cache_size = cache_size
+        self.analyzer = analyzer or SentimentAnalyzer(cache=get_sentiment_cache())
         self.on_news = on_news_callback
         self._running = False
         self._thread: Optional[threading.Thread] = None
@@ -36,51 +43,33 @@ class NewsScheduler:
     def scrape_and_analyze(self) -> List[Dict]:
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting news scrape...")
         
-        all_articles = []
-        for stock_code in STOCK_KEYWORDS:
-            try:
-                articles = self.aggregator.get_news_for_stock(stock_code, days_back=1)
-                all_articles.extend(articles)
-            except Exception as e:
-                print(f"[WARN] Failed to scrape {stock_code}: {e}")
-        
-        seen_urls = set()
-        unique_articles = []
-        for article in all_articles:
-            if article['url'] not in seen_urls:
-                seen_urls.add(article['url'])
-                unique_articles.append(article)
-        
-        print(f"[INFO] Fetching content for {len(unique_articles)} articles...")
-        for article in unique_articles:
-            try:
-                full = self.aggregator.get_full_article(article)
-                if full and full.get('content'):
-                    article['description'] = full['content']
-                else:
-                    article['description'] = ''
-            except Exception:
-                article['description'] = ''
+        try:
+            unique_articles = self.aggregator.scrape_all(list(STOCK_KEYWORDS))
+        except Exception as e:
+            print(f"[WARN] Scrape failed: {e}")
+            unique_articles = []
         
         print(f"[INFO] Analyzing sentiment for {len(unique_articles)} articles...")
-        for article in unique_articles:
-            text = f"{article.get('title', '')} {article.get('description', '')}"
-            try:
-                sentiment_result = self.analyzer.analyze(text)
-                article['sentiment'] = sentiment_result['sentiment']
-                article['sentiment_score'] = sentiment_result['score']
-                article['sentiment_confidence'] = sentiment_result['confidence']
-            except Exception:
-                article['sentiment'] = 'neutral'
-                article['sentiment_score'] = 0.0
-                article['sentiment_confidence'] = 0.0
+        try:
+            results = self.analyzer.analyze_batch(unique_articles)
+        except Exception as e:
+            print(f"[WARN] Sentiment analysis failed: {e}")
+            results = [{'label': 'neutral', 'score': 0.0, 'confidence': 0.0}] * len(unique_articles)
+        
+        for article, sentiment_result in zip(unique_articles, results):
+            article['sentiment'] = sentiment_result['label']
+            article['sentiment_score'] = sentiment_result['score']
+            article['sentiment_confidence'] = sentiment_result['confidence']
         
-        self.aggregator.save_cache(unique_articles, 'news_cache.json')
+        if unique_articles:
+            new_urls = {a['url'] for a in unique_articles}
+            cached = [a for a in self.aggregator.load_cache('news_cache.json') if a.get('url') not in new_urls]
+            self.aggregator.save_cache((unique_articles + cached)[:self.cache_size], 'news_cache.json')
         
         self.last_run = datetime.now()
         self.last_articles = unique_articles
         
-        print(f"[OK] Scraped {len(unique_articles)} articles with sentiment scores")
+        print(f"[OK] Scraped {len(unique_articles)} new articles with sentiment scores")
         
         if self.on_news:
             try:
@@ -144,11 +133,21 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='BVMT News Scheduler')
     parser.add_argument('--interval', type=float, default=1.0, help='Scrape interval in hours')
     parser.add_argument('--once', action='store_true', help='Run once and exit')
+    parser.add_argument('--workers', type=int, default=0, help='Sentiment worker processes (0 = inline)')
     args = parser.parse_args()
     
     if args.once:
-        scheduler = NewsScheduler()
+        analyzer = None
+        if args.workers > 0:
+            from sentiment.workers import SentimentWorkerPool
+            analyzer = SentimentAnalyzer(
+                cache=get_sentiment_cache(),
+                workers=SentimentWorkerPool(processes=args.workers),
+            )
+        scheduler = NewsScheduler(analyzer=analyzer)
         articles = scheduler.run_once()
+        if analyzer is not None:
+            analyzer.workers.shutdown()
         print(f"\n[DONE] Processed {len(articles)} articles")
         
         positives = sum(1 for a in articles if a.get('sentiment') == 'positive')
@@ -5,13 +5,22 @@ Enhanced with comprehensive financial vocabulary for Tunisian market.
 """
 
 from typing import Dict, List, Optional, Union
+from collections import deque
 from datetime import datetime
 import numpy as np
 import json
 import re
+import threading
+import time
 from pathlib import Path
 
 
+RULES_VERSION = 'rules-1'
+
+# Model execution modes: float32 PyTorch, dynamic int8 quantization, ONNX Runtime
+QUANTIZE_MODES = ('int8', 'onnx')
+
+
 class SentimentAnalyzer:
     """
     Sentiment analysis for French and Arabic financial news.
@@ -119,10 +128,33 @@ class SentimentAnalyzer:
         ]
     }
     
-    def __init__(self, model_name: str = "nlptown/bert-base-multilingual-uncased-sentiment", load_model: bool = False):
+    def __init__(
+        self,
+        model_name: str = "nlptown/bert-base-multilingual-uncased-sentiment",
+        load_model: bool = False,
+        batch_size: int = 16,
+        num_threads: Optional[int] = None,
+        cache=None,
+        quantize: Optional[str] = None,
+        max_concurrent_batches: int = 1,
+        workers=None,
+    ):
+        if quantize and quantize not in QUANTIZE_MODES:
+            raise ValueError(f"quantize must be one of {QUANTIZE_MODES}, got {quantize!r}")
         self.model_name = model_name
-        self.pipeline = None
+        self.cache = cache
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self.num_threads = num_threads
+        self.quantize = quantize
+        self.tokenizer = None
+        self.model = None
         self._model_loaded = False
+        self._encoding_cache: Dict[str, List[int]] = {}
+        self._encoding_cache_size = 4096
+        # Concurrent callers queue here instead of oversubscribing the CPU threads
+        self._inference_slots = threading.BoundedSemaphore(max(1, max_concurrent_batches))
+        self._batch_latencies: deque = deque(maxlen=500)
         
         if load_model:
             self._load_model()
@@ -144,18 +176,74 @@ class SentimentAnalyzer:
             return
         self._model_loaded = True
         try:
-            from transformers import pipeline
-            self.pipeline = pipeline(
-                "sentiment-analysis",
-                model=self.model_name,
-                truncation=True,
-                max_length=512
-            )
-            print(f"[OK] Loaded sentiment model: {self.model_name}")
+            import torch
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+            
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            if self.quantize == 'onnx':
+                self.model = self._load_onnx_model()
+            else:
+                self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+                self.model.eval()
+                if self.quantize == 'int8':
+                    self.model = torch.quantization.quantize_dynamic(
+                        self.model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+            print(f"[OK] Loaded sentiment model: {self.model_name} ({self.quantize or 'fp32'})")
         except Exception as e:
             print(f"[WARN] Could not load model: {e}")
             print("   Using rule-based fallback")
-            self.pipeline = None
+            self.tokenizer = None
+            self.model = None
+    
+    def _load_onnx_model(self):
+        """Export (or load an already exported) checkpoint to ONNX Runtime on CPU."""
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        
+        options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+        
+        export = not (Path(self.model_name) / 'model.onnx').exists()
+        return ORTModelForSequenceClassification.from_pretrained(
+            self.model_name,
+            export=export,
+            provider='CPUExecutionProvider',
+            session_options=options,
+        )
+    
+    @property
+    def version(self) -> Optional[str]:
+        """
+        Identifies the scoring backend, so cached results are never reused across models.
+        None while a worker pool has not started yet: its workers decide whether the model loaded.
+        """
+        if self.workers is not None:
+            return self.workers.version
+        if self.model is not None:
+            return f"{self.model_name}:{self.quantize or 'fp32'}"
+        return RULES_VERSION
+    
+    def latency_stats(self) -> Dict:
+        """Per-batch model latency over the most recent batches."""
+        if not self._batch_latencies:
+            return {'mode': self.quantize or 'fp32', 'batches': 0}
+        
+        latencies = np.array([ms for ms, _ in self._batch_latencies])
+        sizes = np.array([size for _, size in self._batch_latencies])
+        return {
+            'mode': self.quantize or 'fp32',
+            'batches': int(len(latencies)),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+            'mean_ms': round(float(latencies.mean()), 2),
+            'ms_per_text': round(float(latencies.sum() / sizes.sum()), 2),
+        }
     
     def detect_language(self, text: str) -> str:
         """Detect if text is primarily Arabic or French."""
@@ -181,34 +269,124 @@ class SentimentAnalyzer:
         if not language:
             language = self.detect_language(text)
         
-        text = text[:512]
+        return self.analyze_texts([text], [language])[0]
+    
+    def analyze_texts(self, texts: List[str], languages: Optional[List[Optional[str]]] = None) -> List[Dict]:
+        """Analyze many texts, running the model over padded minibatches."""
+        languages = languages or [None] * len(texts)
+        results: List[Optional[Dict]] = [None] * len(texts)
+        pending = []
+        
+        for i, (text, language) in enumerate(zip(texts, languages)):
+            if not text or len(text.strip()) < 10:
+                results[i] = {'score': 0.0, 'label': 'neutral', 'confidence': 0.0, 'language': language or 'unknown'}
+                continue
+            pending.append((i, text[:512], language or self.detect_language(text)))
+        
+        if self.workers is not None and pending:
+            # First batch: start the pool, which also settles the version cache keys use
+            self.workers.start()
+        
+        keys = {}
+        if self.cache is not None and pending:
+            version = self.version
+            keys = {i: self.cache.key(text, version, language) for i, text, language in pending}
+            cached = self.cache.get_many(keys.values())
+            for i, _, _ in pending:
+                if keys[i] in cached:
+                    results[i] = cached[keys[i]]
+            pending = [item for item in pending if results[item[0]] is None]
+        # Only results from the versioned backend are cached, never the fallback
+        to_store = [i for i, _, _ in pending]
+        
+        if self.workers is not None and pending:
+            try:
+                scored = self.workers.analyze_texts(
+                    [text for _, text, _ in pending],
+                    [language for _, _, language in pending],
+                )
+                for (i, _, _), result in zip(pending, scored):
+                    results[i] = result
+                pending = []
+            except Exception as e:
+                print(f"[WARN] Sentiment workers error: {e}")
+                to_store = []
         
-        if self.pipeline:
+        if self.model is not None and pending:
             try:
-                result = self.pipeline(text)[0]
-                # nlptown model returns "1 star" to "5 stars"
-                stars = int(result['label'][0])
-                score = (stars - 3) / 2  # Normalize to -1 to 1
-                confidence = result['score']
-                
-                if score > 0.2:
-                    label = 'positive'
-                elif score < -0.2:
-                    label = 'negative'
-                else:
-                    label = 'neutral'
-                
-                return {
-                    'score': round(score, 3),
-                    'label': label,
-                    'confidence': round(confidence, 3),
-                    'language': language,
-                    'raw_label': result['label']
-                }
+                predictions = self._predict_stars([text for _, text, _ in pending])
+                for (i, _, language), (raw_label, confidence) in zip(pending, predictions):
+                    results[i] = self._stars_result(raw_label, confidence, language)
+                pending = []
             except Exception as e:
                 print(f"[WARN] Model error: {e}")
+                to_store = []
+        
+        for i, text, language in pending:
+            results[i] = self._rule_based_sentiment(text, language)
+        
+        if self.cache is not None and to_store:
+            version = self.version
+            self.cache.put_many([(keys[i], version, results[i]) for i in to_store])
+        
+        return results
+    
+    def _encode(self, texts: List[str]) -> List[List[int]]:
+        """Tokenize texts once, reusing cached input ids for repeated texts."""
+        missing = list(dict.fromkeys(t for t in texts if t not in self._encoding_cache))
+        if missing:
+            encoded = self.tokenizer(missing, truncation=True, max_length=512)
+            if len(self._encoding_cache) + len(missing) > self._encoding_cache_size:
+                self._encoding_cache.clear()
+            self._encoding_cache.update(zip(missing, encoded['input_ids']))
+        return [self._encoding_cache[t] for t in texts]
+    
+    def _predict_stars(self, texts: List[str]) -> List[tuple]:
+        """Return (raw label, confidence) per text, in input order."""
+        import torch
+        
+        input_ids = self._encode(texts)
+        # Sort by token length so each minibatch pads to a similar length
+        order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+        predictions: List[tuple] = [None] * len(texts)
+        
+        with self._inference_slots, torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                chunk = order[start:start + self.batch_size]
+                started = time.perf_counter()
+                batch = self.tokenizer.pad(
+                    {'input_ids': [input_ids[i] for i in chunk]},
+                    padding=True,
+                    return_tensors='pt',
+                )
+                logits = self.model(**batch).logits
+                probs = torch.softmax(logits, dim=-1)
+                confidences, labels = probs.max(dim=-1)
+                self._batch_latencies.append(((time.perf_counter() - started) * 1000, len(chunk)))
+                for i, label_id, confidence in zip(chunk, labels.tolist(), confidences.tolist()):
+                    predictions[i] = (self.model.config.id2label[label_id], confidence)
+        
+        return predictions
+    
+    def _stars_result(self, raw_label: str, confidence: float, language: str) -> Dict:
+        # nlptown model returns "1 star" to "5 stars"
+        stars = int(raw_label[0])
+        score = (stars - 3) / 2  # Normalize to -1 to 1
+        
+        if score > 0.2:
+            label = 'positive'
+        elif score < -0.2:
+            label = 'negative'
+        else:
+            label = 'neutral'
         
-        return self._rule_based_sentiment(text, language)
+        return {
+            'score': round(score, 3),
+            'label': label,
+            'confidence': round(confidence, 3),
+            'language': language,
+            'raw_label': raw_label
+        }
     
     def _rule_based_sentiment(self, text: str, language: str = 'fr') -> Dict:
         """Enhanced rule-based sentiment with comprehensive vocabulary."""
@@ -262,17 +440,16 @@ class SentimentAnalyzer:
             }
         }
     
-    def analyze_article(self, article: Dict) -> Dict:
-        """Analyze a news article with title and content."""
+    def _article_parts(self, article: Dict) -> tuple:
         title = article.get('title', '')
         content = article.get('content', article.get('description', ''))
         language = article.get('language', self.detect_language(title + ' ' + content))
-        
+        return title, content, language
+    
+    def _combine_article(self, article: Dict, language: str, title_result: Dict,
+                         content_result: Optional[Dict]) -> Dict:
         # Title has higher weight (1.5x)
-        title_result = self.analyze(title, language)
-        
-        if content and len(content) > 50:
-            content_result = self.analyze(content[:1000], language)
+        if content_result is not None:
             combined_score = (title_result['score'] * 1.5 + content_result['score']) / 2.5
             combined_confidence = (title_result['confidence'] + content_result['confidence']) / 2
         else:
@@ -298,9 +475,39 @@ class SentimentAnalyzer:
             'stock_code': article.get('stock_code', '')
         }
     
+    def analyze_article(self, article: Dict) -> Dict:
+        """Analyze a news article with title and content."""
+        return self.analyze_batch([article])[0]
+    
     def analyze_batch(self, articles: List[Dict]) -> List[Dict]:
-        """Analyze multiple articles."""
-        return [self.analyze_article(article) for article in articles]
+        """Analyze multiple articles, scoring all titles and content snippets in one pass."""
+        texts: List[str] = []
+        languages: List[str] = []
+        slots = []
+        
+        for article in articles:
+            title, content, language = self._article_parts(article)
+            title_idx = len(texts)
+            texts.append(title)
+            languages.append(language)
+            content_idx = None
+            if content and len(content) > 50:
+                content_idx = len(texts)
+                texts.append(content[:1000])
+                languages.append(language)
+            slots.append((language, title_idx, content_idx))
+        
+        results = self.analyze_texts(texts, languages)
+        
+        return [
+            self._combine_article(
+                article,
+                language,
+                results[title_idx],
+                results[content_idx] if content_idx is not None else None,
+            )
+            for article, (language, title_idx, content_idx) in zip(articles, slots)
+        ]
 
 
 class StockSentimentAggregator:
@@ -389,8 +596,8 @@ class StockSentimentAggregator:
 
 class SentimentService:
     
-    def __init__(self, cache_dir: str = 'nlp/data'):
-        self.analyzer = SentimentAnalyzer()
+    def __init__(self, cache_dir: str = 'nlp/data', result_cache=None):
+        self.analyzer = SentimentAnalyzer(cache=result_cache)
         self.aggregator = StockSentimentAggregator(self.analyzer)
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
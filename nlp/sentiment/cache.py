@@ -0,0 +1,150 @@
+"""
+Persistent sentiment result cache.
+Results are keyed by a hash of the normalized text plus the analyzer version,
+stored in SQLite with an in-memory LRU in front.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / 'data' / 'sentiment_cache.sqlite3'
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize('NFKC', text or '')
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+def cache_key(text: str, version: str, language: Optional[str] = None) -> str:
+    payload = f"{version}\x1f{language or ''}\x1f{normalize_text(text)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SentimentCache:
+    def __init__(self, path: Optional[str] = None, memory_size: int = 4096):
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS sentiment_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' version TEXT NOT NULL,'
+            ' result TEXT NOT NULL,'
+            ' created_at TEXT NOT NULL)'
+        )
+        self._conn.commit()
+
+    def key(self, text: str, version: str, language: Optional[str] = None) -> str:
+        return cache_key(text, version, language)
+
+    def _remember(self, key: str, result: Dict):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Dict] = {}
+
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, result FROM sentiment_cache WHERE key IN ({placeholders})',
+                    chunk,
+                ).fetchall()
+                for key, raw in rows:
+                    result = json.loads(raw)
+                    found[key] = result
+                    self._remember(key, result)
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return {key: dict(result) for key, result in found.items()}
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: List[Tuple[str, str, Dict]]):
+        """Store (key, version, result) triples."""
+        if not items:
+            return
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO sentiment_cache (key, version, result, created_at) VALUES (?, ?, ?, ?)',
+                [(key, version, json.dumps(result, ensure_ascii=False), now) for key, version, result in items],
+            )
+            self._conn.commit()
+            for key, _, result in items:
+                self._remember(key, dict(result))
+
+    def put(self, key: str, version: str, result: Dict):
+        self.put_many([(key, version, result)])
+
+    def purge_version(self, keep_version: str) -> int:
+        """Drop entries written by any other analyzer version."""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM sentiment_cache WHERE version != ?', (keep_version,))
+            self._conn.commit()
+            self._memory.clear()
+            return cursor.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self._conn.execute('SELECT COUNT(*) FROM sentiment_cache').fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'entries': total,
+                'memory_entries': len(self._memory),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[SentimentCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_sentiment_cache() -> SentimentCache:
+    """Process-wide cache shared by the scheduler and the API."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SentimentCache()
+        return _default_cache
@@ -0,0 +1,104 @@
+"""
+Accuracy parity check for quantized sentiment models.
+Scores a fixed French/Arabic test set with the float model and a quantized
+(int8 or ONNX) variant of the same checkpoint, then compares labels, scores
+and per-batch latency.
+
+Usage:
+    python sentiment/parity.py --model path/to/checkpoint --quantize int8
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+NLP_ROOT = Path(__file__).parent.parent
+if str(NLP_ROOT) not in sys.path:
+    sys.path.insert(0, str(NLP_ROOT))
+
+from sentiment.analyzer import SentimentAnalyzer
+
+
+PARITY_TEXTS = [
+    "SFBT annonce une hausse de 15% de son benefice annuel",
+    "La banque BIAT en difficulte face a la crise economique",
+    "Le marche tunisien reste stable cette semaine",
+    "Resultats exceptionnels pour SAH avec des profits records",
+    "Chute des actions de Carthage Cement suite aux pertes",
+    "Poulina Group distribue un dividende en progression",
+    "Le TUNINDEX termine la seance en legere baisse",
+    "La STB engage une restructuration apres un deficit important",
+    "Attijari Bank signe un partenariat strategique avec un groupe europeen",
+    "Euro-Cycles voit ses exportations ralentir au premier semestre",
+    "Suspension de la cotation de la societe en attendant un communique",
+    "Delice Holding confirme ses objectifs de croissance pour l'annee",
+    "بورصة تونس تسجل ارتفاعا ملحوظا في المؤشر العام",
+    "خسائر كبيرة للشركات الصناعية في الربع الاخير",
+    "نمو قوي في ارباح البنوك التونسية",
+    "تراجع حاد في اسعار الاسهم بسبب الازمة",
+    "توزيعات ارباح قياسية لشركة صوتوشيم",
+    "استقرار نسبي في حجم التداول خلال الاسبوع",
+]
+
+
+def compare(reference: SentimentAnalyzer, candidate: SentimentAnalyzer, texts: List[str] = PARITY_TEXTS) -> Dict:
+    ref_results = reference.analyze_texts(texts)
+    cand_results = candidate.analyze_texts(texts)
+
+    ref_labels = [r.get('raw_label', r['label']) for r in ref_results]
+    cand_labels = [r.get('raw_label', r['label']) for r in cand_results]
+    score_diff = np.abs(
+        np.array([r['score'] for r in ref_results]) - np.array([r['score'] for r in cand_results])
+    )
+    polarity_agreement = np.mean([r['label'] == c['label'] for r, c in zip(ref_results, cand_results)])
+    star_agreement = np.mean([r == c for r, c in zip(ref_labels, cand_labels)])
+
+    return {
+        'texts': len(texts),
+        'polarity_agreement': round(float(polarity_agreement), 3),
+        'star_agreement': round(float(star_agreement), 3),
+        'max_score_diff': round(float(score_diff.max()), 3),
+        'mean_score_diff': round(float(score_diff.mean()), 3),
+        'reference_latency': reference.latency_stats(),
+        'candidate_latency': candidate.latency_stats(),
+        'mismatches': [
+            {'text': text, 'reference': r, 'candidate': c}
+            for text, r, c in zip(texts, ref_labels, cand_labels) if r != c
+        ],
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Quantized sentiment model parity check')
+    parser.add_argument('--model', default='nlptown/bert-base-multilingual-uncased-sentiment',
+                        help='Model name or local checkpoint path')
+    parser.add_argument('--quantize', choices=['int8', 'onnx'], default='int8')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--min-agreement', type=float, default=0.9,
+                        help='Fail if polarity agreement drops below this ratio')
+    args = parser.parse_args()
+
+    reference = SentimentAnalyzer(args.model, load_model=True, batch_size=args.batch_size,
+                                  num_threads=args.threads)
+    candidate = SentimentAnalyzer(args.model, load_model=True, batch_size=args.batch_size,
+                                  num_threads=args.threads, quantize=args.quantize)
+    if reference.model is None or candidate.model is None:
+        print("[ERROR] Could not load both models")
+        sys.exit(2)
+
+    report = compare(reference, candidate)
+    print(f"[PARITY] fp32 vs {args.quantize} on {report['texts']} texts")
+    print(f"   Polarity agreement: {report['polarity_agreement']:.1%}")
+    print(f"   Star agreement:     {report['star_agreement']:.1%}")
+    print(f"   Score diff:         mean {report['mean_score_diff']} / max {report['max_score_diff']}")
+    print(f"   fp32 latency:       {report['reference_latency']}")
+    print(f"   {args.quantize} latency:  {report['candidate_latency']}")
+    for mismatch in report['mismatches']:
+        print(f"   [DIFF] {mismatch['reference']} -> {mismatch['candidate']} | {mismatch['text'][:50]}")
+
+    sys.exit(0 if report['polarity_agreement'] >= args.min_agreement else 1)
@@ -0,0 +1,100 @@
+"""
+Process-pool sentiment workers.
+Each worker process builds its SentimentAnalyzer once (model included) and
+scores chunks of texts sent through the pool's call queue. The number of
+chunks in flight is bounded, so producers block instead of piling up memory,
+and results are collected in submission order.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+
+_worker_analyzer = None
+
+
+def _init_worker(analyzer_kwargs: Dict):
+    global _worker_analyzer
+    from sentiment.analyzer import SentimentAnalyzer
+    _worker_analyzer = SentimentAnalyzer(**analyzer_kwargs)
+
+
+def _worker_version() -> str:
+    return _worker_analyzer.version
+
+
+def _score_chunk(texts: List[str], languages: List[Optional[str]]) -> List[Dict]:
+    return _worker_analyzer.analyze_texts(texts, languages)
+
+
+class SentimentWorkerPool:
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        chunk_size: int = 64,
+        max_pending: Optional[int] = None,
+        **analyzer_kwargs,
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.max_pending = max_pending or self.processes * 2
+        self.analyzer_kwargs = analyzer_kwargs
+        self.version: Optional[str] = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            # spawn: never fork a parent that may hold torch/OpenMP threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.analyzer_kwargs,),
+            )
+            # Workers decide whether the model loaded; cache keys must follow them
+            self.version = self._executor.submit(_worker_version).result()
+        print(f"[OK] Sentiment worker pool started ({self.processes} processes, {self.version})")
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def submit(self, texts: List[str], languages: List[Optional[str]]) -> Future:
+        """Queue one chunk, blocking while max_pending chunks are already in flight."""
+        if self._executor is None:
+            self.start()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(_score_chunk, texts, languages)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def analyze_texts(self, texts: List[str], languages: Optional[List[Optional[str]]] = None) -> List[Dict]:
+        languages = languages or [None] * len(texts)
+        futures = [
+            self.submit(texts[start:start + self.chunk_size], languages[start:start + self.chunk_size])
+            for start in range(0, len(texts), self.chunk_size)
+        ]
+        results: List[Dict] = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
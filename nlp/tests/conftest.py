@@ -0,0 +1,21 @@
+"""Shared fixtures: scrapers get a throwaway HTTP cache, never data/http_cache.sqlite3."""
+
+import pytest
+
+from scrapers import http_cache
+from scrapers.fixture_server import FixtureServer
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    # Read by CachedSession when a scraper is created
+    test_cache = http_cache.HTTPCache(str(tmp_path / 'http_cache.sqlite3'))
+    monkeypatch.setattr(http_cache, '_http_cache', test_cache)
+    yield test_cache
+    test_cache.close()
+
+
+@pytest.fixture
+def server():
+    with FixtureServer() as fixture_server:
+        yield fixture_server
@@ -0,0 +1,88 @@
+"""Async scraping engine against the local fixture server."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from scrapers import async_engine
+from scrapers.async_engine import AsyncScrapeEngine
+from scrapers.fixture_server import FixtureServer
+from scrapers.news_scrapers import NewsAggregator
+
+ARTICLE = 'www.webmanagercenter.com/2024/05/14/sfbt-hausse-benefice-2023/'
+
+
+def _fetch_all(urls, http_cache=None, **options):
+    """(engine, bodies) after fetching `urls` concurrently on one engine."""
+    async def run():
+        async with httpx.AsyncClient() as client:
+            engine = AsyncScrapeEngine({}, client=client, **options)
+            bodies = await asyncio.gather(*(engine.fetch(url, http_cache=http_cache, source='test') for url in urls))
+            return engine, bodies
+
+    return asyncio.run(run())
+
+
+def test_scrape_reads_every_source_from_the_fixture_pages(server, tmp_path):
+    aggregator = NewsAggregator(cache_dir=str(tmp_path), base_url_for=server.base_url_for)
+    engine = AsyncScrapeEngine(aggregator.scrapers, requests_per_second=100, burst=100)
+    articles = engine.run(['SFBT'])
+    assert {article['source'] for article in articles} == {'webmanagercenter', 'businessnews', 'radioexpressfm'}
+    assert all(article['url'].startswith(server.origin) for article in articles)
+    assert all(article['description'] for article in articles)
+    assert f'https://{ARTICLE}' in server.hits
+
+
+def test_per_host_concurrency_is_capped():
+    with FixtureServer(delay=0.05) as server:
+        urls = [f'{server.origin}/{ARTICLE}'] * 8
+        engine, bodies = _fetch_all(urls, per_host_concurrency=2, requests_per_second=1000, burst=1000)
+    assert all(bodies)
+    assert server.peak_in_flight == 2
+    assert engine.stats == {'requests': 8, 'errors': 0}
+
+
+def test_token_bucket_spaces_requests(server):
+    started = time.monotonic()
+    _fetch_all([f'{server.origin}/{ARTICLE}'] * 5, requests_per_second=20, burst=1)
+    # The first request uses the burst, the other four wait 1/20 s each
+    assert time.monotonic() - started >= 4 / 20
+
+
+def test_unchanged_page_is_answered_304_and_served_from_the_cache(server, cache):
+    url = f'{server.origin}/{ARTICLE}'
+    _, (first,) = _fetch_all([url], http_cache=cache)
+    _, (second,) = _fetch_all([url], http_cache=cache)
+    assert second == first
+    assert server.not_modified == [f'https://{ARTICLE}']
+    counts = cache.stats()['sources']['test']
+    assert (counts['requests'], counts['not_modified'], counts['bytes_saved']) == (2, 1, len(first.encode('utf-8')))
+
+
+def test_refetch_after_an_evicted_304_goes_through_the_rate_limiter(server, cache, monkeypatch):
+    url = f'{server.origin}/{ARTICLE}'
+    _fetch_all([url], http_cache=cache)
+    # Validators were read, then the body was evicted before the 304 came back
+    monkeypatch.setattr(cache, 'load', lambda url: None)
+    acquired = []
+    acquire = async_engine.TokenBucket.acquire
+
+    async def counting_acquire(bucket):
+        acquired.append(time.monotonic())
+        await acquire(bucket)
+
+    monkeypatch.setattr(async_engine.TokenBucket, 'acquire', counting_acquire)
+    engine, (body,) = _fetch_all([url], http_cache=cache)
+    assert body
+    assert len(acquired) == 2
+    assert engine.stats == {'requests': 2, 'errors': 0}
+    assert server.hits.count(f'https://{ARTICLE}') == 3
+
+
+@pytest.mark.parametrize('path', ['www.webmanagercenter.com/missing/', 'unknown.example/'])
+def test_errors_are_counted_not_raised(server, path):
+    engine, (body,) = _fetch_all([f'{server.origin}/{path}'])
+    assert body is None
+    assert engine.stats == {'requests': 1, 'errors': 1}
@@ -0,0 +1,62 @@
+"""Streaming article collector: URL cleaning, dedupe and the per-stock quota."""
+
+import pytest
+
+from scrapers.collector import ArticleCollector, clean_url, url_key
+
+
+@pytest.mark.parametrize('url, cleaned', [
+    ('https://a.tn/x/?utm_source=fb&utm_campaign=c&id=7', 'https://a.tn/x/?id=7'),
+    ('https://a.tn/x/?fbclid=abc&gclid=def', 'https://a.tn/x/'),
+    ('https://a.tn/x/?UTM_Medium=rss&ref=home&page=2', 'https://a.tn/x/?page=2'),
+    ('https://a.tn/x/#comments', 'https://a.tn/x/'),
+    ('  https://a.tn/x/?s=SFBT&paged=2  ', 'https://a.tn/x/?s=SFBT&paged=2'),
+    ('https://a.tn/x/?q=', 'https://a.tn/x/?q='),
+])
+def test_clean_url_drops_tracking_params_and_the_fragment(url, cleaned):
+    assert clean_url(url) == cleaned
+
+
+def test_url_key_ignores_trailing_slash_and_host_case():
+    assert url_key('HTTPS://WWW.A.tn/x/?utm_source=fb#top') == url_key('https://www.a.tn/x') == 'https://www.a.tn/x'
+    assert url_key('https://a.tn/') == 'https://a.tn/'
+    # The path stays case-sensitive, and a real parameter still tells pages apart
+    assert url_key('https://a.tn/X') != url_key('https://a.tn/x')
+    assert url_key('https://a.tn/x?id=1') != url_key('https://a.tn/x?id=2')
+
+
+def test_duplicates_in_any_url_form_are_dropped():
+    collector = ArticleCollector()
+    articles = [
+        {'url': 'https://a.tn/x/', 'title': 'first'},
+        {'url': 'https://a.tn/x?utm_source=rss', 'title': 'tracked'},
+        {'url': 'https://A.tn/x/#respond', 'title': 'fragment'},
+        {'url': 'https://a.tn/y/', 'title': 'other'},
+        {'url': '', 'title': 'no url'},
+    ]
+    collected = list(collector.collect(articles))
+    assert [a['title'] for a in collected] == ['first', 'other']
+    assert len(collector.seen) == 2
+
+
+def test_collected_urls_are_cleaned_and_tagged():
+    collector = ArticleCollector(stock_code='SFBT')
+    (article,) = collector.collect([{'url': 'https://a.tn/x/?utm_source=fb#c'}])
+    assert article == {'url': 'https://a.tn/x/', 'stock_code': 'SFBT'}
+
+
+def test_quota_stops_pulling_from_the_stream():
+    pulled = []
+
+    def stream():
+        for i in range(100):
+            pulled.append(i)
+            yield {'url': f'https://a.tn/{i // 2}'}
+
+    collector = ArticleCollector(quota=3)
+    assert len(list(collector.collect(stream()))) == 3
+    # Items 0-4 hold the first three distinct URLs; nothing after them is pulled
+    assert pulled == [0, 1, 2, 3, 4]
+    assert collector.full
+    assert not collector.offer({'url': 'https://a.tn/new'})
+    assert list(collector.collect([{'url': 'https://a.tn/later'}])) == []
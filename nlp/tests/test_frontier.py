@@ -0,0 +1,102 @@
+"""Crawl frontier: persistence, URL forms and stopping pagination on known pages."""
+
+import sqlite3
+
+import pytest
+
+from scrapers.async_engine import AsyncScrapeEngine
+from scrapers.frontier import STATUS_FETCHED, CrawlFrontier
+from scrapers.news_scrapers import NewsAggregator
+
+ARTICLE = 'https://www.example.com/2024/05/14/sfbt-hausse-benefice-2023/'
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'frontier.sqlite3')
+
+
+def test_state_survives_a_restart(path):
+    frontier = CrawlFrontier(path)
+    frontier.add_discovered([{'url': ARTICLE, 'source': 'wmc'}, {'url': ARTICLE + 'x/', 'source': 'wmc'}])
+    frontier.mark_fetched([{'url': ARTICLE, 'source': 'wmc', 'content': 'body'}])
+    frontier.close()
+
+    reopened = CrawlFrontier(path)
+    assert reopened.known([ARTICLE, ARTICLE + 'x/', ARTICLE + 'y/']) == {ARTICLE, ARTICLE + 'x/'}
+    assert reopened.fetched([ARTICLE, ARTICLE + 'x/']) == {ARTICLE}
+    assert reopened.stats() == {'total': 2, 'discovered': 1, 'fetched': 1}
+
+
+def test_failed_fetch_is_retried_next_run(path):
+    frontier = CrawlFrontier(path)
+    frontier.mark_fetched([{'url': ARTICLE, 'source': 'wmc', 'content': None}])
+    assert frontier.known([ARTICLE]) == {ARTICLE}
+    assert frontier.fetched([ARTICLE]) == set()
+
+
+@pytest.mark.parametrize('variant', [
+    ARTICLE + '?utm_source=twitter&utm_medium=social',
+    ARTICLE + '#comments',
+    ARTICLE.rstrip('/'),
+    ARTICLE.replace('www.example.com', 'WWW.Example.com'),
+])
+def test_other_forms_of_a_known_url_are_known(path, variant):
+    frontier = CrawlFrontier(path)
+    frontier.add_discovered([{'url': ARTICLE}])
+    frontier.mark_fetched([{'url': ARTICLE, 'content': 'body'}])
+    # Returned as passed in, so callers can filter their own lists
+    assert frontier.known([variant]) == {variant}
+    assert frontier.fetched([variant]) == {variant}
+    assert frontier.all_known([variant, ARTICLE])
+
+
+def test_empty_page_is_not_all_known(path):
+    assert not CrawlFrontier(path).all_known([])
+
+
+def test_rows_stored_before_url_keys_are_rekeyed(path):
+    CrawlFrontier(path).close()
+    with sqlite3.connect(path) as conn:
+        conn.execute('PRAGMA user_version = 0')
+        conn.executemany(
+            "INSERT INTO crawl_frontier (url, source, first_seen, status) VALUES (?, 'wmc', '2024-01-01', ?)",
+            [(ARTICLE, STATUS_FETCHED), (ARTICLE.rstrip('/'), 'discovered')],
+        )
+    frontier = CrawlFrontier(path)
+    assert frontier.stats()['total'] == 1
+    assert frontier.fetched([ARTICLE]) == {ARTICLE}
+
+
+def _scrape(server, frontier, tmp_path):
+    aggregator = NewsAggregator(cache_dir=str(tmp_path), base_url_for=server.base_url_for)
+    return AsyncScrapeEngine(aggregator.scrapers, requests_per_second=100, burst=100, frontier=frontier).run(['SFBT'])
+
+
+def test_second_run_stops_at_the_first_known_page_and_fetches_nothing(server, path, tmp_path):
+    page_2 = 'https://www.webmanagercenter.com/?s=SFBT&paged=2'
+    first = _scrape(server, CrawlFrontier(path), tmp_path)
+    assert first
+    assert server.hits.count(page_2) == 1
+    hits = len(server.hits)
+
+    second = _scrape(server, CrawlFrontier(path), tmp_path)
+    assert second == []
+    # Page 1 was all known, so page 2 and the article bodies were not requested again
+    assert server.hits.count(page_2) == 1
+    assert not any(url.startswith('https://www.webmanagercenter.com/2024/') for url in server.hits[hits:])
+
+
+def test_links_with_tracking_params_count_as_known(server, path, tmp_path, monkeypatch):
+    from scrapers.news_scrapers import WebManagerScraper
+
+    parse = WebManagerScraper.parse_search_page
+
+    def tracked(self, soup, url):
+        return [{**article, 'url': article['url'] + '?utm_source=rss#respond'} for article in parse(self, soup, url)]
+
+    page_2 = 'https://www.webmanagercenter.com/?s=SFBT&paged=2'
+    _scrape(server, CrawlFrontier(path), tmp_path)
+    monkeypatch.setattr(WebManagerScraper, 'parse_search_page', tracked)
+    _scrape(server, CrawlFrontier(path), tmp_path)
+    assert server.hits.count(page_2) == 1
@@ -0,0 +1,103 @@
+"""Conditional-request HTTP cache: validators, 304 replay, eviction, sync and async clients."""
+
+import asyncio
+import os
+import time
+
+import httpx
+
+from scrapers.async_engine import AsyncScrapeEngine
+from scrapers.http_cache import CachedSession, HTTPCache
+
+ARTICLE = 'www.webmanagercenter.com/2024/05/14/sfbt-hausse-benefice-2023/'
+
+
+def test_validators_come_from_the_stored_response(cache):
+    cache.store('https://a.example/1', 'a', {'ETag': '"v1"', 'Last-Modified': 'Tue, 14 May 2024 08:00:00 GMT',
+                                             'Content-Type': 'text/html', 'Set-Cookie': 'x=1'}, b'<p>one</p>')
+    assert cache.validators('https://a.example/1') == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Tue, 14 May 2024 08:00:00 GMT',
+    }
+    headers, body = cache.load('https://a.example/1')
+    # Only what is needed to rebuild the response
+    assert headers == {'Content-Type': 'text/html', 'ETag': '"v1"', 'Last-Modified': 'Tue, 14 May 2024 08:00:00 GMT'}
+    assert body == b'<p>one</p>'
+
+
+def test_responses_without_validators_are_not_stored(cache):
+    cache.store('https://a.example/2', 'a', {'Content-Type': 'text/html'}, b'<p>two</p>')
+    assert cache.validators('https://a.example/2') == {}
+    assert cache.load('https://a.example/2') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    small = HTTPCache(str(tmp_path / 'small.sqlite3'), max_bytes=2500)
+    for name in ('a', 'b', 'c'):
+        small.store(f'https://a.example/{name}', 'a', {'ETag': name}, os.urandom(1000))
+        time.sleep(0.01)
+        if name == 'b':
+            # Reading a refreshes it: a is now the oldest
+            small.load('https://a.example/a')
+            time.sleep(0.01)
+    assert small.load('https://a.example/b') is None
+    assert small.load('https://a.example/a') is not None
+    assert small.load('https://a.example/c') is not None
+    assert small.stats()['bytes'] <= 2500 * 0.9
+
+
+def test_size_is_kept_across_restarts(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    first = HTTPCache(path)
+    first.store('https://a.example/1', 'a', {'ETag': '"1"'}, os.urandom(500))
+    stored = first.stats()['bytes']
+    first.close()
+    assert HTTPCache(path).stats()['bytes'] == stored > 0
+
+
+def test_cached_session_replays_a_304(server, cache):
+    session = CachedSession(cache, source='wmc')
+    url = f'{server.origin}/{ARTICLE}'
+    first = session.get(url)
+    second = session.get(url)
+    assert server.not_modified == [f'https://{ARTICLE}']
+    assert (second.status_code, second.text) == (200, first.text)
+    assert second.encoding == first.encoding
+    counts = cache.stats()['sources']['wmc']
+    assert (counts['requests'], counts['not_modified'], counts['bytes_saved']) == (2, 1, len(first.content))
+
+
+def test_cached_session_refetches_when_the_entry_was_evicted(server, cache, monkeypatch):
+    session = CachedSession(cache, source='wmc')
+    url = f'{server.origin}/{ARTICLE}'
+    body = session.get(url).text
+    monkeypatch.setattr(cache, 'load', lambda url: None)
+    response = session.get(url)
+    assert (response.status_code, response.text) == (200, body)
+    assert server.hits.count(f'https://{ARTICLE}') == 3
+
+
+def test_cached_session_skips_requests_it_cannot_replay(server, cache):
+    session = CachedSession(cache, source='wmc')
+    session.get(f'{server.origin}/{ARTICLE}', params={'page': 1})
+    session.get(f'{server.origin}/{ARTICLE}', stream=True).close()
+    assert cache.stats()['entries'] == 0
+
+
+def test_async_engine_shares_entries_with_the_sync_session(server, cache):
+    url = f'{server.origin}/{ARTICLE}'
+    body = CachedSession(cache, source='wmc').get(url).text
+
+    async def fetch():
+        async with httpx.AsyncClient() as client:
+            return await AsyncScrapeEngine({}, client=client).fetch(url, http_cache=cache, source='wmc')
+
+    assert asyncio.run(fetch()) == body
+    assert server.not_modified == [f'https://{ARTICLE}']
+    assert cache.stats()['sources']['wmc']['not_modified'] == 1
+
+
+def test_errors_are_not_stored(server, cache):
+    response = CachedSession(cache, source='wmc').get(f'{server.origin}/www.webmanagercenter.com/missing/')
+    assert response.status_code == 404
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,158 @@
+"""Parsing layer: the lxml/filtered/selectolax paths give what the old BeautifulSoup parsers gave."""
+
+import re
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scrapers import parsing
+from scrapers.fixture_server import DEFAULT_FIXTURES_DIR
+from scrapers.news_scrapers import BusinessNewsScraper, RadioExpressFMScraper, WebManagerScraper
+
+
+def _fixture(name: str) -> str:
+    return (Path(DEFAULT_FIXTURES_DIR) / name).read_text(encoding='utf-8')
+
+
+# --- Reference: the whole-page html.parser extractors these replaced ---
+
+def old_quote(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    data = {}
+    price_elem = soup.select_one("td.cours, .last-price, [class*='cours']")
+    if price_elem:
+        price_match = re.search(r"(\d+[,.]?\d*)", price_elem.get_text(strip=True).replace(" ", ""))
+        if price_match:
+            data["price"] = float(price_match.group(1).replace(",", "."))
+    for row in soup.select("table tr"):
+        cells = row.select("td")
+        if len(cells) >= 2:
+            label = cells[0].get_text(strip=True).lower()
+            value_text = cells[1].get_text(strip=True)
+            if "ouverture" in label or "open" in label:
+                match = re.search(r"(\d+[,.]?\d*)", value_text)
+                if match:
+                    data["open"] = float(match.group(1).replace(",", "."))
+            elif "haut" in label or "high" in label:
+                match = re.search(r"(\d+[,.]?\d*)", value_text)
+                if match:
+                    data["high"] = float(match.group(1).replace(",", "."))
+            elif "bas" in label or "low" in label:
+                match = re.search(r"(\d+[,.]?\d*)", value_text)
+                if match:
+                    data["low"] = float(match.group(1).replace(",", "."))
+            elif "volume" in label:
+                match = re.search(r"([\d\s]+)", value_text.replace(" ", ""))
+                if match:
+                    data["volume"] = int(match.group(1).replace(" ", ""))
+            elif "variation" in label or "change" in label:
+                match = re.search(r"([+-]?\d+[,.]?\d*)%?", value_text)
+                if match:
+                    data["change_pct"] = float(match.group(1).replace(",", "."))
+    return data
+
+
+def old_tunindex(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    value_elem = soup.select_one(".cours-actuel, .last-price, [class*='price']")
+    change_elem = soup.select_one(".variation, [class*='change']")
+    value = None
+    change_pct = None
+    if value_elem:
+        value_match = re.search(r"[\d\s]+[,.]?\d*", value_elem.get_text(strip=True).replace(" ", ""))
+        if value_match:
+            value = float(value_match.group().replace(",", ".").replace(" ", ""))
+    if change_elem:
+        pct_match = re.search(r"([+-]?\d+[,.]?\d*)%?", change_elem.get_text(strip=True))
+        if pct_match:
+            change_pct = float(pct_match.group(1).replace(",", "."))
+    return {'value': value, 'change_pct': change_pct}
+
+
+def old_top_movers(html, limit):
+    soup = BeautifulSoup(html, 'html.parser')
+    gainers, losers = [], []
+    for table in soup.select("table"):
+        header = table.find_previous(["h2", "h3", "div"])
+        header_text = header.get_text(strip=True).lower() if header else ""
+        for row in table.select("tr")[1:limit + 1]:
+            cells = row.select("td")
+            if len(cells) >= 3:
+                code_elem = cells[0].select_one("a")
+                code = code_elem.get_text(strip=True) if code_elem else cells[0].get_text(strip=True)
+                price_match = re.search(r"(\d+[,.]?\d*)", cells[1].get_text(strip=True))
+                change_match = re.search(r"([+-]?\d+[,.]?\d*)%?", cells[2].get_text(strip=True))
+                stock_data = {
+                    "code": code,
+                    "price": float(price_match.group(1).replace(",", ".")) if price_match else 0,
+                    "change_pct": float(change_match.group(1).replace(",", ".")) if change_match else 0,
+                }
+                if "hausse" in header_text or "gainer" in header_text:
+                    gainers.append(stock_data)
+                elif "baisse" in header_text or "loser" in header_text:
+                    losers.append(stock_data)
+    return gainers, losers
+
+
+# --- Market pages ---
+
+@pytest.mark.parametrize('use_selectolax', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not parsing.SELECTOLAX_AVAILABLE, reason='selectolax not installed')),
+])
+def test_quote_matches_the_old_parser(use_selectolax):
+    html = _fixture('ilboursa_cotation_sfbt.html')
+    expected = old_quote(html)
+    assert set(expected) == {'price', 'open', 'high', 'low', 'volume', 'change_pct'}
+    assert parsing.parse_quote(html, use_selectolax=use_selectolax) == expected
+
+
+def test_tunindex_matches_the_old_parser():
+    html = _fixture('ilboursa_tunindex.html')
+    expected = old_tunindex(html)
+    assert None not in expected.values()
+    assert parsing.parse_tunindex(html) == expected
+
+
+@pytest.mark.parametrize('limit', [3, 10])
+def test_top_movers_match_the_old_parser(limit):
+    html = _fixture('ilboursa_palmares.html')
+    gainers, losers = old_top_movers(html, limit)
+    assert gainers and losers
+    assert parsing.parse_top_movers(html, limit) == (gainers, losers)
+
+
+def test_quote_page_without_data_gives_nothing():
+    html = '<html><body><table><tr><td>Ouverture</td><td>-</td></tr></table></body></html>'
+    assert parsing.parse_quote(html, use_selectolax=False) == old_quote(html) == {}
+
+
+# --- Article pages ---
+
+ARTICLES = [
+    (WebManagerScraper, 'webmanagercenter_article_sfbt_benefice.html'),
+    (WebManagerScraper, 'webmanagercenter_article_sfbt_dividende.html'),
+    (WebManagerScraper, 'webmanagercenter_article_tunindex.html'),
+    (BusinessNewsScraper, 'businessnews_article_sfbt_ventes.html'),
+    (BusinessNewsScraper, 'businessnews_article_sfbt_export.html'),
+    (RadioExpressFMScraper, 'radioexpressfm_article_sfbt.html'),
+]
+
+
+@pytest.mark.parametrize('scraper_cls, name', ARTICLES)
+def test_filtered_article_matches_the_whole_page(scraper_cls, name):
+    html = _fixture(name)
+    scraper = scraper_cls()
+    expected = scraper.parse_article_page(BeautifulSoup(html, 'lxml'), name)
+    assert expected and expected['title'] and expected['content']
+    assert scraper.parse_article_page(parsing.make_soup(html, scraper_cls.ARTICLE_FILTER), name) == expected
+
+
+def test_subtree_filter_keeps_only_the_listed_subtrees():
+    html = ('<html><head><title>t</title><script>x()</script></head><body>'
+            '<nav><p>menu</p></nav><h1>Title</h1><div class="td-post-content"><p>one <b>two</b></p></div>'
+            '</body></html>')
+    soup = parsing.make_soup(html, parsing.SubtreeFilter(['h1'], r'td-post-content'))
+    assert [tag.name for tag in soup.find_all(True)] == ['h1', 'div', 'p', 'b']
+    assert soup.select_one('.td-post-content').get_text(strip=True) == 'onetwo'